@@ -1,7 +1,13 @@
 import streamlit as st
-from data import load_data, get_unique_types, get_unique_regions
-from visualizations import create_radar_chart
-from rapidfuzz import process, fuzz
+from competitive_sets import STAT_LABELS, STAT_ORDER, tier_html
+from data import STAT_COLUMNS, dataset_version, load_details, load_index, load_stat_matrix, load_variant_table, variant_image
+from evolution import EvolutionChain, describe_evolution, load_evolution_graph, prefetch
+from learnsets import load_learnset_index
+from search import load_search_engine
+from stat_calculator import BOOST_STAGES, LEVELS, load_speed_tiers
+from type_chart import TYPES, load_type_matchups, set_move_names, type_mask
+from tracing import finish_trace, snapshot_traces, span, start_trace
+from visualizations import cached_radar_chart
 
 # -------------------------------------
 # Page Configuration & Custom CSS
@@ -62,192 +68,506 @@ body {
 }
 </style>
 """
-st.markdown(custom_css, unsafe_allow_html=True)
 
 # -------------------------------------
 # Title & Logo
 # -------------------------------------
-col1, col2, col3 = st.columns([1, 2, 1])
-with col2:
-    st.markdown("<div class='logo-title-container'>", unsafe_allow_html=True)
-    st.image("final_logo.png", width=500)
+def render_header():
+    st.markdown(custom_css, unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.markdown("<div class='logo-title-container'>", unsafe_allow_html=True)
+        st.image("final_logo.png", width=500)
 
 
 # -------------------------------------
 # Data Loading
 # -------------------------------------
-data = load_data()
+def load_app_data():
+    """
+    Binds the shared dataset to the script's globals, one span per loader.
+    The loaders are cached per dataset version, so these spans show when a
+    rerun had to (re)build one.
+    """
+    global version, details, index, search_engine, stat_matrix, variant_table, evolution_graph, speed_tiers
+    # Shared by every session; a new database file is picked up on the next rerun.
+    version = dataset_version()
+    with span("details"):
+        details = load_details(version)
+    with span("index"):
+        index = load_index(version)
+    with span("search engine"):
+        search_engine = load_search_engine(version)
+    with span("stat matrix"):
+        stat_matrix = load_stat_matrix(version)
+    with span("variant table"):
+        variant_table = load_variant_table(version)
+    with span("evolution graph"):
+        evolution_graph = load_evolution_graph(version)
+    with span("speed tiers"):
+        speed_tiers = load_speed_tiers(version)
+
+
+# -------------------------------------
+# Team Builder
+# -------------------------------------
+def format_multiplier(multiplier):
+    return "—" if multiplier == 1 else f"×{multiplier:g}"
+
+def team_builder_view():
+    with span("type matchups"):
+        type_matchups = load_type_matchups(version)
+    st.markdown('<div class="subtitle">Team Builder</div>', unsafe_allow_html=True)
+    team_names = st.multiselect(
+        "Team Members (up to six)",
+        options=stat_matrix.names,
+        format_func=str.capitalize,
+        max_selections=6,
+        key="team",
+    )
+    if not team_names:
+        st.info("Pick up to six Pokémon to see the team's weaknesses, resistances and coverage.")
+        return
+
+    with span("team moves"):
+        team_rows = [stat_matrix.row_by_name[name.lower()] for name in team_names]
+        team_attack_types = type_mask(())
+        stab_only = []
+        for name, row in zip(team_names, team_rows):
+            member = details.load(int(stat_matrix.positions[row]))
+            member_variant = next((v for v in member.variants if v.name == name), None)
+            attack_types = type_matchups.attack_types(set_move_names(member_variant) if member_variant else set())
+            if not attack_types.any():
+                # No known damaging moves in its sets: count its own types.
+                attack_types = type_mask(stat_matrix.variant_types[row])
+                stab_only.append(name.capitalize())
+            team_attack_types |= attack_types
+
+    with span("defensive matchups"):
+        st.markdown("### Defensive Matchups")
+        team_defense = type_matchups.team_defense(team_rows)
+        defense_table = {name.capitalize(): [format_multiplier(m) for m in team_defense[i]] for i, name in enumerate(team_names)}
+        defense_table["Weak"] = (team_defense > 1).sum(axis=0)
+        defense_table["Resist"] = (team_defense < 1).sum(axis=0)
+        st.dataframe(defense_table | {"Attacking Type": [t.capitalize() for t in TYPES]},
+                     column_order=["Attacking Type"] + list(defense_table), hide_index=True, use_container_width=True)
+
+    with span("move coverage"):
+        st.markdown("### Move Coverage")
+        covered = type_matchups.coverage(team_attack_types)
+        st.write(f"Super effective against **{covered.mean():.0%}** of the {len(covered)} type combinations in the Pokédex.")
+        if stab_only:
+            st.caption(f"No move types known for {', '.join(stab_only)}; their own types were counted instead.")
+        walls = ["/".join(t.capitalize() for t in combo) for combo, hit in zip(type_matchups.combos, covered) if not hit]
+        if walls:
+            st.write("Not hit super effectively: " + ", ".join(walls))
+
+    if len(team_names) < 6:
+        with span("suggested additions"):
+            st.markdown("### Suggested Additions")
+            candidates = type_matchups.rank_candidates(team_rows, team_attack_types, stat_matrix.bst)
+            st.dataframe(
+                {
+                    "Pokémon": [stat_matrix.names[row].capitalize() for row, _, _ in candidates],
+                    "Types": [", ".join(t.capitalize() for t in stat_matrix.variant_types[row]) for row, _, _ in candidates],
+                    "Open Weaknesses": [weaknesses for _, weaknesses, _ in candidates],
+                    "Coverage": [f"{coverage:.0%}" for _, _, coverage in candidates],
+                    "BST": [int(stat_matrix.bst[row]) for row, _, _ in candidates],
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+
+# -------------------------------------
+# Move Search
+# -------------------------------------
+MOVE_RESULTS_LIMIT = 100
+
+def format_move(name):
+    return name.replace("-", " ").title()
+
+def move_search_view():
+    with span("learnset index"):
+        learnset_index = load_learnset_index(version)
+    st.markdown('<div class="subtitle">Move Search</div>', unsafe_allow_html=True)
+    if learnset_index is None:
+        st.info("This database has no learnsets; run database_construction/build_learnsets.py to add them.")
+        return
+
+    learn_moves = st.multiselect("Learns All Of", options=learnset_index.moves, format_func=format_move, key="learn_moves")
+    col_types, col_tiers = st.columns(2)
+    learn_types = col_types.multiselect("Type(s)", options=stat_matrix.types, format_func=str.capitalize, key="learn_types")
+    learn_tiers = col_tiers.multiselect("Tier(s)", options=stat_matrix.tiers, key="learn_tiers")
+    if not learn_moves:
+        st.info("Pick one or more moves to list the Pokémon that learn all of them.")
+        return
+
+    with span("learners"):
+        rows = learnset_index.learners_of(learn_moves, learn_types, learn_tiers)
+    st.write(f"**{len(rows)}** Pokémon learn {', '.join(format_move(m) for m in learn_moves)}.")
+    shown = rows[:MOVE_RESULTS_LIMIT]
+    st.dataframe(
+        {
+            "Pokémon": [stat_matrix.names[row].capitalize() for row in shown],
+            "Types": [", ".join(t.capitalize() for t in stat_matrix.variant_types[row]) for row in shown],
+            "BST": [int(stat_matrix.bst[row]) for row in shown],
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+    if len(rows) > MOVE_RESULTS_LIMIT:
+        st.caption(f"Showing the first {MOVE_RESULTS_LIMIT}; narrow the search with types or tiers.")
 
 # -------------------------------------
-# Sidebar Navigation & Filters
+# Sidebar Filters
 # -------------------------------------
-st.sidebar.header("Filter Pokémon")
-all_types = get_unique_types(data)
-selected_types = st.sidebar.multiselect("Select Type(s)", options=all_types)
-all_regions = get_unique_regions(data)
-selected_regions = st.sidebar.multiselect("Select Region(s)", options=all_regions)
+def column_label(column):
+    return {"dex_number": "Dex Number", "bst": "BST"}.get(column, column.replace("-", " ").title())
+
+def sidebar_filters():
+    """
+    Draws the Pokédex filters.
+
+    :return: (selected_types, selected_regions, stat_ranges, sort_by, sort_descending)
+    """
+    st.sidebar.header("Filter Pokémon")
+    selected_types = st.sidebar.multiselect("Select Type(s)", options=index.types)
+    selected_regions = st.sidebar.multiselect("Select Region(s)", options=index.regions)
+
+    st.sidebar.header("Browse by Stats")
+    stat_ranges = {}
+    with st.sidebar.expander("Stat Ranges"):
+        for column in STAT_COLUMNS:
+            low, high = variant_table.bounds[column]
+            stat_ranges[column] = st.slider(column_label(column), low, high, (low, high), key=f"range_{column}")
+    sort_by = st.sidebar.selectbox("Sort By", options=["dex_number", "name"] + STAT_COLUMNS, format_func=column_label, key="sort_by")
+    sort_descending = st.sidebar.checkbox("Highest First", key="sort_descending")
+    return selected_types, selected_regions, stat_ranges, sort_by, sort_descending
 
 # -------------------------------------
 # Session State and Search Query
 # -------------------------------------
-if "search_query" not in st.session_state:
-    st.session_state["search_query"] = ""
+def search_input():
+    """Draws the search box, applying a pending jump first, and returns the query."""
+    if "search_query" not in st.session_state:
+        st.session_state["search_query"] = ""
 
-if "selected_evo" in st.session_state:
-    st.session_state["search_query"] = st.session_state.pop("selected_evo")
+    if "jump_to" in st.session_state:
+        st.session_state["search_query"] = st.session_state.pop("jump_to")
+        # The keyed text input takes its value from Session State.
+        st.session_state["search_input"] = st.session_state["search_query"]
+        # Jumps that know their target keep it for as long as the query is unchanged.
+        st.session_state["pinned_position"] = (st.session_state["search_query"], st.session_state.pop("jump_position", None))
 
-current_search_query = st.text_input(
-    "Enter Pokémon Name or National Dex Number:",
-    value=st.session_state["search_query"],
-    key="search_input",
-    help="Type part of the Pokémon name or its Dex number."
-)
+    current_search_query = st.text_input(
+        "Enter Pokémon Name or National Dex Number:",
+        key="search_input",
+        help="Type part of the Pokémon name or its Dex number."
+    )
 
-st.session_state["search_query"] = current_search_query
-search_query = st.session_state["search_query"]
+    st.session_state["search_query"] = current_search_query
+    return st.session_state["search_query"]
 
 # -------------------------------------
 # Pokémon Filtering and Selection (Real-time Suggestions)
 # -------------------------------------
-selected_pokemon = None
-suggestions = [] # Initialize suggestions list
+def select_pokemon(search_query, selected_types, selected_regions):
+    """
+    Resolves the query to a database position, or to fuzzy suggestions when
+    no name matches.
 
-filtered_pokemon = [
-    p for p in data.get("pokemon", [])
-    if ((not selected_types) or any(t in p.get("types", []) for t in selected_types))
-    and ((not selected_regions) or (p.get("region") in selected_regions))
-]
+    :return: (selected_position, suggestions)
+    """
+    selected_position = None
+    suggestions = [] # Initialize suggestions list
 
-if search_query:
-    if search_query.isdigit():
-        selected_pokemon = next(
-            (p for p in filtered_pokemon if str(p.get("dex_number", "")) == search_query),
-            None
-        )
-        if selected_pokemon is None:
-            st.error("No Pokémon found with that dex number!")
-    else:
-        exact_matches = [p for p in filtered_pokemon if p["name"].lower() == search_query.lower()]
-        if exact_matches:
-            selected_pokemon = exact_matches[0]
+    with span("filter"):
+        filtered_positions, _ = index.filter(selected_types, selected_regions)
+
+    pinned_query, pinned_position = st.session_state.get("pinned_position", (None, None))
+    if search_query and search_query == pinned_query and pinned_position is not None:
+        selected_position = pinned_position
+    elif search_query:
+        if search_query.isascii() and search_query.isdigit():
+            selected_position = index.position_by_dex(int(search_query), filtered_positions)
+            if selected_position is None:
+                st.error("No Pokémon found with that dex number!")
         else:
-            names_list = [p["name"] for p in filtered_pokemon]
-            fuzzy_suggestions = process.extract(search_query, names_list, scorer=fuzz.partial_ratio, limit=5) # Limit to 5 suggestions
-            suggestions = [match for match, score, _ in fuzzy_suggestions if score >= 50]
+            selected_position = index.position_by_name(search_query, filtered_positions)
+            if selected_position is None:
+                with span("fuzzy suggestions"):
+                    suggestions = search_engine.suggest(search_query, selected_types, selected_regions, limit=5) # Limit to 5 suggestions
+    return selected_position, suggestions
+
+THUMBNAIL_SIZE = 96
+
+def variant_thumbnail(name):
+    """Local thumbnail of the named variant, or None when it has no local sprite."""
+    row = stat_matrix.row_by_name.get(name.lower())
+    if row is None:
+        return None
+    variant = details.load(int(stat_matrix.positions[row])).variant(name)
+    return variant_image(variant, THUMBNAIL_SIZE, local_only=True) if variant else None
+
+def show_suggestions(search_query, selected_pokemon, suggestions):
+    if suggestions and not selected_pokemon: # Display suggestions only if there are suggestions and no exact match
+        st.markdown("<div style='margin-bottom: 10px;'>Suggestions:</div>", unsafe_allow_html=True)
+        suggestion_cols = st.columns(len(suggestions)) # Use columns for layout
+        for i, suggestion_name in enumerate(suggestions):
+            with suggestion_cols[i]:
+                thumbnail = variant_thumbnail(suggestion_name)
+                if thumbnail:
+                    st.image(thumbnail, width=64)
+                if st.button(suggestion_name.capitalize(), key=f"suggestion_{i}",  use_container_width=True, ):
+                    st.session_state["jump_to"] = suggestion_name
+                    st.rerun() # Rerun to update with selected suggestion
 
+    elif search_query and not selected_pokemon and not suggestions: # Error message if no pokemon and no suggestions
+        if not (search_query.isascii() and search_query.isdigit()): # Only show error for name searches, dex number error already shown
+            st.error("No Pokémon found with that query!")
+    elif not search_query:
+        st.info("Start by typing a Pokémon name or Dex number above.")
 
-if suggestions and not selected_pokemon: # Display suggestions only if there are suggestions and no exact match
-    st.markdown("<div style='margin-bottom: 10px;'>Suggestions:</div>", unsafe_allow_html=True)
-    suggestion_cols = st.columns(len(suggestions)) # Use columns for layout
-    for i, suggestion_tuple in enumerate(suggestions): # suggestions is a list of tuples now
-        suggestion_name = suggestion_tuple[0]
-        with suggestion_cols[i]:
-            if st.button(suggestion_name.capitalize(), key=f"suggestion_{i}",  use_container_width=True, ):
-                st.session_state["search_query"] = suggestion_name
-                st.rerun() # Rerun to update with selected suggestion
 
-elif search_query and not selected_pokemon and not suggestions: # Error message if no pokemon and no suggestions
-    if not search_query.isdigit(): # Only show error for name searches, dex number error already shown
-        st.error("No Pokémon found with that query!")
-elif not search_query:
-    st.info("Start by typing a Pokémon name or Dex number above.")
+# -------------------------------------
+# Browse Table (paged)
+# -------------------------------------
+PAGE_SIZE = 25
+
+def browse_table(search_query, selected_types, selected_regions, stat_ranges, sort_by, sort_descending):
+    with span("query"):
+        browse_results = variant_table.query(selected_types, selected_regions, stat_ranges, sort_by, sort_descending)
+    with st.expander(f"Browse Pokémon ({len(browse_results)} variants)", expanded=not search_query):
+        if len(browse_results):
+            page_count = -(-len(browse_results) // PAGE_SIZE)
+            # Narrower filters can leave the stored page past the end.
+            if st.session_state.get("browse_page", 1) > page_count:
+                st.session_state["browse_page"] = page_count
+            page = st.number_input("Page", min_value=1, max_value=page_count, key="browse_page")
+            start = (page - 1) * PAGE_SIZE
+            page_rows = browse_results.iloc[start:start + PAGE_SIZE]
+            display_columns = ["dex_number", "name", "type_1", "type_2", "tier"] + STAT_COLUMNS
+            st.dataframe(
+                page_rows[display_columns].rename(columns=column_label),
+                hide_index=True,
+                use_container_width=True,
+            )
+            st.caption(f"Showing {start + 1}–{start + len(page_rows)} of {len(browse_results)} (page {page} of {page_count})")
+        else:
+            st.info("No Pokémon match these filters.")
 
 
 # -------------------------------------
 # Display Pokémon Details
 # -------------------------------------
-if selected_pokemon:
+def base_stats_tab(variant):
+    st.markdown('<div class="subtitle">Base Stats</div>', unsafe_allow_html=True)
+    if variant.base_stats:
+        radar_chart = cached_radar_chart(variant.stats or variant.base_stats)
+        st.plotly_chart(radar_chart, use_container_width=True)
+    else:
+        st.info("No base stats available.")
+
+def abilities_tab(variant):
+    st.markdown('<div class="subtitle">Abilities</div>', unsafe_allow_html=True)
+    abilities = variant.abilities
+    if abilities:
+        for ability in abilities:
+            st.markdown(f"**{ability.name.capitalize()}**")
+            st.write(ability.description or "")
+    else:
+        st.info("No abilities available.")
+
+def sets_tab(variant):
+    st.markdown('<div class="subtitle">Competitive Sets</div>', unsafe_allow_html=True)
+    tiers = list(variant.tiers)
+    if tiers:
+        # Only the chosen tier is rendered, with one call for all its sets.
+        tier = st.segmented_control("Tier", tiers, format_func=str.upper, default=tiers[0], key=f"set_tier_{variant.name}")
+        if tier:
+            st.markdown(tier_html(variant.sets_in(tier)), unsafe_allow_html=True)
+            set_stats(variant.sets_in(tier), tier)
+    else:
+        st.info("No competitive sets available for this variant.")
+
+def describe_speed(speed, tier_speeds, tier):
+    slower, ties = tier_speeds.outspeeds(speed)
+    boosted = ", ".join(f"{tier_speeds.outspeeds(speed, stage)[0]} at +{stage}" for stage in BOOST_STAGES)
+    return (f"Outspeeds {slower} of {len(tier_speeds)} {tier.upper()} sets ({ties} tied; {boosted}); "
+            f"{tier_speeds.outsped_by(speed, BOOST_STAGES[0])} outspeed it after a +1 of their own.")
+
+def set_stats(tier_sets, tier):
+    """Final stats of a tier's sets and where their Speed falls in the tier, when the database has them."""
+    if not any(set_record.stats for set_record in tier_sets):
+        return
+    level = st.segmented_control("Level", LEVELS, default=LEVELS[-1], key=f"set_level_{tier}") or LEVELS[-1]
+    rows = [(set_record.name, set_record.stats_at(level)) for set_record in tier_sets]
+    rows = [(name, stats) for name, stats in rows if stats]
+    st.dataframe(
+        {"Set": [name for name, _ in rows],
+         **{STAT_LABELS[stat]: [stats.get(stat) for _, stats in rows] for stat in STAT_ORDER}},
+        hide_index=True,
+        use_container_width=True,
+    )
+    tier_speeds = (speed_tiers or {}).get((tier, level))
+    if tier_speeds is not None:
+        for name, stats in rows:
+            st.caption(f"**{name}** ({stats['spe']} Spe): {describe_speed(stats['spe'], tier_speeds, tier)}")
+        with st.expander(f"{tier.upper()} speed tiers at level {level}"):
+            st.dataframe(tier_speeds.frame(), hide_index=True, use_container_width=True)
+
+def evolution_tab(selected_pokemon, selected_position):
+    st.markdown('<div class="subtitle">Evolution Chain</div>', unsafe_allow_html=True)
+    chain = evolution_graph.chain_of(selected_position) if evolution_graph else None
+    if chain is None and selected_pokemon.evolution_chain:
+        chain = EvolutionChain.from_record(selected_pokemon.evolution_chain, index)
+    if chain is not None:
+        st.write("Click on a Pokémon to load its details:")
+        # One column per stage; branches stack within their stage.
+        cols = st.columns(len(chain.stages()))
+        for stage, members in zip(cols, chain.stages()):
+            with stage:
+                for i in members:
+                    name, position = chain.names[i], chain.positions[i]
+                    thumbnail = variant_thumbnail(name) if position is not None else None
+                    if thumbnail:
+                        st.image(thumbnail, width=64)
+                    # Members missing from the database cannot be loaded.
+                    if st.button(name.capitalize(), key=f"evo_{i}", disabled=position is None):
+                        st.session_state["jump_to"] = name
+                        st.session_state["jump_position"] = position
+                        st.rerun()
+                    if i in chain.parent:
+                        st.caption(describe_evolution(chain.parent[i][1]))
+        prefetch(details, chain.neighbours(selected_position), version)
+    else:
+        st.info("No evolution chain data available.")
+
+def similar_tab(variant):
+    st.markdown('<div class="subtitle">Similar Pokémon</div>', unsafe_allow_html=True)
+    st.write("Variants with the closest base stats, compared stat by stat relative to the whole Pokédex.")
+    similar_cols = st.columns([1, 2, 2])
+    with similar_cols[0]:
+        k = st.number_input("Results", min_value=1, max_value=25, value=5, key="similar_k")
+    with similar_cols[1]:
+        similar_types = st.multiselect("Restrict to type(s)", options=stat_matrix.types, key="similar_types")
+    with similar_cols[2]:
+        similar_tiers = st.multiselect("Restrict to tier(s)", options=[t.upper() for t in stat_matrix.tiers], key="similar_tiers")
+
+    neighbours = stat_matrix.similar(variant.name, int(k), similar_types, [t.lower() for t in similar_tiers])
+    if neighbours:
+        for i, (row, distance) in enumerate(neighbours):
+            name_col, types_col, bst_col, distance_col = st.columns([3, 3, 2, 2])
+            with name_col:
+                if st.button(stat_matrix.names[row].capitalize(), key=f"similar_{i}", use_container_width=True):
+                    st.session_state["jump_to"] = stat_matrix.names[row]
+                    st.rerun()
+            types_col.write(", ".join(t.capitalize() for t in stat_matrix.variant_types[row]))
+            bst_col.write(f"BST {int(stat_matrix.bst[row])}")
+            distance_col.write(f"Distance {distance:.2f}")
+    else:
+        st.info("No similar Pokémon match these filters.")
+
+def pokemon_details(selected_pokemon, selected_position):
     st.markdown(
-        f'<div class="subtitle">#{selected_pokemon["dex_number"]} - {selected_pokemon["name"].capitalize()}</div>',
+        f'<div class="subtitle">#{selected_pokemon.dex_number} - {selected_pokemon.name.capitalize()}</div>',
         unsafe_allow_html=True,
     )
 
-    variants = selected_pokemon.get("variants", [])
+    variants = selected_pokemon.variants
     if variants:
         if len(variants) > 1:
-            variant_options = [v["name"] for v in variants]
+            variant_options = [v.name for v in variants]
             selected_variant_name = st.selectbox("Select Variant", variant_options, key="selected_variant")
-            variant = next((v for v in variants if v["name"] == selected_variant_name), variants[0])
+            variant = next((v for v in variants if v.name == selected_variant_name), variants[0])
         else:
             variant = variants[0]
 
         st.image(
-            variant["image_url"],
-            caption=variant["name"].capitalize(),
+            variant_image(variant),
+            caption=variant.name.capitalize(),
             use_container_width=True
         )
     else:
         st.error("No variant information available.")
 
     st.markdown('<div class="container">', unsafe_allow_html=True)
-    tabs = st.tabs(["Base Stats", "Abilities", "Competitive Sets", "Evolution Chain"])
-
-    with tabs[0]:
-        st.markdown('<div class="subtitle">Base Stats</div>', unsafe_allow_html=True)
-        base_stats = variant.get("base_stats", {})
-        if base_stats:
-            radar_chart = create_radar_chart(base_stats)
-            st.plotly_chart(radar_chart, use_container_width=True)
-        else:
-            st.info("No base stats available.")
-
-    with tabs[1]:
-        st.markdown('<div class="subtitle">Abilities</div>', unsafe_allow_html=True)
-        abilities = variant.get("abilities", [])
-        if abilities:
-            for ability in abilities:
-                st.markdown(f"**{ability['name'].capitalize()}**")
-                st.write(ability.get("description", ""))
-        else:
-            st.info("No abilities available.")
-
-    with tabs[2]:
-        st.markdown('<div class="subtitle">Competitive Sets</div>', unsafe_allow_html=True)
-        sets_data = variant.get("sets", {})
-        if sets_data:
-            for tier, sets_dict in sets_data.items():
-                st.markdown(f"### {tier.upper()}")
-                for set_name, set_data in sets_dict.items():
-                    with st.expander(set_name):
-                        st.markdown("**Moves:** ⚔️")
-                        moves = set_data.get("moves", [])
-                        if moves:
-                            for move in moves:
-                                if isinstance(move, list):
-                                    st.write(", ".join(move))
-                                else:
-                                    st.write(move)
-                        else:
-                            st.write("N/A")
-                        st.markdown(f"**Ability:** ⭐ {set_data.get('ability', 'N/A')}")
-                        st.markdown(f"**Item:** 🎒 {set_data.get('item', 'N/A')}")
-                        st.markdown(f"**Nature:** 🌿 {set_data.get('nature', 'N/A')}")
-                        st.markdown("**IVs:**")
-                        st.write(set_data.get("ivs", {}))
-                        st.markdown("**EVs:**")
-                        st.write(set_data.get("evs", {}))
-                        st.markdown(f"**Tera Types:** {set_data.get('teratypes', 'N/A')}")
-        else:
-            st.info("No competitive sets available for this variant.")
-
-    with tabs[3]:
-        st.markdown('<div class="subtitle">Evolution Chain</div>', unsafe_allow_html=True)
-        evolution_chain = selected_pokemon.get("evolution_chain", [])
-        if evolution_chain:
-            st.write("Click on a Pokémon to load its details:")
-            cols = st.columns(len(evolution_chain))
-            for i, evo in enumerate(evolution_chain):
-                with cols[i]:
-                    if st.button(evo["name"].capitalize(), key=f"evo_{i}"):
-                        st.session_state["selected_evo"] = evo["name"]
-                        try:
-                            st.rerun()
-                        except AttributeError:
-                            try:
-                                st._rerun()  # Fallback for older versions
-                            except Exception:
-                                st.write("Please refresh the page.")
-                                st.stop()
-        else:
-            st.info("No evolution chain data available.")
+    tabs = st.tabs(["Base Stats", "Abilities", "Competitive Sets", "Evolution Chain", "Similar Pokémon"])
+
+    # Streamlit renders every tab on each rerun, so each one gets a span.
+    with tabs[0], span("tab: base stats"):
+        base_stats_tab(variant)
+    with tabs[1], span("tab: abilities"):
+        abilities_tab(variant)
+    with tabs[2], span("tab: competitive sets"):
+        sets_tab(variant)
+    with tabs[3], span("tab: evolution chain"):
+        evolution_tab(selected_pokemon, selected_position)
+    with tabs[4], span("tab: similar"):
+        similar_tab(variant)
     st.markdown("</div>", unsafe_allow_html=True)
+
+def pokedex_view():
+    with span("filters"):
+        selected_types, selected_regions, stat_ranges, sort_by, sort_descending = sidebar_filters()
+    search_query = search_input()
+    with span("search"):
+        selected_position, suggestions = select_pokemon(search_query, selected_types, selected_regions)
+
+    if selected_position is not None:
+        with span("load record"):
+            selected_pokemon = details.load(selected_position)
+    else:
+        selected_pokemon = None
+
+    with span("suggestions"):
+        show_suggestions(search_query, selected_pokemon, suggestions)
+    with span("browse table"):
+        browse_table(search_query, selected_types, selected_regions, stat_ranges, sort_by, sort_descending)
+    if selected_pokemon:
+        with span("pokemon details"):
+            pokemon_details(selected_pokemon, selected_position)
+
+# -------------------------------------
+# Debug Panel (?debug=1)
+# -------------------------------------
+def debug_panel(trace):
+    """Shows the spans of this rerun and the rerun times of this process in the sidebar."""
+    with st.sidebar.expander("Timings", expanded=True):
+        st.dataframe(
+            {
+                "Span": ["· " * s["depth"] + s["name"] for s in trace.spans],
+                "ms": [round(s["ms"], 2) if s["ms"] is not None else None for s in trace.spans],
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+        totals = sorted(t.total_ms for t in snapshot_traces() if t.name == trace.name)
+        st.caption(f"This rerun so far: {trace.elapsed_ms():.1f} ms.")
+        if totals:
+            st.caption(f"Last {len(totals)} {trace.name} reruns in this process: "
+                       f"median {totals[len(totals) // 2]:.1f} ms, slowest {totals[-1]:.1f} ms.")
+
+
+VIEWS = {"Pokédex": pokedex_view, "Team Builder": team_builder_view, "Move Search": move_search_view}
+
+# One trace per rerun, finished even when the run ends early with st.rerun().
+trace = start_trace()
+try:
+    with span("header"):
+        render_header()
+    with span("load data"):
+        load_app_data()
+
+    # -------------------------------------
+    # Sidebar Navigation
+    # -------------------------------------
+    view = st.sidebar.radio("View", list(VIEWS), key="view")
+    trace.name = view
+    with span(view):
+        VIEWS[view]()
+
+    if st.query_params.get("debug"):
+        debug_panel(trace)
+finally:
+    finish_trace()
@@ -0,0 +1,198 @@
+"""
+Rerun latency of app.py, headless: scripted search-and-click sessions are
+replayed with Streamlit's AppTest against synthetic databases, and every
+rerun is timed. Reports p50/p95/p99 per scale and action, the median of the
+slowest spans recorded by tracing.py, and compares them with a stored
+baseline.
+
+    python benchmarks/bench_app.py --scales 1 10 100
+    python benchmarks/bench_app.py --scales 1 10 --update-baseline
+
+Every scale runs in its own subprocess, so the shared caches start cold as
+after a server start, in a temporary directory holding a full build of the
+database (learnsets, evolution graph and detail store). Each session is a
+fresh AppTest, i.e. a new browser session on the same server.
+
+With ten samples per action, an action's p95 is its slowest rerun and moves
+with every garbage collection, so the regression check compares each
+action's p50 and the p95 over all reruns of a scale with the baseline. One
+that is more than --tolerance (and more than --noise-ms) above it is
+reported as a regression, and the script exits with status 1. The single
+"first load" is not checked.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, make_synthetic_database
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_app_baseline.json")
+
+
+def build_database(scale, directory):
+    """Writes the database files the app reads into `directory`."""
+    sys.path.insert(0, ROOT)
+    from data import build_detail_store
+    from evolution import build_evolution_graph
+    from learnsets import build_learnsets
+
+    database = make_synthetic_database(scale, with_sets=True, with_learners=True)
+    database["learnsets"] = build_learnsets(database)
+    for move in database["moves"]:
+        move.pop("method", None)
+    database["evolution_chains"] = build_evolution_graph(database["pokemon"])
+    with open(os.path.join(directory, "combined_database.json"), "w", encoding="utf-8") as f:
+        json.dump(database, f, separators=(",", ":"))
+    build_detail_store(database, os.path.join(directory, "pokemon_details"))
+    shutil.copy(os.path.join(ROOT, "final_logo.png"), directory)
+    return [p["name"] for p in database["pokemon"]], [m["name"] for m in database["moves"]]
+
+
+def session_script(rng, names, moves):
+    """
+    One user's session: (action, step) pairs, where step drives an AppTest
+    and returns it so the rerun it triggers can be timed.
+    """
+    target = rng.choice(names)
+    team = rng.sample(names, 3)
+
+    def click(prefix):
+        def step(at):
+            buttons = [b for b in at.button if b.key and b.key.startswith(prefix) and not b.disabled]
+            return buttons[0].click() if buttons else None
+        return step
+
+    return [
+        ("type partial name", lambda at: at.text_input(key="search_input").set_value(target[:4])),
+        ("click suggestion", click("suggestion_")),
+        ("type full name", lambda at: at.text_input(key="search_input").set_value(target)),
+        ("click evolution", click("evo_")),
+        ("click similar", click("similar_")),
+        ("type dex number", lambda at: at.text_input(key="search_input").set_value(str(rng.randint(1, len(names))))),
+        ("filter by type", lambda at: at.sidebar.multiselect[0].set_value([rng.choice(at.sidebar.multiselect[0].options)])),
+        ("clear filters", lambda at: at.sidebar.multiselect[0].set_value([])),
+        ("switch to team builder", lambda at: at.sidebar.radio(key="view").set_value("Team Builder")),
+        ("pick team", lambda at: at.multiselect(key="team").set_value(team)),
+        ("switch to move search", lambda at: at.sidebar.radio(key="view").set_value("Move Search")),
+        ("pick moves", lambda at: at.multiselect(key="learn_moves").set_value(rng.sample(moves, 2))),
+        ("switch to pokedex", lambda at: at.sidebar.radio(key="view").set_value("Pokédex")),
+    ]
+
+
+def run_child(scale, sessions, seed):
+    """Builds the database, replays the sessions and prints the timings as JSON."""
+    directory = tempfile.mkdtemp(prefix=f"bench_app_{scale}x_")
+    names, moves = build_database(scale, directory)
+    os.chdir(directory)
+    from streamlit.testing.v1 import AppTest
+    import tracing
+
+    rng = random.Random(seed)
+    timings = {}
+    spans = {}
+
+    def timed(action, at):
+        start = time.perf_counter()
+        at.run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(f"{action}: {at.exception}")
+        timings.setdefault(action, []).append(elapsed)
+        if tracing.recent_traces:
+            for record in tracing.recent_traces[-1].spans:
+                if record["ms"] is not None:
+                    spans.setdefault(record["name"], []).append(record["ms"])
+
+    for session in range(sessions):
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        timed("first load" if session == 0 else "open session", at)
+        for action, step in session_script(rng, names, moves):
+            if step(at) is not None:
+                timed(action, at)
+    print(json.dumps({"species": len(names), "timings": timings, "spans": spans}))
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def summarize(values):
+    return {"n": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "p99": percentile(values, 0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed increase over the baseline.")
+    parser.add_argument("--noise-ms", type=float, default=10.0, help="Increases below this are never flagged.")
+    parser.add_argument("--spans", type=int, default=8, help="Number of slowest spans to list per scale.")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child, args.sessions, args.seed)
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for scale in args.scales:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(scale), "--sessions", str(args.sessions), "--seed", str(args.seed)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        summary = {action: summarize(values) for action, values in result["timings"].items()}
+        summary["all reruns"] = summarize([v for action, values in result["timings"].items() if action != "first load" for v in values])
+        results[str(scale)] = summary
+
+        print(f"\n{scale}x: {result['species']} species, {args.sessions} sessions")
+        print(f"{'action':<24} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'checked':>8} {'baseline':>9}")
+        for action, stats in summary.items():
+            metric = "p95" if action == "all reruns" else "p50"
+            previous = baseline.get(str(scale), {}).get(action, {}).get(metric)
+            flag = ""
+            if (action != "first load" and previous is not None and stats[metric] > previous * (1 + args.tolerance)
+                    and stats[metric] - previous > args.noise_ms):
+                flag = "  REGRESSION"
+                regressions.append((scale, action, metric, previous, stats[metric]))
+            previous_text = f"{previous:.1f}" if previous is not None else "-"
+            print(f"{action:<24} {stats['n']:>4} {stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} "
+                  f"{metric:>8} {previous_text:>9}{flag}")
+
+        slowest = sorted(result["spans"].items(), key=lambda item: statistics.median(item[1]), reverse=True)[:args.spans]
+        print(f"{'span':<24} {'median ms':>10}")
+        for name, values in slowest:
+            print(f"{name:<24} {statistics.median(values):>10.2f}")
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"\nBaseline saved as '{args.baseline}'.")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against the baseline:")
+        for scale, action, metric, previous, current in regressions:
+            print(f"  {scale}x {action}: {metric} {previous:.1f} ms -> {current:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Per-rerun cost of the radar chart: building and serializing a fresh figure
+with create_radar_chart against the memoized cached_radar_chart, both
+followed by the figure-to-dict conversion st.plotly_chart performs.
+
+    python benchmarks/bench_charts.py --scale 1
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, make_synthetic_database, time_calls
+
+sys.path.insert(0, ROOT)
+import visualizations
+from visualizations import cached_radar_chart, create_radar_chart, prerender_radar_charts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--reruns", type=int, default=500)
+    args = parser.parse_args()
+
+    data = make_synthetic_database(args.scale)
+    stat_lines = [v["base_stats"] for p in data["pokemon"] for v in p["variants"] if v.get("base_stats")]
+    rng = random.Random(0)
+    # Reruns mostly redraw the Pokémon already on screen.
+    reruns = [rng.choice(stat_lines[:20]) for _ in range(args.reruns)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = os.path.join(tmp, "radar_charts.json")
+        start = time.perf_counter()
+        count = prerender_radar_charts(data, bundle_path)
+        build_s = time.perf_counter() - start
+        visualizations.RADAR_BUNDLE_PATH = bundle_path
+
+        fresh = time_calls(lambda s: create_radar_chart(s).to_dict(), [(s,) for s in reruns])
+        cached_radar_chart(reruns[0])
+        cached = time_calls(lambda s: cached_radar_chart(s).to_dict(), [(s,) for s in reruns])
+
+    print(f"prerendered {count} distinct charts in {build_s:.1f} s")
+    print(f"{'path':<8} {'median ms':>10} {'p99 ms':>8}")
+    for label, (median, p99) in (("fresh", fresh), ("cached", cached)):
+        print(f"{label:<8} {median:>10.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
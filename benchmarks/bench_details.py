@@ -0,0 +1,85 @@
+"""
+First-load cost of the app's data layer with and without the detail store:
+time until the summaries are ready (what the first run needs for filters and
+search), time to show one Pokémon, and resident memory added. Every
+measurement runs in a fresh subprocess.
+
+    python benchmarks/bench_details.py --scales 1 10 50
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, write_synthetic_database
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def run_child(details_path, json_path):
+    """Opens the data layer the way data.load_details does and prints timings as JSON."""
+    sys.path.insert(0, ROOT)
+    import data
+
+    baseline_mb = current_rss_mb()
+    start = time.perf_counter()
+    details = data.open_details(details_path, json_path, os.path.join(details_path, "missing.snapshot"))
+    index = data.PokemonIndex({"pokemon": details.summaries})
+    opened = time.perf_counter()
+    pokemon = details.load(len(index.pokemon) // 2)
+    pokemon.variants[0].sets, pokemon.evolution_chain
+    finished = time.perf_counter()
+    print(json.dumps({
+        "open_ms": (opened - start) * 1000,
+        "detail_ms": (finished - opened) * 1000,
+        "rss_mb": current_rss_mb() - baseline_mb,
+    }))
+
+
+def measure(details_path, json_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", details_path, json_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+    if args.generate:
+        scale, json_path, details_path = args.generate
+        sys.path.insert(0, ROOT)
+        from data import build_detail_store
+        write_synthetic_database(json_path, int(scale), with_sets=True)
+        with open(json_path, "r", encoding="utf-8") as f:
+            build_detail_store(json.load(f), details_path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'scale':>6} {'source':<8} {'open ms':>9} {'detail ms':>10} {'RSS MB':>8}")
+        for scale in args.scales:
+            json_path = os.path.join(tmp, f"combined_x{scale}.json")
+            details_path = os.path.join(tmp, f"details_x{scale}")
+            subprocess.run([sys.executable, __file__, "--generate", str(scale), json_path, details_path], check=True)
+            for label, path in (("json", os.path.join(tmp, "missing")), ("details", details_path)):
+                result = measure(path, json_path)
+                print(f"{scale:>6} {label:<8} {result['open_ms']:>9.1f} {result['detail_ms']:>10.2f} {result['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Evolution navigation on the detail store: building the evolution graph,
+looking up the chain of the selected Pokémon by position against resolving
+its flat chain by name, and the cost of opening an evolution neighbour
+(record + radar chart) cold against after evolution.prefetch.
+
+    python benchmarks/bench_evolution.py --scales 1 10
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, make_synthetic_database
+
+sys.path.insert(0, ROOT)
+import visualizations
+from data import PokemonIndex, build_detail_store
+from detail_store import DetailStore
+from evolution import EvolutionChain, EvolutionGraph, _prefetch, build_evolution_graph, prefetch
+
+
+def open_neighbour(details, position):
+    """What the app does when an evolution button is clicked."""
+    for variant in details.load(position).variants:
+        visualizations.cached_radar_chart(variant.stats)
+
+
+def clear_caches():
+    visualizations._radar_chart_json.cache_clear()
+    visualizations._radar_chart_figure.cache_clear()
+
+
+def median_ms(func, cases):
+    samples = []
+    for case in cases:
+        start = time.perf_counter()
+        func(*case)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--clicks", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # The prerendered bundle would hide the chart cost being measured.
+    visualizations._prerendered = {}
+    print(f"{'scale':>6} {'species':>8} {'graph ms':>9} {'by name ms':>11} {'by id ms':>9} {'cold click ms':>14} {'prefetched ms':>14}")
+    for scale in args.scales:
+        database = make_synthetic_database(scale)
+        directory = tempfile.mkdtemp(prefix="bench_evolution_")
+        build_detail_store(database, directory)
+        index = PokemonIndex({"pokemon": DetailStore(directory).summaries})
+        start = time.perf_counter()
+        graph = EvolutionGraph(build_evolution_graph(database["pokemon"]), index)
+        graph_ms = (time.perf_counter() - start) * 1000
+
+        positions = rng.sample(range(len(database["pokemon"])), args.clicks)
+        by_name = median_ms(lambda p: EvolutionChain.from_record(database["pokemon"][p]["evolution_chain"], index), [(p,) for p in positions])
+        by_id = median_ms(graph.chain_of, [(p,) for p in positions])
+
+        clicks = [(p, graph.chain_of(p).neighbours(p)[0]) for p in positions]
+        cold_store = DetailStore(directory)
+        clear_caches()
+        cold = median_ms(lambda _, n: open_neighbour(cold_store, n), clicks)
+
+        warm_store = DetailStore(directory)
+        clear_caches()
+        for p, _ in clicks:
+            prefetch(warm_store, graph.chain_of(p).neighbours(p), scale)
+        # Wait for the background thread, as the user reading a page would.
+        for _, n in clicks:
+            _prefetch(warm_store, n, scale).result()
+        prefetched = median_ms(lambda _, n: open_neighbour(warm_store, n), clicks)
+
+        print(f"{scale:>6} {len(database['pokemon']):>8} {graph_ms:>9.1f} {by_name:>11.4f} {by_id:>9.4f} {cold:>14.2f} {prefetched:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Cost of the fetch pipeline instrumentation: a full build against the local
+fixture server with metrics off and on, both cold (every request reaches the
+server) and warm (every request answered by the response cache, where the
+per-request bookkeeping is the largest share of the work), followed by the
+report of the cold instrumented build.
+
+Fixtures are small PokeAPI-shaped resources generated for `--species`
+species, with a share of requests failing with 429/503.
+
+    python benchmarks/bench_fetch_metrics.py --species 200 --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import synthetic  # noqa: F401  (puts database_construction on sys.path)
+
+RESOURCES = {"ability": 1000, "item": 1000, "move": 1000, "nature": 100}
+
+
+def write_fixtures(fixtures_dir, species, others=50):
+    """Writes the PokeAPI resources a build of `species` species reads."""
+    from fixture_server import UPSTREAM_ORIGIN, fixture_name
+
+    api = f"{UPSTREAM_ORIGIN}/api/v2/"
+    english = [{"language": {"name": "en"}, "effect": "Raises Attack.", "text": "Raises Attack."}]
+
+    def put(path, body):
+        with open(os.path.join(fixtures_dir, fixture_name("/api/v2/" + path)), "w", encoding="utf-8") as f:
+            json.dump(body, f)
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    put("pokemon-species?limit=10000", {"results": [{"url": f"{api}pokemon-species/{i}/"} for i in range(1, species + 1)]})
+    for resource, limit in RESOURCES.items():
+        put(f"{resource}?limit={limit}", {"results": [{"url": f"{api}{resource}/{i}/"} for i in range(1, others + 1)]})
+        for i in range(1, others + 1):
+            put(f"{resource}/{i}/", {
+                "name": f"{resource}-{i}", "effect_entries": english, "flavor_text_entries": english,
+                "type": {"name": "fire"}, "damage_class": {"name": "special"},
+                "learned_by_pokemon": [{"name": f"species-{j}"} for j in range(1, species + 1, 7)],
+                "increased_stat": {"name": "attack"}, "decreased_stat": {"name": "speed"},
+            })
+    for i in range(1, species + 1):
+        chain = (i + 2) // 3
+        put(f"pokemon-species/{i}/", {
+            "id": i, "name": f"species-{i}", "varieties": [{"pokemon": {"url": f"{api}pokemon/{i}/"}}],
+            "evolution_chain": {"url": f"{api}evolution-chain/{chain}/"},
+        })
+        put(f"pokemon/{i}/", {
+            "name": f"species-{i}", "types": [{"type": {"name": "fire"}}],
+            "stats": [{"stat": {"name": name}, "base_stat": 50 + i % 60} for name in synthetic.STAT_NAMES],
+            "abilities": [{"ability": {"url": f"{api}ability/{(i + k) % others + 1}/"}} for k in range(2)],
+            "sprites": {"other": {"official-artwork": {"front_default": None}}},
+        })
+        put(f"evolution-chain/{chain}/", {"chain": {
+            "species": {"name": f"species-{3 * chain - 2}"}, "evolution_details": [],
+            "evolves_to": [{"species": {"name": f"species-{3 * chain - 1}"}, "evolution_details": [], "evolves_to": []}],
+        }})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--species", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_fetch_metrics_")
+    # database_fetcher opens its response cache in the working directory on import.
+    os.chdir(work_dir)
+    import database_fetcher
+    import fixture_server
+    from concurrent_crawler import compile_pokemon_database_concurrent
+    from fetch_metrics import FetchMetrics
+
+    fixtures_dir = os.path.join(work_dir, "fixtures")
+    write_fixtures(fixtures_dir, args.species)
+    server = fixture_server.make_server(fixtures_dir, fail_rate=args.fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v2/"
+
+    def build(enabled, cold):
+        if cold:
+            database_fetcher.session.cache.clear()
+        database_fetcher.memo.clear()
+        database_fetcher._revalidated.clear()
+        metrics = FetchMetrics() if enabled else None
+        output = os.path.join(work_dir, "database.json")
+        start = time.perf_counter()
+        # Concurrent mode retries the injected failures, so every build reads the same resources.
+        compile_pokemon_database_concurrent(output, base_url, fetch_metrics=metrics,
+                                            requests_per_second=0, backoff_factor=0.001)
+        elapsed = time.perf_counter() - start
+        os.remove(database_fetcher.journal_path_for(output))
+        return elapsed, metrics
+
+    samples = {(cold, enabled): [] for cold in (True, False) for enabled in (False, True)}
+    report = None
+    # Alternating off and on keeps cache and file system warm-up out of the difference.
+    for _ in range(args.repeats):
+        for cold, enabled in samples:
+            elapsed, metrics = build(enabled, cold)
+            samples[cold, enabled].append(elapsed)
+            if enabled and cold:
+                report = metrics.report()
+    timings = {key: statistics.median(values) for key, values in samples.items()}
+    server.shutdown()
+
+    requests_made = report["totals"]["requests"]
+    print(f"\n{args.species} species, {requests_made} requests per cold build, {args.fail_rate:.0%} retryable failures")
+    print(f"{'build':<6} {'metrics off s':>14} {'metrics on s':>13} {'overhead':>9}")
+    for cold in (True, False):
+        off, on = timings[cold, False], timings[cold, True]
+        print(f"{'cold' if cold else 'warm':<6} {off:>14.2f} {on:>13.2f} {(on - off) / off:>9.1%}")
+
+    totals = report["totals"]
+    print(f"\ncold build report: {totals['retries']} retries, {totals['errors']} errors, "
+          f"{totals['bytes_transferred'] / 2 ** 10:.0f} KB transferred, {totals['cache_hit_ratio']:.0%} cache hits")
+    print(f"{'endpoint':<22} {'requests':>9} {'hit ratio':>10} {'p50 ms':>7} {'p95 ms':>7}")
+    for name, endpoint in report["endpoints"].items():
+        lookups = endpoint["cache_hits"] + endpoint["cache_misses"]
+        print(f"{name:<22} {endpoint['requests']:>9} {endpoint['cache_hits'] / lookups:>10.0%} "
+              f"{endpoint['latency']['p50_ms']!s:>7} {endpoint['latency']['p95_ms']!s:>7}")
+    print(f"{'stage':<30} {'records':>8} {'records/s':>10}")
+    for stage in report["stages"]:
+        print(f"{stage['name']:<30} {stage['records']:>8} {stage['records_per_second']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
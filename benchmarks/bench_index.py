@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of the per-rerun search/filter path: the original list scans
+in app.py against data.PokemonIndex, at 1x and 10x database size.
+
+    python benchmarks/bench_index.py --scales 1 10
+"""
+import argparse
+import random
+import sys
+import time
+
+from synthetic import ROOT, TYPES, make_synthetic_database, time_calls
+
+sys.path.insert(0, ROOT)
+from data import PokemonIndex, get_unique_regions, get_unique_types, pokemon_types
+
+
+def naive_rerun(data, types, regions, query):
+    """The per-rerun work app.py did before the index: rebuild options, scan, then match."""
+    get_unique_types(data)
+    get_unique_regions(data)
+    filtered = [
+        p for p in data.get("pokemon", [])
+        if ((not types) or any(t in pokemon_types(p) for t in types))
+        and ((not regions) or (p.get("region") in regions))
+    ]
+    if query.isdigit():
+        return next((p for p in filtered if str(p.get("dex_number", "")) == query), None)
+    return next((p for p in filtered if p["name"].lower() == query.lower()), None)
+
+
+def indexed_rerun(index, types, regions, query):
+    """The per-rerun work app.py does with the index."""
+    index.types, index.regions
+    positions, _ = index.filter(types, regions)
+    if query.isdigit():
+        return index.find_by_dex(int(query), positions)
+    return index.find_by_name(query, positions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'scale':>6} {'pokemon':>8} {'path':<8} {'median us':>10} {'p99 us':>10} {'build ms':>9}")
+    for scale in args.scales:
+        data = make_synthetic_database(scale)
+        names = [p["name"] for p in data["pokemon"]]
+        cases = []
+        for _ in range(50):
+            types = rng.sample(TYPES, rng.choice([0, 0, 1, 2]))
+            query = rng.choice([str(rng.randint(1, len(names))), rng.choice(names), rng.choice(names).upper()])
+            cases.append((types, [], query))
+
+        start = time.perf_counter()
+        index = PokemonIndex(data)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        naive = time_calls(lambda *c: naive_rerun(data, *c), cases, max(1, args.repeat // 10), unit=1e6)
+        indexed = time_calls(lambda *c: indexed_rerun(index, *c), cases, args.repeat, unit=1e6)
+        print(f"{scale:>6} {len(names):>8} {'naive':<8} {naive[0]:>10.1f} {naive[1]:>10.1f} {'':>9}")
+        print(f"{scale:>6} {len(names):>8} {'index':<8} {indexed[0]:>10.1f} {indexed[1]:>10.1f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+"Which Pokémon learn all of these moves" latency on learnsets.LearnsetIndex
+against a scan of the moves' "method" name lists, at 1x, 10x and 100x the
+variant count, plus the JSON size of both encodings.
+
+    python benchmarks/bench_learnsets.py --scales 1 10 100
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from synthetic import ROOT, TYPES, make_synthetic_database, time_calls
+
+sys.path.insert(0, ROOT)
+from data import StatMatrix
+from detail_store import variant_rows
+from learnsets import LearnsetIndex, build_learnsets
+
+
+def naive_learners(database, rows, moves, types, tiers):
+    """Intersects the method lists of the chosen moves, then filters the rows."""
+    learners = None
+    for move in database["moves"]:
+        if move["name"] in moves:
+            names = set(move["method"])
+            learners = names if learners is None else learners & names
+    return [
+        row["name"] for row in rows
+        if row["name"] in (learners or ())
+        and (not types or set(types) & set(row["types"]))
+        and (not tiers or set(tiers) & set(row["tiers"]))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--naive-queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'scale':>6} {'variants':>9} {'path':<8} {'filter':<9} {'median ms':>10} {'p99 ms':>8} {'JSON MB':>8} {'build ms':>9}")
+    for scale in args.scales:
+        database = make_synthetic_database(scale, with_sets=True, with_learners=True)
+        rows = list(variant_rows(database["pokemon"]))
+        method_mb = len(json.dumps([move["method"] for move in database["moves"]])) / 2 ** 20
+
+        start = time.perf_counter()
+        learnsets = build_learnsets(database)
+        index = LearnsetIndex(learnsets, StatMatrix(rows))
+        build_ms = (time.perf_counter() - start) * 1000
+        bitset_mb = len(json.dumps(learnsets)) / 2 ** 20
+
+        for label, restricted in (("none", False), ("type+tier", True)):
+            cases = []
+            for _ in range(args.queries):
+                moves = rng.sample(index.moves, rng.randint(1, 3))
+                types = rng.sample(TYPES, 2) if restricted else ()
+                tiers = rng.sample(sorted({t for row in rows for t in row["tiers"]}), 2) if restricted else ()
+                cases.append((moves, types, tiers))
+            bitsets = time_calls(index.learners_of, cases)
+            naive = time_calls(lambda *c: naive_learners(database, rows, *c), cases[:args.naive_queries])
+            print(f"{scale:>6} {len(rows):>9} {'lists':<8} {label:<9} {naive[0]:>10.2f} {naive[1]:>8.2f} {method_mb:>8.2f} {'':>9}")
+            print(f"{scale:>6} {len(rows):>9} {'bitsets':<8} {label:<9} {bitsets[0]:>10.3f} {bitsets[1]:>8.3f} {bitset_mb:>8.2f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
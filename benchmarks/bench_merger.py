@@ -0,0 +1,127 @@
+"""
+Compares the in-memory merger with the streaming merger on synthetically
+scaled databases. Each run happens in a fresh subprocess so that its peak
+RSS can be measured in isolation.
+
+    python benchmarks/bench_merger.py --scales 10 50 100
+
+Then times the two halves of a multi-source merge for --sources set files
+(copies of gen9.json): parsing them into a SetIndex, serially and with one
+parser process per CPU, and the single join pass over the database.
+
+    python benchmarks/bench_merger.py --scales 10 --sources 1 2 4 8
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import DATABASE_CONSTRUCTION, GEN9_PATH, write_synthetic_database
+
+MODES = {
+    "in-memory": [],
+    "in-memory compact": ["--compact"],
+    "streaming": ["--stream"],
+    "streaming compact": ["--stream", "--compact"],
+}
+
+
+def run_child(mode_args, database_path, output_path):
+    """Runs merger.main in this process and prints wall time and peak RSS as JSON."""
+    sys.path.insert(0, DATABASE_CONSTRUCTION)
+    import merger
+
+    sys.argv = ["merger.py", "--database", database_path, "--gen9", GEN9_PATH, "--output", output_path] + mode_args
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        merger.main()
+        sys.stdout = stdout
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+def generate(database_path, scale):
+    """
+    Writes the synthetic database from a subprocess, so this process stays
+    small: a forked child's peak RSS includes the parent's resident pages.
+    """
+    subprocess.run([sys.executable, __file__, "--generate", str(scale), database_path], check=True)
+
+
+def measure(mode_args, database_path, output_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", json.dumps(mode_args), database_path, output_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_sources(database_path, counts, tmp):
+    """Times parsing `count` set files and merging them, for each count."""
+    sys.path.insert(0, DATABASE_CONSTRUCTION)
+    import merger
+
+    with open(database_path, "r", encoding="utf-8") as f:
+        database_text = f.read()
+    print(f"\n{'sources':>8} {'parse 1 proc s':>15} {'parse pool s':>13} {'join s':>8} {'names':>7}")
+    for count in counts:
+        paths = []
+        for i in range(count):
+            paths.append(os.path.join(tmp, f"sets_{i}.json"))
+            shutil.copy(GEN9_PATH, paths[-1])
+        start = time.perf_counter()
+        merger.build_set_index(paths, workers=1)
+        serial = time.perf_counter() - start
+        start = time.perf_counter()
+        set_index = merger.build_set_index(paths)
+        pooled = time.perf_counter() - start
+        database = json.loads(database_text)
+        start = time.perf_counter()
+        merger.merge_sets_into_database(database, set_index)
+        join = time.perf_counter() - start
+        print(f"{count:>8} {serial:>15.2f} {pooled:>13.2f} {join:>8.3f} {len(set_index.matched):>7}")
+        for path in paths:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--sources", type=int, nargs="*", default=[], help="Set file counts for the multi-source timing.")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child[0]), args.child[1], args.child[2])
+        return
+    if args.generate:
+        write_synthetic_database(args.generate[1], int(args.generate[0]), unique_names=False)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'scale':>6} {'input MB':>9} {'mode':<18} {'seconds':>8} {'peak RSS MB':>12} {'output MB':>10}")
+        for scale in args.scales:
+            database_path = os.path.join(tmp, f"database_x{scale}.json")
+            generate(database_path, scale)
+            input_mb = os.path.getsize(database_path) / 2 ** 20
+            for mode, mode_args in MODES.items():
+                output_path = os.path.join(tmp, "combined_database.json")
+                result = measure(mode_args, database_path, output_path)
+                output_mb = os.path.getsize(output_path) / 2 ** 20
+                print(f"{scale:>6} {input_mb:>9.1f} {mode:<18} {result['seconds']:>8.2f} "
+                      f"{result['peak_rss_mb']:>12.1f} {output_mb:>10.1f}")
+            if args.sources and scale == args.scales[-1]:
+                time_sources(database_path, args.sources, tmp)
+            os.remove(database_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Load test of query_server.py: keep-alive clients, one thread each, send a
+mix of record lookups (by name and dex number), fuzzy searches, filtered
+variant lists and set lookups for `--duration` seconds, and the sustained
+requests per second and latency percentiles are reported.
+
+    python benchmarks/bench_query_server.py --clients 8 --duration 10
+    python benchmarks/bench_query_server.py --cache-size 0        (LRU response cache off)
+    python benchmarks/bench_query_server.py --url http://127.0.0.1:8600
+
+Without --url a server is started on the local database in a subprocess.
+Requests are drawn uniformly from `--distinct` different URLs; a
+`--revalidate` share of repeated requests carry the ETag received before,
+so they are answered with 304. Clients and server share the machine, so on
+few cores the client threads take part of the CPU the server could use.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from synthetic import ROOT
+
+TYPES = ["fire", "water", "grass", "electric", "psychic", "dragon", "ghost", "steel", "fairy", "ground"]
+SORTS = ["dex_number", "name", "hp", "attack", "speed", "bst"]
+
+
+def start_server(cache_size):
+    """Starts query_server.py in a subprocess on a free port; returns (process, base URL)."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "query_server.py"), "--port", "0", "--cache-size", str(cache_size)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving queries on "):
+        process.kill()
+        raise RuntimeError(f"query_server.py did not start: {line!r}")
+    return process, line.split()[-1].rstrip("/")
+
+
+def get_json(connection, path):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return json.loads(response.read())
+
+
+def request_pool(connection, distinct, rng):
+    """Builds `distinct` request paths over the names the server knows."""
+    variants = get_json(connection, "/variants?limit=1000")["results"]
+    names = [row["name"] for row in variants]
+    dex_numbers = [row["dex_number"] for row in variants]
+    with_sets = [row["name"] for row in variants if row["tier"]]
+    makers = [
+        (40, lambda: f"/pokemon/{quote(rng.choice(names))}"),
+        (10, lambda: f"/pokemon/{rng.choice(dex_numbers)}"),
+        (20, lambda: f"/search?q={quote(rng.choice(names)[:rng.randint(3, 6)])}&limit=5"),
+        (20, lambda: f"/variants?type={rng.choice(TYPES)}&min_{rng.choice(SORTS[2:])}={rng.randrange(40, 120, 10)}"
+                     f"&sort={rng.choice(SORTS)}&order={rng.choice(['asc', 'desc'])}&limit=20"),
+        (10, lambda: f"/sets/{quote(rng.choice(with_sets or names))}"),
+    ]
+    weights = [weight for weight, _ in makers]
+    pool = set()
+    while len(pool) < distinct:
+        pool.add(rng.choices(makers, weights)[0][1]())
+    return sorted(pool)
+
+
+def client(host, port, pool, deadline, revalidate, seed, results):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(host, port)
+    etags, latencies, statuses, cache = {}, [], {}, {}
+    while time.perf_counter() < deadline:
+        path = rng.choice(pool)
+        headers = {"If-None-Match": etags[path]} if path in etags and rng.random() < revalidate else {}
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        cache_status = response.getheader("X-Cache")
+        if cache_status:
+            cache[cache_status] = cache.get(cache_status, 0) + 1
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    connection.close()
+    results.append((latencies, statuses, cache))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load-test a running server instead of starting one.")
+    parser.add_argument("--cache-size", type=int, default=4096, help="Response cache size of the started server.")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--distinct", type=int, default=2000)
+    parser.add_argument("--revalidate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        process, base_url = start_server(args.cache_size)
+    try:
+        parts = urlsplit(base_url)
+        pool = request_pool(http.client.HTTPConnection(parts.hostname, parts.port), args.distinct, random.Random(args.seed))
+
+        results = []
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(parts.hostname, parts.port, pool, deadline, args.revalidate,
+                                                   args.seed + i, results))
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if process is not None:
+            process.kill()
+
+    latencies = sorted(latency * 1000 for result in results for latency in result[0])
+    statuses, cache = {}, {}
+    for _, result_statuses, result_cache in results:
+        for status, count in result_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+        for cache_status, count in result_cache.items():
+            cache[cache_status] = cache.get(cache_status, 0) + count
+    percentiles = statistics.quantiles(latencies, n=1000)
+    print(f"\n{base_url}: {args.clients} keep-alive clients for {elapsed:.1f} s over {len(pool)} distinct requests, "
+          f"response cache {'of the running server' if args.url else args.cache_size}")
+    print(f"requests: {len(latencies)} ({len(latencies) / elapsed:.0f}/s sustained), "
+          f"statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+    if cache:
+        print(f"response cache: {cache.get('hit', 0) / sum(cache.values()):.0%} hits (of requests answered with a body)")
+    print(f"latency ms: p50 {percentiles[499]:.2f}, p95 {percentiles[949]:.2f}, p99 {percentiles[989]:.2f}, "
+          f"p99.9 {percentiles[998]:.2f}, max {latencies[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
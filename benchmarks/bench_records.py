@@ -0,0 +1,152 @@
+"""
+Resident memory and attribute-access speed of the typed records in
+records.py against the frozen dicts they replace, for every Pokémon of a
+synthetic database with merged (normalized) sets.
+
+    python benchmarks/bench_records.py --scales 1 50
+
+Each form is built in its own subprocess from one JSON document per Pokémon,
+decoded one at a time as the detail stores do, and reported as:
+
+- RSS MB: resident memory added by the whole database in that form
+- traced MB: bytes retained by the form, counted with tracemalloc
+- build µs: conversion time per Pokémon (decode excluded)
+- ns per access for what the app reads of every variant: its name, its
+  types, one base stat, its ability names and the sets of its first tier
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import ROOT, make_synthetic_database
+
+FORMS = ("dicts", "records")
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def accessors(form):
+    """The app's reads of one variant, for each form."""
+    if form == "dicts":
+        return {
+            "name": lambda v: v["name"],
+            "types": lambda v: v["types"],
+            "speed stat": lambda v: v["base_stats"]["speed"],
+            "ability names": lambda v: [a["name"] for a in v["abilities"]],
+            "first tier sets": lambda v: [s["html"] for s in next(iter(v["sets"].values()), {}).values()] if v.get("sets") else [],
+        }
+    return {
+        "name": lambda v: v.name,
+        "types": lambda v: v.types,
+        "speed stat": lambda v: v.stats[5],
+        "ability names": lambda v: [a.name for a in v.abilities],
+        "first tier sets": lambda v: [s.html for s in v.sets[0][1]] if v.sets else [],
+    }
+
+
+def build(form, documents):
+    from readonly import freeze
+    from records import Pokemon, Vocabulary
+
+    vocabulary = Vocabulary()
+    database, seconds = [], 0.0
+    for document in documents:
+        decoded = json.loads(document)
+        start = time.perf_counter()
+        database.append(freeze(decoded) if form == "dicts" else Pokemon.from_dict(decoded, vocabulary))
+        seconds += time.perf_counter() - start
+    return database, seconds
+
+
+def run_child(form, path, repeats):
+    sys.path.insert(0, ROOT)
+    with open(path, "r", encoding="utf-8") as f:
+        documents = f.read().splitlines()
+
+    gc.collect()
+    baseline_mb = current_rss_mb()
+    database, seconds = build(form, documents)
+    gc.collect()
+    rss_mb = current_rss_mb() - baseline_mb
+
+    variants = [v for p in database for v in (p["variants"] if form == "dicts" else p.variants)]
+    access_ns = {}
+    for name, read in accessors(form).items():
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for variant in variants:
+                read(variant)
+            samples.append((time.perf_counter() - start) * 1e9 / len(variants))
+        access_ns[name] = min(samples)
+
+    del database, variants
+    gc.collect()
+    tracemalloc.start()
+    database, _ = build(form, documents)
+    gc.collect()
+    traced_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    print(json.dumps({"rss_mb": rss_mb, "traced_mb": traced_mb, "build_us": seconds * 1e6 / len(documents),
+                      "access_ns": access_ns}))
+
+
+def write_documents(scale, path):
+    """Writes a synthetic database with merged sets, one Pokémon per line."""
+    sys.path.insert(0, ROOT)
+    from competitive_sets import normalize_sets
+
+    database = make_synthetic_database(scale, with_sets=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for pokemon in database["pokemon"]:
+            for variant in pokemon["variants"]:
+                if "sets" in variant:
+                    variant["sets"] = normalize_sets(variant["sets"])
+            f.write(json.dumps(pokemon, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return len(database["pokemon"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.repeats)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f"pokemon_x{scale}.jsonl")
+            count = write_documents(scale, path)
+            results = {}
+            for form in FORMS:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", form, path, "--repeats", str(args.repeats)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                results[form] = json.loads(output.strip().splitlines()[-1])
+
+            print(f"\n{scale}x: {count} Pokémon")
+            print(f"{'form':<8} {'RSS MB':>8} {'traced MB':>10} {'build µs':>9}")
+            for form, result in results.items():
+                print(f"{form:<8} {result['rss_mb']:>8.1f} {result['traced_mb']:>10.1f} {result['build_us']:>9.1f}")
+            print(f"{'access ns':<16} {'dicts':>7} {'records':>8}")
+            for name in results["dicts"]["access_ns"]:
+                print(f"{name:<16} {results['dicts']['access_ns'][name]:>7.0f} {results['records']['access_ns'][name]:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
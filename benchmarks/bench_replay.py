@@ -0,0 +1,93 @@
+"""
+Offline builds from a replay pack (database_construction/replay_pack.py)
+against builds answered by the requests_cache SQLite cache, for fixtures of
+`--species` species served by the local fixture server.
+
+    python benchmarks/bench_replay.py --species 500 --repeats 3
+
+A cold build fills the response cache, which is then exported into a pack.
+Reported:
+
+- size of the SQLite cache and of the pack
+- export time, and the time to load the pack back into an empty cache
+- build time with every request answered by the SQLite cache (warm) and by
+  the pack, and whether both databases are identical to the cold build's
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from bench_fetch_metrics import write_fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--species", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_replay_")
+    # database_fetcher opens its response cache in the working directory on import.
+    os.chdir(work_dir)
+    import database_fetcher
+    import fixture_server
+    import requests_cache
+    from replay_pack import ReplayPack, ReplaySession, export_pack, warm_cache
+
+    fixtures_dir = os.path.join(work_dir, "fixtures")
+    write_fixtures(fixtures_dir, args.species)
+    server = fixture_server.make_server(fixtures_dir)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    database_fetcher.POKEAPI_URL = f"http://127.0.0.1:{server.server_address[1]}/api/v2/"
+    cached_session = database_fetcher.session
+
+    def build(name):
+        database_fetcher.memo.clear()
+        database_fetcher._revalidated.clear()
+        output = os.path.join(work_dir, f"{name}.json")
+        start = time.perf_counter()
+        database_fetcher.compile_pokemon_database(output)
+        elapsed = time.perf_counter() - start
+        os.remove(database_fetcher.journal_path_for(output))
+        with open(output, "rb") as f:
+            return elapsed, f.read()
+
+    cached_session.cache.clear()
+    _, expected = build("cold")
+    server.shutdown()
+
+    pack_path = os.path.join(work_dir, "pokeapi.pack")
+    start = time.perf_counter()
+    stats = export_pack("pokeapi_cache", pack_path)
+    export_seconds = time.perf_counter() - start
+
+    pack = ReplayPack(pack_path)
+    warm_session = requests_cache.CachedSession(os.path.join(work_dir, "warmed_cache"), backend="sqlite")
+    start = time.perf_counter()
+    warm_cache(pack, warm_session)
+    warm_seconds = time.perf_counter() - start
+
+    samples = {"sqlite cache": [], "replay pack": []}
+    identical = {name: True for name in samples}
+    for _ in range(args.repeats):
+        for name in samples:
+            database_fetcher.session = cached_session if name == "sqlite cache" else ReplaySession(pack)
+            elapsed, output = build(name.replace(" ", "_"))
+            samples[name].append(elapsed)
+            identical[name] &= output == expected
+    database_fetcher.session = cached_session
+
+    print(f"\n{args.species} species, {stats['urls']} responses ({stats['bodies']} distinct bodies)")
+    print(f"sqlite cache: {os.path.getsize('pokeapi_cache.sqlite') / 2 ** 20:.2f} MB, "
+          f"pack: {stats['packed_bytes'] / 2 ** 20:.2f} MB ({stats['raw_bytes'] / 2 ** 20:.2f} MB of bodies)")
+    print(f"export: {export_seconds:.2f} s, warm-up of an empty cache: {warm_seconds:.2f} s")
+    print(f"{'build':<13} {'median s':>9} {'identical':>10}")
+    for name, values in samples.items():
+        print(f"{name:<13} {statistics.median(values):>9.2f} {str(identical[name]):>10}")
+
+
+if __name__ == "__main__":
+    main()
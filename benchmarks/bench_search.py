@@ -0,0 +1,84 @@
+"""
+Suggestion latency of search.SearchEngine against the original per-keystroke
+rapidfuzz.process.extract over every name, on ~50k candidate names. The
+engine's suggestions must be exactly those of process.extract over the same
+normalized names.
+
+    python benchmarks/bench_search.py --names 50000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from rapidfuzz import fuzz, process
+
+from synthetic import ROOT, make_synthetic_database
+
+sys.path.insert(0, ROOT)
+from data import PokemonIndex
+from search import SearchEngine, normalize
+
+
+def make_queries(names, count, rng):
+    """Typed prefixes, typos and partial words, like a user's keystrokes."""
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(name[:rng.randint(3, max(3, len(name)))])
+        elif kind < 0.8 and len(name) > 3:
+            i = rng.randrange(len(name))
+            queries.append(name[:i] + rng.choice("aeiourst") + name[i + 1:])
+        else:
+            queries.append(name[rng.randint(0, len(name) // 2):][:rng.randint(2, 6)])
+    return queries
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100)
+    return statistics.median(samples), cuts[94], cuts[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=-1)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    scale = max(1, -(-args.names // 636))
+    index = PokemonIndex(make_synthetic_database(scale))
+    engine = SearchEngine(index, workers=args.workers)
+
+    start = time.perf_counter()
+    choices = engine.choices()
+    build_ms = (time.perf_counter() - start) * 1000
+    names = choices.names
+    queries = make_queries(names, args.queries, rng)
+
+    naive, engine_samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = process.extract(normalize(query), choices.normalized, scorer=fuzz.partial_ratio, processor=None,
+                                  limit=5, score_cutoff=50)
+        naive.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        got = engine.suggest(query)
+        engine_samples.append((time.perf_counter() - start) * 1000)
+        assert got == [names[i] for _, _, i in matches], f"suggestions for {query!r} differ from process.extract"
+
+    print(f"{len(names)} candidate names, choice build {build_ms:.0f} ms, {len(queries)} queries")
+    print(f"{'path':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, samples in (("extract", naive), ("engine", engine_samples)):
+        p50, p95, p99 = percentiles(samples)
+        print(f"{label:<8} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+    print("suggestions identical to extract's for every query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Rerun latency and per-session memory of the shared dataset against the old
+st.cache_data loader, with 50 simulated sessions rerunning concurrently.
+
+st.cache_data hands every call its own unpickled copy of the database; the
+shared loader returns the same read-only object to every session. Each mode
+runs in a fresh subprocess; every session thread reruns `--reruns` times and
+holds its dataset while all sessions are mid-rerun, which is when peak
+memory is measured.
+
+    python benchmarks/bench_sessions.py --scales 1 10 --sessions 50
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from synthetic import ROOT, write_synthetic_database
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def run_child(mode, json_path, sessions, reruns):
+    sys.path.insert(0, ROOT)
+    import streamlit as st
+    import data
+
+    if mode == "copy":
+        # The loader as it was: st.cache_data over the parsed JSON file.
+        @st.cache_data
+        def load_data():
+            with open(json_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        load = load_data
+    else:
+        # data.load_data reads combined_database.json from the working directory.
+        os.chdir(os.path.dirname(json_path))
+        def load():
+            return data.load_data(data.dataset_version())
+
+    load()
+    baseline_mb = current_rss_mb()
+    samples, peaks = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions)
+
+    def session(seed):
+        for rerun in range(reruns):
+            start = time.perf_counter()
+            database = load()
+            pokemon = database["pokemon"][(seed * 31 + rerun) % len(database["pokemon"])]
+            pokemon["variants"][0]["base_stats"]
+            elapsed = (time.perf_counter() - start) * 1000
+            # Every session holds its dataset at the same time, as concurrent reruns do.
+            barrier.wait()
+            if seed == 0:
+                peaks.append(current_rss_mb())
+            barrier.wait()
+            with lock:
+                samples.append(elapsed)
+            del database, pokemon
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps({
+        "median_ms": statistics.median(samples),
+        "p95_ms": statistics.quantiles(samples, n=20)[18],
+        "per_session_mb": (max(peaks) - baseline_mb) / sessions,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.sessions, args.reruns)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'scale':>6} {'loader':<8} {'median ms':>10} {'p95 ms':>8} {'MB/session':>11}")
+        for scale in args.scales:
+            os.makedirs(os.path.join(tmp, str(scale)))
+            json_path = os.path.join(tmp, str(scale), "combined_database.json")
+            write_synthetic_database(json_path, scale, with_sets=True)
+            for mode in ("copy", "shared"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, json_path,
+                     "--sessions", str(args.sessions), "--reruns", str(args.reruns)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{scale:>6} {mode:<8} {result['median_ms']:>10.2f} {result['p95_ms']:>8.2f} "
+                      f"{result['per_session_mb']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Final stats of every competitive set with stat_calculator's NumPy batch
+against the same formula evaluated set by set in Python, and outspeed
+queries on the precomputed SpeedTiers against a scan of the tier's sets,
+at 1x, 10x and 50x the set count.
+
+    python benchmarks/bench_set_stats.py --scales 1 10 50
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from synthetic import ROOT, make_synthetic_database
+
+sys.path.insert(0, ROOT)
+from competitive_sets import STAT_ORDER
+from snapshot import STAT_NAMES
+from stat_calculator import (DEFAULT_IV, LEVELS, NATURES, SpeedTiers, boosted, build_speed_tiers,
+                             calculate_set_stats, first_option)
+
+
+def scalar_stats(database, levels=LEVELS):
+    """The stat formula one set and one stat at a time."""
+    results = []
+    for pokemon in database["pokemon"]:
+        for variant in pokemon["variants"]:
+            for tier_sets in variant.get("sets", {}).values():
+                for set_data in tier_sets.values():
+                    evs = first_option(set_data.get("evs")) or {}
+                    ivs = first_option(set_data.get("ivs")) or {}
+                    nature = first_option(set_data.get("nature"))
+                    nature = NATURES.get(nature.lower() if nature else None, (None, None))
+                    for level in levels:
+                        stats = {}
+                        for name, stat in zip(STAT_NAMES, STAT_ORDER):
+                            core = (2 * variant["base_stats"][name] + ivs.get(stat, DEFAULT_IV) + evs.get(stat, 0) // 4) * level // 100
+                            if stat == "hp":
+                                stats[stat] = core + level + 10
+                            else:
+                                tenths = 11 if name == nature[0] != nature[1] else 9 if name == nature[1] != nature[0] else 10
+                                stats[stat] = (core + 5) * tenths // 10
+                        results.append(stats)
+    return results
+
+
+def scan_outspeeds(speeds, speed, stage):
+    speed = boosted(speed, stage)
+    return sum(1 for other in speeds if other < speed), sum(1 for other in speeds if other == speed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'scale':>6} {'sets':>7} {'scalar ms':>10} {'batch ms':>9} {'speedup':>8} "
+          f"{'scan µs':>8} {'bisect µs':>10} {'tier size':>10}")
+    for scale in args.scales:
+        database = make_synthetic_database(scale, with_sets=True)
+
+        scalar = min(_timed(lambda: scalar_stats(database)) for _ in range(args.repeats))
+        batch = min(_timed(lambda: calculate_set_stats(database)) for _ in range(args.repeats))
+        entries, stats = calculate_set_stats(database)
+        expected = scalar_stats(database)
+        computed = [dict(zip(STAT_ORDER, stats[i, row].tolist())) for row in range(len(entries)) for i in range(len(LEVELS))]
+        assert computed == expected, "batch and scalar stats differ"
+
+        speed_tiers = build_speed_tiers(entries, stats)
+        tier = max(speed_tiers, key=lambda name: len(speed_tiers[name]["100"]["speeds"]))
+        table = speed_tiers[tier]["100"]
+        tier_speeds = SpeedTiers(table)
+        cases = [(rng.randint(50, 500), rng.choice((0, 1, 2))) for _ in range(args.queries)]
+        scan = statistics.median(_timed(lambda: scan_outspeeds(table["speeds"], *case)) for case in cases[:200])
+        bisect = statistics.median(_timed(lambda: tier_speeds.outspeeds(*case)) for case in cases)
+        print(f"{scale:>6} {len(entries):>7} {scalar * 1000:>10.1f} {batch * 1000:>9.1f} {scalar / batch:>7.1f}x "
+              f"{scan * 1e6:>8.1f} {bisect * 1e6:>10.2f} {len(tier_speeds):>10}")
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+"Similar Pokémon" query latency on data.StatMatrix against a Python loop
+over the per-variant stat dicts, at 1x, 10x and 100x the variant count,
+with and without a type/tier restriction.
+
+    python benchmarks/bench_similar.py --scales 1 10 100
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+from synthetic import ROOT, STAT_NAMES, TYPES, make_synthetic_database, time_calls
+
+sys.path.insert(0, ROOT)
+from data import StatMatrix
+from detail_store import variant_rows
+
+
+def naive_similar(rows, name, k, types, tiers):
+    """Nearest neighbours the straightforward way: one Python loop per query."""
+    columns = [[row["base_stats"].get(stat, 0) for row in rows] for stat in STAT_NAMES]
+    means = [sum(c) / len(c) for c in columns]
+    stds = [math.sqrt(sum((v - m) ** 2 for v in c) / len(c)) or 1 for c, m in zip(columns, means)]
+    target = next(row for row in rows if row["name"] == name)
+    scored = []
+    for row in rows:
+        if row is target or (types and not set(types) & set(row["types"])) or (tiers and not set(tiers) & set(row["tiers"])):
+            continue
+        distance = math.sqrt(sum(
+            ((row["base_stats"].get(stat, 0) - target["base_stats"].get(stat, 0)) / std) ** 2
+            for stat, std in zip(STAT_NAMES, stds)
+        ))
+        scored.append((distance, row["name"]))
+    return sorted(scored)[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--naive-queries", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'scale':>6} {'variants':>9} {'path':<7} {'filter':<9} {'median ms':>10} {'p99 ms':>8} {'build ms':>9}")
+    for scale in args.scales:
+        rows = list(variant_rows(make_synthetic_database(scale, with_sets=True)["pokemon"]))
+        start = time.perf_counter()
+        matrix = StatMatrix(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for label, restricted in (("none", False), ("type+tier", True)):
+            cases = []
+            for _ in range(args.queries):
+                types = rng.sample(TYPES, 2) if restricted else ()
+                tiers = rng.sample(matrix.tiers, 2) if restricted else ()
+                cases.append((rng.choice(matrix.names), 10, types, tiers))
+            vectorized = time_calls(matrix.similar, cases)
+            naive = time_calls(lambda *c: naive_similar(rows, *c), cases[:args.naive_queries])
+            print(f"{scale:>6} {len(rows):>9} {'loop':<7} {label:<9} {naive[0]:>10.2f} {naive[1]:>8.2f} {'':>9}")
+            print(f"{scale:>6} {len(rows):>9} {'matrix':<7} {label:<9} {vectorized[0]:>10.3f} {vectorized[1]:>8.3f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
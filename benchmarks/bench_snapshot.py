@@ -0,0 +1,92 @@
+"""
+Compares cold-start cost of combined_database.json against the binary
+snapshot: time to open the database, time for a first full scan of names
+and types (what the app does on its first run), and resident memory added.
+Every measurement runs in a fresh subprocess.
+
+    python benchmarks/bench_snapshot.py --scales 1 10 50
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, write_synthetic_database
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def run_child(json_path, snapshot_path):
+    """Loads the database the way data.load_data does and prints timings as JSON."""
+    sys.path.insert(0, ROOT)
+    import data
+
+    baseline_mb = current_rss_mb()
+    start = time.perf_counter()
+    database = data.read_database(json_path, snapshot_path)
+    opened = time.perf_counter()
+    names = [p["name"] for p in database["pokemon"]]
+    types = {t for p in database["pokemon"] for v in p["variants"] for t in v["types"]}
+    scanned = time.perf_counter()
+    detail = database["pokemon"][len(names) // 2]["variants"][0]
+    detail.get("sets"), detail["abilities"], detail["base_stats"]
+    finished = time.perf_counter()
+    print(json.dumps({
+        "open_ms": (opened - start) * 1000,
+        "scan_ms": (scanned - opened) * 1000,
+        "detail_ms": (finished - scanned) * 1000,
+        "rss_mb": current_rss_mb() - baseline_mb,
+        "types": len(types),
+    }))
+
+
+def measure(json_path, snapshot_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", json_path, snapshot_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+    if args.generate:
+        scale, json_path, snapshot_path = args.generate
+        sys.path.insert(0, ROOT)
+        from snapshot import write_snapshot
+        write_synthetic_database(json_path, int(scale), with_sets=True)
+        with open(json_path, "r", encoding="utf-8") as f:
+            write_snapshot(json.load(f), snapshot_path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'scale':>6} {'format':<9} {'file MB':>8} {'open ms':>9} {'scan ms':>9} {'detail ms':>10} {'RSS MB':>8}")
+        for scale in args.scales:
+            json_path = os.path.join(tmp, f"combined_x{scale}.json")
+            snapshot_path = os.path.join(tmp, f"combined_x{scale}.snapshot")
+            subprocess.run([sys.executable, __file__, "--generate", str(scale), json_path, snapshot_path], check=True)
+            missing = os.path.join(tmp, "missing.snapshot")
+            for label, paths, size_path in (("json", (json_path, missing), json_path),
+                                            ("snapshot", (json_path, snapshot_path), snapshot_path)):
+                result = measure(*paths)
+                print(f"{scale:>6} {label:<9} {os.path.getsize(size_path) / 2 ** 20:>8.1f} {result['open_ms']:>9.1f} "
+                      f"{result['scan_ms']:>9.1f} {result['detail_ms']:>10.2f} {result['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Sprite downloads against the local fixture server: sequential vs concurrent
+wall time, an interrupted run resumed from its journal, and the size of the
+stored thumbnails against the originals.
+
+Synthetic 475x475 artwork is written under a temporary fixtures directory at
+the paths of the database's image URLs, and the server answers a share of
+requests with 429/503 to exercise the retry path. Every stored file is
+checked against the SHA-256 recorded for it.
+
+    python benchmarks/bench_sprites.py --sprites 200 --latency 0.02
+"""
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from PIL import Image, ImageDraw
+
+from synthetic import make_synthetic_database
+
+
+def write_artwork(fixtures_dir, urls, seed=0):
+    """Draws a distinct image for every URL at its path under `fixtures_dir`."""
+    rng = random.Random(seed)
+    for url in urls:
+        path = os.path.join(fixtures_dir, urlsplit(url).path.lstrip("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Noise keeps the PNGs about as large as real official artwork.
+        image = Image.merge("RGBA", [Image.effect_noise((475, 475), 48)] * 3 + [Image.new("L", (475, 475), 255)])
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            box = sorted(rng.sample(range(475), 2)), sorted(rng.sample(range(475), 2))
+            draw.ellipse((box[0][0], box[1][0], box[0][1], box[1][1]), fill=tuple(rng.randrange(256) for _ in range(3)) + (255,))
+        image.save(path, "PNG")
+
+
+def check_store(entries, root):
+    """Verifies every original against its digest and that every thumbnail exists."""
+    for entry in entries.values():
+        with open(os.path.join(root, entry["original"]), "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == entry["sha256"], entry["original"]
+        for path in [*entry["thumbnails"].values(), *entry.get("webp", {}).values()]:
+            assert os.path.exists(os.path.join(root, path)), path
+
+
+def store_size(entries, root, key):
+    paths = {entry[key] for entry in entries.values()} if key == "original" else \
+        {path for entry in entries.values() for path in entry.get(key, {}).values()}
+    return sum(os.path.getsize(os.path.join(root, path)) for path in paths) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sprites", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the server waits before each response.")
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_sprites_")
+    # database_fetcher opens its response cache in the working directory on import.
+    os.chdir(work_dir)
+    import fixture_server
+    from build_journal import BuildJournal
+    from concurrent_crawler import ConcurrentCrawler
+    from sprite_cache import SPRITE_ORIGIN, download_sprites, sprite_urls
+
+    urls = sprite_urls(make_synthetic_database(1))[:args.sprites]
+    fixtures_dir = os.path.join(work_dir, "fixtures")
+    write_artwork(fixtures_dir, urls)
+
+    handler_respond = fixture_server.FixtureHandler._respond
+
+    def slow_respond(self, include_body):
+        time.sleep(args.latency)
+        handler_respond(self, include_body)
+
+    fixture_server.FixtureHandler._respond = slow_respond
+    server = fixture_server.make_server(fixtures_dir, fail_rate=args.fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    assert all(url.startswith(SPRITE_ORIGIN) for url in urls)
+
+    def run(name, concurrency, run_urls, resume=False, webp=False):
+        store = os.path.join(work_dir, name)
+        journal = BuildJournal(os.path.join(work_dir, f"{name}.jsonl"), reuse=resume)
+        crawler = ConcurrentCrawler(requests.Session(), concurrency, requests_per_second=0, backoff_factor=0.01)
+        start = time.perf_counter()
+        entries = download_sprites(run_urls, store, work_dir, journal, crawler, webp=webp, origin=origin)
+        elapsed = time.perf_counter() - start
+        journal.close()
+        check_store(entries, work_dir)
+        return entries, elapsed, journal
+
+    print(f"{len(urls)} sprites, {args.latency * 1000:.0f} ms server latency, {args.fail_rate:.0%} retryable failures, "
+          f"{os.cpu_count()} CPUs")
+    _, sequential, _ = run("sequential", 1, urls)
+    entries, concurrent, _ = run("concurrent", args.concurrency, urls, webp=True)
+    print(f"{'sequential':<28} {sequential:>7.2f} s")
+    print(f"{f'concurrent ({args.concurrency} workers)':<28} {concurrent:>7.2f} s")
+
+    half = len(urls) // 2
+    _, first, _ = run("resumed", args.concurrency, urls[:half])
+    resumed_entries, second, journal = run("resumed", args.concurrency, urls, resume=True)
+    assert len(resumed_entries) == len(urls)
+    print(f"{'interrupted at 50%':<28} {first:>7.2f} s")
+    print(f"{'resumed':<28} {second:>7.2f} s  ({journal.reused} reused, {journal.built} downloaded)")
+
+    print(f"{'originals':<28} {store_size(entries, work_dir, 'original'):>7.2f} MB")
+    print(f"{'PNG thumbnails':<28} {store_size(entries, work_dir, 'thumbnails'):>7.2f} MB")
+    print(f"{'WebP thumbnails':<28} {store_size(entries, work_dir, 'webp'):>7.2f} MB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
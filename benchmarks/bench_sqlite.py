@@ -0,0 +1,99 @@
+"""
+Query latency of the SQLite backend against the in-memory dict path
+(PokemonIndex over the summaries plus the records parsed from JSON), at
+realistic and 100x database size: open, uncached type filter, name and dex
+lookups, evolution-chain resolution and loading one full record.
+
+    python benchmarks/bench_sqlite.py --scales 1 100
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, TYPES, time_calls, write_synthetic_database
+
+sys.path.insert(0, ROOT)
+from data import InMemoryDetails, PokemonIndex, build_sqlite_database, summarize_pokemon
+from sqlite_store import SQLiteDatabase
+
+
+def open_memory(json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        database = json.load(f)
+    details = InMemoryDetails(database, [summarize_pokemon(p) for p in database["pokemon"]])
+    return details, PokemonIndex({"pokemon": details.summaries})
+
+
+def open_sqlite(sqlite_path):
+    database = SQLiteDatabase(sqlite_path, cache_size=0)
+    return database, database
+
+
+def run_queries(details, index, cases):
+    """Median microseconds of each query, bypassing the result caches."""
+    cases = [(case,) for case in cases]
+    return {
+        "filter": time_calls(lambda c: index._compute_filter(*c["filter"]), cases, unit=1e6)[0],
+        "by name": time_calls(lambda c: index.position_by_name(c["name"]), cases, unit=1e6)[0],
+        "by dex": time_calls(lambda c: index.position_by_dex(c["dex"]), cases, unit=1e6)[0],
+        "evolution": time_calls(lambda c: index.resolve_evolution_chain(c["chain"]), cases, unit=1e6)[0],
+        "record": time_calls(lambda c: details.load(c["position"]), cases, unit=1e6)[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        scale, json_path, sqlite_path = args.generate
+        write_synthetic_database(json_path, int(scale), with_sets=True)
+        with open(json_path, "r", encoding="utf-8") as f:
+            build_sqlite_database(json.load(f), sqlite_path)
+        return
+
+    rng = random.Random(0)
+    queries = ["filter", "by name", "by dex", "evolution", "record"]
+    print(f"{'scale':>6} {'backend':<8} {'open ms':>9} " + " ".join(f"{q + ' us':>12}" for q in queries))
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            json_path = os.path.join(tmp, f"combined_x{scale}.json")
+            sqlite_path = os.path.join(tmp, f"combined_x{scale}.sqlite")
+            subprocess.run([sys.executable, __file__, "--generate", str(scale), json_path, sqlite_path],
+                           check=True, capture_output=True)
+
+            results = {}
+            for label, opener, path in (("memory", open_memory, json_path), ("sqlite", open_sqlite, sqlite_path)):
+                start = time.perf_counter()
+                details, index = opener(path)
+                open_ms = (time.perf_counter() - start) * 1000
+                if not results:
+                    count = len(index.pokemon)
+                    cases = []
+                    for _ in range(args.queries):
+                        position = rng.randrange(count)
+                        record = details.load(position)
+                        cases.append({
+                            "filter": (tuple(sorted(rng.sample(TYPES, rng.choice([1, 2])))), ()),
+                            "name": record.variants[0].name.upper(),
+                            "dex": record.dex_number,
+                            "chain": record.evolution_chain,
+                            "position": position,
+                        })
+                results[label] = (open_ms, run_queries(details, index, cases))
+                del details, index
+
+            for label, (open_ms, timings) in results.items():
+                print(f"{scale:>6} {label:<8} {open_ms:>9.1f} " + " ".join(f"{timings[q]:>12.1f}" for q in queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Latency of scoring every variant as a team's sixth member: the batched
+TypeMatchups.rank_candidates against a Python loop over every candidate,
+attacking type and team member, at 1x, 10x and 100x the variant count.
+
+    python benchmarks/bench_team.py --scales 1 10 100
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from synthetic import ROOT, make_synthetic_database
+
+sys.path.insert(0, ROOT)
+from data import StatMatrix
+from detail_store import database_move_types, variant_rows
+from type_chart import TYPES, TypeMatchups, defense_vector, type_mask
+
+
+def naive_rank(matrix, team_rows, team_attack, limit=10):
+    """The same ranking as rank_candidates, one candidate at a time."""
+    team_types = [matrix.variant_types[row] for row in team_rows]
+    combo_defense = [defense_vector(c) for c in {tuple(t) for t in matrix.variant_types}]
+    scored = []
+    for row, types in enumerate(matrix.variant_types):
+        if row in team_rows:
+            continue
+        members = [defense_vector(t) for t in team_types + [types]]
+        weaknesses = sum(
+            sum(m[a] > 1 for m in members) > sum(m[a] < 1 for m in members) for a in range(len(TYPES))
+        )
+        attack = team_attack | type_mask(types)
+        covered = sum(any(d[a] > 1 for a in range(len(TYPES)) if attack[a]) for d in combo_defense)
+        scored.append((weaknesses, -covered / len(combo_defense), -matrix.bst[row], row))
+    return sorted(scored)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--loop-max-variants", type=int, default=10000, help="Skip the loop above this size.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'scale':>6} {'variants':>9} {'path':<8} {'median ms':>10} {'build ms':>9}")
+    for scale in args.scales:
+        database = make_synthetic_database(scale)
+        matrix = StatMatrix(variant_rows(database["pokemon"]))
+        start = time.perf_counter()
+        matchups = TypeMatchups(matrix.variant_types, database_move_types(database))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        teams = [rng.sample(range(len(matrix.names)), 5) for _ in range(args.queries)]
+        attacks = [type_mask(rng.sample(TYPES, 6)) for _ in teams]
+        samples = []
+        for team, attack in zip(teams, attacks):
+            start = time.perf_counter()
+            matchups.rank_candidates(team, attack, matrix.bst)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        if len(matrix.names) <= args.loop_max_variants:
+            start = time.perf_counter()
+            naive_rank(matrix, teams[0], attacks[0])
+            naive_ms = (time.perf_counter() - start) * 1000
+            print(f"{scale:>6} {len(matrix.names):>9} {'loop':<8} {naive_ms:>10.1f} {'':>9}")
+        print(f"{scale:>6} {len(matrix.names):>9} {'batched':<8} {statistics.median(samples):>10.2f} {build_ms:>9.1f}")
+        if scale == args.scales[0]:
+            expected = [row for *_, row in naive_rank(matrix, teams[0], attacks[0])]
+            got = [row for row, _, _ in matchups.rank_candidates(teams[0], attacks[0], matrix.bst)]
+            print(f"{'':>6} rankings agree: {expected == got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Synthetic, scaled Pokémon databases for the benchmark scripts.
+
+The generated data follows the layout described in
+combine_database_instructions.txt. Species names come from gen9.json so that
+competitive sets can be attached; every scale copy beyond the first gets a
+numeric suffix unless `unique_names` is disabled. time_calls is the timing
+helper the benchmarks share.
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_CONSTRUCTION = os.path.join(ROOT, "database_construction")
+GEN9_PATH = os.path.join(DATABASE_CONSTRUCTION, "gen9.json")
+
+for path in (ROOT, DATABASE_CONSTRUCTION):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+TYPES = [
+    "normal", "fire", "water", "electric", "grass", "ice", "fighting", "poison", "ground",
+    "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy",
+]
+STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+WORDS = "when this pokemon is hit by a move its stats rise and the foe loses some hp each turn".split()
+
+
+def load_gen9():
+    with open(GEN9_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_moves(gen9, seed=0):
+    """
+    Returns a move entry, with a random type and damage class, for every move
+    named in the gen9 sets. Names follow PokeAPI ("Giga Drain" -> "giga-drain").
+    """
+    rng = random.Random(seed + 1)
+    names = set()
+    for tiers in gen9.values():
+        for sets in tiers.values():
+            for set_data in sets.values():
+                for move in set_data.get("moves", []):
+                    names.update(move if isinstance(move, list) else [move])
+    return [
+        {
+            "name": name.lower().replace(" ", "-").replace("'", ""),
+            "description": "",
+            "type": rng.choice(TYPES),
+            "damage_class": rng.choice(["physical", "special", "special", "status"]),
+            "method": [],
+        }
+        for name in sorted(names)
+    ]
+
+
+def make_synthetic_database(scale=1, unique_names=True, with_sets=False, with_learners=False, seed=0):
+    """
+    Builds a database with `scale` copies of every species named in gen9.json.
+
+    :param scale: Number of copies of the base species list.
+    :param unique_names: Suffix names of the extra copies so they stay distinct.
+    :param with_sets: Merge the gen9 competitive sets in, like merger.py does.
+    :param with_learners: Fill every move's "method" list with about 15% of the variants.
+    :param seed: Random seed, so runs are reproducible.
+    :return: A database dictionary with "pokemon", "abilities" and "moves" lists.
+    """
+    rng = random.Random(seed)
+    gen9 = load_gen9()
+    base_names = [name.lower() for name in gen9]
+    abilities = [
+        {"name": f"ability-{i}", "description": " ".join(rng.choice(WORDS) for _ in range(30))}
+        for i in range(300)
+    ]
+
+    pokemon = []
+    for copy in range(scale):
+        for i, name in enumerate(base_names):
+            dex = copy * len(base_names) + i + 1
+            full_name = f"{name}-{copy}" if unique_names and copy else name
+            types = rng.sample(TYPES, rng.choice([1, 2]))
+            variant = {
+                "name": full_name,
+                "types": types,
+                "base_stats": {stat: rng.randint(20, 160) for stat in STAT_NAMES},
+                "abilities": rng.sample(abilities, rng.randint(1, 3)),
+                "image_url": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{dex}.png",
+            }
+            pokemon.append({
+                "dex_number": dex,
+                "name": full_name,
+                "variants": [variant],
+                "evolution_chain": [],
+            })
+
+    # Consecutive species form three-stage evolution chains; in every fifth
+    # chain both later species evolve from the first instead.
+    for chain_id, start in enumerate(range(0, len(pokemon), 3), 1):
+        members = pokemon[start:start + 3]
+        branched = chain_id % 5 == 0
+        chain = [
+            {
+                "name": p["name"],
+                "evolves_from": members[0 if branched else n - 1]["name"] if n else None,
+                "evolution_details": [{"trigger": {"name": "level-up"}, "min_level": 16 * (1 if branched else n)}] if n else [],
+            }
+            for n, p in enumerate(members)
+        ]
+        for p in members:
+            p["evolution_chain"] = chain
+            p["evolution_chain_id"] = chain_id
+
+    database = {"pokemon": pokemon, "abilities": abilities, "moves": make_moves(gen9, seed)}
+    if with_learners:
+        learner_rng = random.Random(seed + 2)
+        variants = [variant["name"] for p in pokemon for variant in p["variants"]]
+        for move in database["moves"]:
+            move["method"] = sorted(learner_rng.sample(variants, max(1, len(variants) * 15 // 100)))
+    if with_sets:
+        from merger import SetIndex, merge_sets_into_database
+        sets = gen9
+        if unique_names:
+            sets = {f"{name}-{copy}" if copy else name: data for copy in range(scale) for name, data in gen9.items()}
+        merge_sets_into_database(database, SetIndex.from_data({"gen9.json": sets}))
+    return database
+
+
+def write_synthetic_database(path, scale=1, **options):
+    """Writes make_synthetic_database(scale, **options) to `path` with indent=4."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_synthetic_database(scale, **options), f, indent=4)
+    return path
+
+
+def time_calls(func, cases, repeat=1, unit=1000):
+    """
+    Times func(*case) for every case, `repeat` times over.
+
+    :param unit: Units per second of the result: 1000 for ms, 1e6 for µs.
+    :return: (median, 99th percentile) of the call durations.
+    """
+    samples = []
+    for _ in range(repeat):
+        for case in cases:
+            start = time.perf_counter()
+            func(*case)
+            samples.append((time.perf_counter() - start) * unit)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
@@ -0,0 +1,107 @@
+"""
+Normalized competitive sets.
+
+gen9.json mixes strings and lists of alternatives: a move slot, item,
+ability, nature or Tera Type is either one string or a list of options, and
+EVs/IVs are either one spread or a list of spreads. normalize_set turns a
+set into one shape:
+
+    {
+        "moves": [["Giga Drain"], ["Sludge Bomb", "Sludge Wave"], ...],   options per slot
+        "ability": ["Chlorophyll"],
+        "item": ["Life Orb", "Leftovers"],
+        "nature": ["Modest"],
+        "teratypes": ["Fire"],
+        "evs": [{"hp": 4, "spa": 252, "spe": 252}],                         spreads in STAT_ORDER
+        "ivs": [{"atk": 0}],
+        "html": "<details>...</details>"
+    }
+
+merger.py stores sets in this form, with "html" pre-rendered by
+render_set_html, so the app shows a whole tier with one markdown call. The
+app reads them as records.CompetitiveSet.
+"""
+from html import escape
+
+STAT_ORDER = ["hp", "atk", "def", "spa", "spd", "spe"]
+STAT_LABELS = {"hp": "HP", "atk": "Atk", "def": "Def", "spa": "SpA", "spd": "SpD", "spe": "Spe"}
+OPTION_FIELDS = ["ability", "item", "nature", "teratypes"]
+SPREAD_FIELDS = ["evs", "ivs"]
+
+def _options(value):
+    """Returns a value that may be one option or a list of options as a list."""
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+def _spreads(value):
+    """Returns one spread or a list of spreads as a list of dicts in STAT_ORDER."""
+    spreads = [value] if isinstance(value, dict) else list(value or [])
+    return [
+        {stat: spread[stat] for stat in sorted(spread, key=lambda s: STAT_ORDER.index(s) if s in STAT_ORDER else len(STAT_ORDER))}
+        for spread in spreads if spread
+    ]
+
+def normalize_set(set_data):
+    """
+    Returns a competitive set in the normalized schema described above,
+    without "html". Already normalized sets are returned unchanged, and keys
+    other than the known fields are kept as they are.
+    """
+    normalized = {"moves": [_options(move) for move in set_data.get("moves", [])]}
+    for field in OPTION_FIELDS:
+        normalized[field] = _options(set_data.get(field))
+    for field in SPREAD_FIELDS:
+        normalized[field] = _spreads(set_data.get(field))
+    for key, value in set_data.items():
+        if key not in normalized and key != "html":
+            normalized[key] = value
+    return normalized
+
+def _format_spread(spread):
+    return " / ".join(f"{value} {STAT_LABELS.get(stat, stat)}" for stat, value in spread.items())
+
+def render_set_html(name, set_data):
+    """
+    Renders a normalized set as a collapsible HTML block: a <details>
+    element, so opening it needs no rerun of the app.
+    """
+    moves = "".join(f"<li>{escape(' / '.join(options))}</li>" for options in set_data["moves"]) or "<li>N/A</li>"
+    rows = [
+        ("Ability", "⭐", " / ".join(set_data["ability"])),
+        ("Item", "🎒", " / ".join(set_data["item"])),
+        ("Nature", "🌿", " / ".join(set_data["nature"])),
+        ("EVs", "", " or ".join(_format_spread(spread) for spread in set_data["evs"])),
+        ("IVs", "", " or ".join(_format_spread(spread) for spread in set_data["ivs"])),
+        ("Tera Types", "", " / ".join(set_data["teratypes"])),
+    ]
+    details = "".join(
+        f"<b>{label}:</b> {icon + ' ' if icon else ''}{escape(value or 'N/A')}<br>"
+        # Most sets leave IVs at their defaults.
+        for label, icon, value in rows if value or label != "IVs"
+    )
+    return (
+        f"<details><summary><b>{escape(name)}</b></summary>"
+        f"<b>Moves:</b> ⚔️<ul>{moves}</ul>{details}</details>"
+    )
+
+def normalize_sets(sets):
+    """
+    Normalizes every set of a variant's "sets" ({tier: {set name: set}}) and
+    adds its pre-rendered "html".
+    """
+    normalized = {}
+    for tier, tier_sets in sets.items():
+        normalized[tier] = {}
+        for name, set_data in tier_sets.items():
+            set_data = normalize_set(set_data)
+            set_data["html"] = render_set_html(name, set_data)
+            normalized[tier][name] = set_data
+    return normalized
+
+def tier_html(tier_sets):
+    """
+    Returns the HTML of every set in a tier, given as records.CompetitiveSet
+    records (which render sets merged before "html" existed when loaded).
+    """
+    return "".join(set_record.html for set_record in tier_sets)
@@ -1,22 +1,168 @@
 import json
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 import streamlit as st
+from readonly import freeze
+from detail_store import SUMMARY_FILE, DetailStore, InMemoryDetails, database_move_types, write_detail_store
+from snapshot import STAT_NAMES, open_snapshot
+from sqlite_store import SQLiteDatabase, write_sqlite_database
 
-@st.cache_data
-def load_data():
+DATABASE_PATH = "combined_database.json"
+SNAPSHOT_PATH = "combined_database.snapshot"
+DETAILS_PATH = "pokemon_details"
+SQLITE_PATH = "combined_database.sqlite"
+
+def _is_fresh(path, json_path):
+    """Whether a file built from the JSON database exists and is at least as new as it."""
+    return os.path.exists(path) and (
+        not os.path.exists(json_path) or os.path.getmtime(path) >= os.path.getmtime(json_path)
+    )
+
+def read_database(json_path=DATABASE_PATH, snapshot_path=SNAPSHOT_PATH):
+    """
+    Reads the Pokémon database, preferring the binary snapshot built by
+    database_construction/build_snapshot.py when it is at least as new as
+    the JSON file. Falls back to parsing the JSON file.
+
+    Either way the result is read-only, so it can be shared between sessions.
+    """
+    if _is_fresh(snapshot_path, json_path):
+        return open_snapshot(snapshot_path)
+    with open(json_path, "r", encoding="utf-8") as file:
+        return freeze(json.load(file))
+
+_generation = 0
+
+def dataset_version(json_path=DATABASE_PATH, snapshot_path=SNAPSHOT_PATH, details_path=DETAILS_PATH, sqlite_path=SQLITE_PATH):
+    """
+    Returns a key identifying the current data files: the reload generation
+    and the modification time of every database file. The cached loaders
+    take it as an argument, so a new combined_database.json (or rebuilt
+    snapshot, detail store or SQLite file) is picked up on the next rerun.
+    """
+    paths = (json_path, snapshot_path, os.path.join(details_path, SUMMARY_FILE), sqlite_path)
+    return (_generation,) + tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+
+def reload_data():
+    """
+    Invalidates the shared dataset. Every cached loader is rebuilt on its
+    next call, even if the data files kept their modification times.
+    Sessions still holding the previous dataset keep using it until their
+    next rerun.
+    """
+    global _generation
+    _generation += 1
+
+@st.cache_resource(max_entries=1)
+def load_data(version=None):
+    """
+    Loads the Pokémon data from the snapshot or JSON file once per process
+    and dataset version. Every session shares the same read-only object.
+    """
+    return read_database()
+
+def pokemon_types(pokemon):
+    """
+    Returns the types of a Pokémon: its own "types" list if it has one,
+    otherwise the types of all its variants in order of appearance.
+    """
+    if pokemon.get("types"):
+        return list(pokemon["types"])
+    types = []
+    for variant in pokemon.get("variants", []):
+        for t in variant.get("types", []):
+            if t not in types:
+                types.append(t)
+    return types
+
+def variant_image(variant, size=None, local_only=False):
+    """
+    Returns the image to show for a Variant record: its local sprite, written
+    by database_construction/sprite_cache.py, when present on disk, otherwise
+    its image_url.
+
+    :param size: Smallest thumbnail at least this large; None for the original.
+    :param local_only: Return None instead of the URL when there is no local file.
+    """
+    sprite = variant.sprite or {}
+    path = sprite.get("original")
+    if size is not None and sprite.get("thumbnails"):
+        sizes = sorted(int(s) for s in sprite["thumbnails"])
+        path = sprite["thumbnails"][str(next((s for s in sizes if s >= size), sizes[-1]))]
+    if path:
+        path = os.path.join(os.path.dirname(DATABASE_PATH), path)
+        if os.path.exists(path):
+            return path
+    return None if local_only else variant.image_url
+
+def variant_names(pokemon):
     """
-    Loads the Pokémon data from a JSON file.
+    Returns the names of a Pokémon's variants, from a full record or a summary.
     """
-    with open("combined_database.json", "r", encoding="utf-8") as file:
-        return json.load(file)
+    if "variant_names" in pokemon:
+        return list(pokemon["variant_names"])
+    return [variant["name"] for variant in pokemon.get("variants", [])]
+
+def summarize_pokemon(pokemon):
+    """
+    Returns the small record of a Pokémon kept resident by the app: what the
+    filters, the lookups and the search suggestions need.
+    """
+    return {
+        "dex_number": pokemon.get("dex_number"),
+        "name": pokemon["name"],
+        "types": pokemon_types(pokemon),
+        "region": pokemon.get("region"),
+        "variant_names": variant_names(pokemon),
+    }
+
+def build_detail_store(data, directory=DETAILS_PATH):
+    """
+    Writes the summaries and per-Pokémon detail files of a database.
+
+    :return: Number of Pokémon written.
+    """
+    pokemon = data.get("pokemon", [])
+    metadata = {key: value for key, value in data.items() if key != "pokemon"}
+    write_detail_store([summarize_pokemon(p) for p in pokemon], pokemon, directory, database_move_types(data), metadata)
+    return len(pokemon)
+
+def build_sqlite_database(data, path=SQLITE_PATH):
+    """
+    Writes the database to a SQLite file.
+
+    :return: Number of Pokémon written.
+    """
+    pokemon = data.get("pokemon", [])
+    write_sqlite_database(data, [summarize_pokemon(p) for p in pokemon], path, database_move_types(data))
+    return len(pokemon)
+
+def open_details(details_path=DETAILS_PATH, json_path=DATABASE_PATH, snapshot_path=SNAPSHOT_PATH, sqlite_path=SQLITE_PATH):
+    """
+    Opens the Pokémon records for the app, using the first of these that is
+    at least as new as the JSON file:
+
+    - the SQLite database built by database_construction/build_sqlite.py
+    - the detail store built by database_construction/build_details.py
+
+    Otherwise reads the whole database and summarizes it in memory.
+    """
+    if _is_fresh(sqlite_path, json_path):
+        return SQLiteDatabase(sqlite_path)
+    if _is_fresh(os.path.join(details_path, SUMMARY_FILE), json_path):
+        return DetailStore(details_path)
+    database = read_database(json_path, snapshot_path)
+    return InMemoryDetails(database, freeze([summarize_pokemon(p) for p in database.get("pokemon", [])]))
 
 def get_unique_types(data):
     """
     Extracts a sorted list of unique Pokémon types.
-    Assumes each Pokémon has a "types" list.
     """
     types = set()
     for pokemon in data.get("pokemon", []):
-        for t in pokemon.get("types", []):
+        for t in pokemon_types(pokemon):
             types.add(t)
     return sorted(list(types))
 
@@ -31,3 +177,280 @@ def get_unique_regions(data):
         if region:
             regions.add(region)
     return sorted(list(regions))
+
+class PokemonIndex:
+    """
+    Lookup structures built once over the Pokémon list so that filtering and
+    searching on every rerun do not rescan the database:
+
+    - by_dex: dex number -> position
+    - by_name: lowercase Pokémon and variant name -> position
+    - type_postings / region_postings: type or region -> set of positions
+
+    Filter results are cached per (types, regions) combination.
+    """
+
+    def __init__(self, data):
+        self.pokemon = list(data.get("pokemon", []))
+        self.by_dex = {}
+        self.type_postings = {}
+        self.region_postings = {}
+        species_names, names_of_variants = {}, {}
+
+        for position, pokemon in enumerate(self.pokemon):
+            self.by_dex.setdefault(pokemon.get("dex_number"), position)
+            species_names.setdefault(pokemon["name"].lower(), position)
+            for name in variant_names(pokemon):
+                names_of_variants.setdefault(name.lower(), position)
+            for t in pokemon_types(pokemon):
+                self.type_postings.setdefault(t, set()).add(position)
+            region = pokemon.get("region")
+            if region:
+                self.region_postings.setdefault(region, set()).add(position)
+        # Species names take precedence over variant names.
+        self.by_name = {**names_of_variants, **species_names}
+
+        self.all_positions = frozenset(range(len(self.pokemon)))
+        self.types = sorted(self.type_postings)
+        self.regions = sorted(self.region_postings)
+        self._filter = lru_cache(maxsize=256)(self._compute_filter)
+
+    def _compute_filter(self, types, regions):
+        positions = self.all_positions
+        if types:
+            positions = positions & frozenset().union(*(self.type_postings.get(t, ()) for t in types))
+        if regions:
+            positions = positions & frozenset().union(*(self.region_postings.get(r, ()) for r in regions))
+        return positions, tuple(sorted(positions))
+
+    def filter(self, types=(), regions=()):
+        """
+        Returns the positions of the Pokémon matching any of the selected
+        types and any of the selected regions (an empty selection matches all).
+
+        :return: (frozenset of positions, the same positions in database order)
+        """
+        return self._filter(tuple(sorted(types)), tuple(sorted(regions)))
+
+    def select(self, ordered_positions):
+        """Returns the Pokémon at the given positions."""
+        return [self.pokemon[position] for position in ordered_positions]
+
+    def position_by_dex(self, dex_number, positions=None):
+        """Returns the position of the Pokémon with this dex number if it is within `positions`."""
+        position = self.by_dex.get(dex_number)
+        if position is None or (positions is not None and position not in positions):
+            return None
+        return position
+
+    def position_by_name(self, name, positions=None):
+        """Returns the position of the Pokémon (or variant's Pokémon) with this exact name if it is within `positions`."""
+        position = self.by_name.get(name.lower())
+        if position is None or (positions is not None and position not in positions):
+            return None
+        return position
+
+    def resolve_evolution_chain(self, evolution_chain):
+        """
+        Returns the position of every member of an evolution chain, or None
+        for members that are not in the database.
+        """
+        return [self.by_name.get(evo["name"].lower()) for evo in evolution_chain]
+
+    def find_by_dex(self, dex_number, positions=None):
+        """Returns the Pokémon with this dex number if it is within `positions`."""
+        position = self.position_by_dex(dex_number, positions)
+        return None if position is None else self.pokemon[position]
+
+    def find_by_name(self, name, positions=None):
+        """Returns the Pokémon (or variant's Pokémon) with this exact name if it is within `positions`."""
+        position = self.position_by_name(name, positions)
+        return None if position is None else self.pokemon[position]
+
+def open_index(details):
+    """
+    Returns the query index over opened Pokémon records. A SQLite database
+    answers the queries itself; other stores get a PokemonIndex over their
+    summaries.
+    """
+    if isinstance(details, SQLiteDatabase):
+        return details
+    return PokemonIndex({"pokemon": details.summaries})
+
+@st.cache_resource(max_entries=1)
+def load_details(version=None):
+    """
+    Opens the detail store once per process and dataset version.
+    """
+    return open_details()
+
+@st.cache_resource(max_entries=1)
+def load_index(version=None):
+    """
+    Opens the query index once per process and dataset version.
+    """
+    return open_index(load_details(version))
+
+class StatMatrix:
+    """
+    Base stats of every variant as one NumPy matrix, for whole-dataset stat
+    queries without Python loops:
+
+    - stats: float32 matrix, one row per variant, columns in STAT_NAMES
+      order (missing stats are 0), with the base stat total in bst
+    - normalized: stats scaled to zero mean and unit variance per column
+    - type_matrix / tier_matrix: boolean variant x type and variant x tier
+      membership, with the column order in types / tiers
+    - names / variant_types / positions: each row's variant name, types
+      and its Pokémon's position
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.names = [row["name"] for row in rows]
+        self.variant_types = [tuple(row["types"]) for row in rows]
+        self.positions = np.array([row["position"] for row in rows], dtype=np.int32)
+        self.row_by_name = {}
+        for i, name in enumerate(self.names):
+            self.row_by_name.setdefault(name.lower(), i)
+
+        self.stats = np.array(
+            [[row["base_stats"].get(stat, 0) for stat in STAT_NAMES] for row in rows], dtype=np.float32,
+        ).reshape(len(rows), len(STAT_NAMES))
+        self.bst = self.stats.sum(axis=1)
+        std = self.stats.std(axis=0)
+        self.normalized = (self.stats - self.stats.mean(axis=0)) / np.where(std > 0, std, 1)
+
+        self.types = sorted({t for row in rows for t in row["types"]})
+        self.tiers = sorted({tier for row in rows for tier in row["tiers"]})
+        self.type_matrix = self._membership(rows, "types", self.types)
+        self.tier_matrix = self._membership(rows, "tiers", self.tiers)
+
+    @staticmethod
+    def _membership(rows, field, columns):
+        column_of = {value: i for i, value in enumerate(columns)}
+        matrix = np.zeros((len(rows), len(columns)), dtype=bool)
+        for i, row in enumerate(rows):
+            matrix[i, [column_of[value] for value in row[field]]] = True
+        return matrix
+
+    def mask(self, types=(), tiers=()):
+        """
+        Returns a boolean row mask of the variants with any of the given
+        types and any of the given tiers (an empty selection matches all).
+        """
+        mask = np.ones(len(self.names), dtype=bool)
+        for values, columns, matrix in ((types, self.types, self.type_matrix), (tiers, self.tiers, self.tier_matrix)):
+            if values:
+                mask &= matrix[:, [columns.index(v) for v in values if v in columns]].any(axis=1)
+        return mask
+
+    def similar(self, name, k=5, types=(), tiers=()):
+        """
+        Returns the k variants whose base stats are closest to those of the
+        variant `name`, by Euclidean distance between normalized stats.
+
+        :param name: Variant name to compare against.
+        :param k: Number of neighbours.
+        :param types: Only consider variants with any of these types.
+        :param tiers: Only consider variants with sets in any of these tiers.
+        :return: List of (row, distance), closest first; empty if `name` is unknown.
+        """
+        row = self.row_by_name.get(name.lower())
+        if row is None:
+            return []
+        distances = np.sqrt(np.square(self.normalized - self.normalized[row]).sum(axis=1))
+        distances[~self.mask(types, tiers)] = np.inf
+        distances[row] = np.inf
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(int(i), float(distances[i])) for i in nearest]
+
+@st.cache_resource(max_entries=1)
+def load_stat_matrix(version=None):
+    """
+    Builds the stat matrix once per process and dataset version.
+    """
+    return StatMatrix(load_details(version).variant_rows())
+
+# Numeric columns of the variant table that can be range-filtered and sorted.
+STAT_COLUMNS = STAT_NAMES + ["bst"]
+
+class VariantTable:
+    """
+    Every variant as one row of a flat DataFrame, for browsing with
+    vectorized filters: name, Pokémon, dex number, region, type_1 / type_2
+    and tier (the first tier it has sets in) as categoricals, each base
+    stat and bst.
+
+    Query results are cached per filter state.
+
+    :param rows: Variant rows, as returned by the stores' variant_rows().
+    :param summaries: (position, summary) pairs of the Pokémon.
+    """
+
+    def __init__(self, rows, summaries):
+        rows = list(rows)
+        summaries = dict(summaries)
+        frame = pd.DataFrame({
+            "name": [row["name"] for row in rows],
+            "pokemon": [summaries[row["position"]]["name"] for row in rows],
+            "dex_number": [summaries[row["position"]]["dex_number"] for row in rows],
+            "position": np.array([row["position"] for row in rows], dtype=np.int32),
+            "region": pd.Categorical([summaries[row["position"]].get("region") for row in rows]),
+            "type_1": pd.Categorical([row["types"][0] if row["types"] else None for row in rows]),
+            "type_2": pd.Categorical([row["types"][1] if len(row["types"]) > 1 else None for row in rows]),
+            "tier": pd.Categorical([row["tiers"][0].upper() if row["tiers"] else None for row in rows]),
+        })
+        for stat in STAT_NAMES:
+            frame[stat] = np.array([row["base_stats"].get(stat, 0) for row in rows], dtype=np.int16)
+        frame["bst"] = frame[STAT_NAMES].sum(axis=1).astype(np.int16)
+        self.frame = frame
+        self.bounds = {column: (int(frame[column].min()), int(frame[column].max())) if len(frame) else (0, 0)
+                       for column in STAT_COLUMNS}
+        self._query = lru_cache(maxsize=128)(self._compute_query)
+
+    def _compute_query(self, types, regions, ranges, sort_by, descending):
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+        if types:
+            mask &= (frame["type_1"].isin(types) | frame["type_2"].isin(types)).to_numpy()
+        if regions:
+            mask &= frame["region"].isin(regions).to_numpy()
+        for column, low, high in ranges:
+            values = frame[column].to_numpy()
+            mask &= (values >= low) & (values <= high)
+        result = frame[mask]
+        if sort_by:
+            result = result.sort_values([sort_by, "position"], ascending=[not descending, True], kind="stable")
+        return result
+
+    def query(self, types=(), regions=(), ranges=None, sort_by="dex_number", descending=False):
+        """
+        Returns the variants matching the filters, sorted.
+
+        :param types: Keep variants with any of these types.
+        :param regions: Keep variants of Pokémon from any of these regions.
+        :param ranges: {column: (low, high)} inclusive bounds on STAT_COLUMNS.
+            Ranges covering the whole column are ignored.
+        :param sort_by: Column to sort by; ties keep database order.
+        :param descending: Sort from highest to lowest.
+        :return: A DataFrame shared with other callers; do not modify it.
+        """
+        ranges = tuple(sorted(
+            (column, int(low), int(high)) for column, (low, high) in (ranges or {}).items()
+            if (low, high) != self.bounds[column]
+        ))
+        return self._query(tuple(sorted(types)), tuple(sorted(regions)), ranges, sort_by, descending)
+
+@st.cache_resource(max_entries=1)
+def load_variant_table(version=None):
+    """
+    Builds the variant table once per process and dataset version.
+    """
+    index = load_index(version)
+    _, ordered_positions = index.filter()
+    return VariantTable(load_details(version).variant_rows(), zip(ordered_positions, index.select(ordered_positions)))
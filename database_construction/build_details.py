@@ -0,0 +1,24 @@
+import argparse
+import json
+import os
+import sys
+
+# The detail store is read by data.py, next to the app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data import DETAILS_PATH, build_detail_store
+
+def main():
+    parser = argparse.ArgumentParser(description="Split the combined database into summaries and per-Pokémon detail files.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=DETAILS_PATH, help="Directory of the detail store.")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    count = build_detail_store(database, args.output)
+
+    print(f"Detail store complete. {count} Pokémon from '{args.input}' have been written to '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
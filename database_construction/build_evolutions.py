@@ -0,0 +1,37 @@
+import argparse
+import json
+import os
+import sys
+
+# The graph format lives next to the app, which reads it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evolution import build_evolution_graph
+
+def main():
+    parser = argparse.ArgumentParser(description="Add the evolution graph (one entry per chain) to the database.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=None, help="Path of the updated database (default: overwrite the input).")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indenting it.")
+    args = parser.parse_args()
+    output = args.output or args.input
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    graph = build_evolution_graph(database.get("pokemon", []))
+    database["evolution_chains"] = graph
+
+    with open(output + ".tmp", "w", encoding="utf-8") as f:
+        if args.compact:
+            json.dump(database, f, separators=(",", ":"))
+        else:
+            json.dump(database, f, indent=4)
+    os.replace(output + ".tmp", output)
+
+    branching = sum(1 for chain in graph["chains"].values()
+                    if len({parent for parent, _, _ in chain["edges"]}) < len(chain["edges"]))
+    print(f"Evolution graph complete. {len(graph['chains'])} chains ({branching} branching) covering "
+          f"{len(graph['species'])} species have been saved to '{output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import os
+
+
+class BuildJournal:
+    """
+    Append-only JSON Lines journal of completed database records.
+
+    Every record (a species, ability, item, move or nature entry) is appended
+    and flushed as soon as it is built, together with the ETag/Last-Modified
+    validators of every resource it was built from. A crashed build can then
+    resume from the last committed line, and a refresh can reuse the records
+    whose upstream resources are unchanged.
+
+    Each line looks like:
+        {"section": "ability", "url": "...", "entry": {...}, "validators": {"<url>": {"etag": ..., "last_modified": ...}}}
+    """
+
+    def __init__(self, path: str, reuse: bool = False, check_unchanged=None):
+        """
+        :param path: Location of the journal file.
+        :param reuse: Whether records from a previous run may be reused.
+        :param check_unchanged: Optional function (url, validator) -> bool. When given,
+            a previous record is only reused if all of its validators are unchanged.
+        """
+        self.path = path
+        self.check_unchanged = check_unchanged
+        self.previous = self._load() if reuse else {}
+        self.current = {}
+        self.reused = 0
+        self.built = 0
+        self._file = open(path, "a" if reuse else "w", encoding="utf-8")
+
+    def _load(self) -> dict:
+        """
+        Reads committed records, keeping the latest one per (section, url).
+        A torn final line from a crash is discarded and truncated away.
+        """
+        records = {}
+        path = self.path
+        if not os.path.exists(path):
+            return records
+
+        committed_size = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                records[(record["section"], record["url"])] = record
+                committed_size += len(line)
+
+        if committed_size != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(committed_size)
+        return records
+
+    def reuse(self, section: str, url: str):
+        """
+        Returns the previously committed entry for a resource, if it may be reused.
+
+        :param section: The endpoint the record belongs to.
+        :param url: The resource URL.
+        :return: The stored entry, or None if it must be rebuilt.
+        """
+        record = self.previous.get((section, url))
+        if record is None:
+            return None
+        if self.check_unchanged and not all(
+            self.check_unchanged(dep, validator) for dep, validator in record["validators"].items()
+        ):
+            return None
+
+        self.current[(section, url)] = record
+        self.reused += 1
+        return record["entry"]
+
+    def commit(self, section: str, url: str, entry, validators: dict):
+        """
+        Appends a freshly built record and flushes it to disk.
+
+        :param section: The endpoint the record belongs to.
+        :param url: The resource URL.
+        :param entry: The built database entry.
+        :param validators: Validators of every resource the entry was built from.
+        """
+        record = {"section": section, "url": url, "entry": entry, "validators": validators}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.current[(section, url)] = record
+        self.built += 1
+
+    def compact(self):
+        """
+        Rewrites the journal with only the records of the finished build,
+        dropping superseded and no longer listed entries.
+        """
+        self._file.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self.current.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,39 @@
+import argparse
+import json
+import os
+import sys
+
+# The learnset format lives next to the app, which queries it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from learnsets import build_learnsets
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace the moves' learner lists with compact learner bitsets.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=None, help="Path of the updated database (default: overwrite the input).")
+    parser.add_argument("--keep-method", action="store_true", help="Keep each move's \"method\" list as well.")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indenting it.")
+    args = parser.parse_args()
+    output = args.output or args.input
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    database["learnsets"] = build_learnsets(database)
+    if not args.keep_method:
+        for move in database.get("moves", []):
+            move.pop("method", None)
+
+    with open(output + ".tmp", "w", encoding="utf-8") as f:
+        if args.compact:
+            json.dump(database, f, separators=(",", ":"))
+        else:
+            json.dump(database, f, indent=4)
+    os.replace(output + ".tmp", output)
+
+    learnsets = database["learnsets"]
+    print(f"Learnsets complete. {len(learnsets['moves'])} moves and {len(learnsets['pokemon'])} Pokémon "
+          f"have been encoded into '{output}' ({os.path.getsize(output) / 2 ** 20:.1f} MB).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# The stat formula and the speed tier layout live next to the app, which queries them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stat_calculator import LEVELS, add_set_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Add the final stats of every competitive set and per-tier speed tiers to the database.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=None, help="Path of the updated database (default: overwrite the input).")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indenting it.")
+    args = parser.parse_args()
+    output = args.output or args.input
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    start = time.perf_counter()
+    count = add_set_stats(database)
+    elapsed = time.perf_counter() - start
+
+    with open(output + ".tmp", "w", encoding="utf-8") as f:
+        if args.compact:
+            json.dump(database, f, separators=(",", ":"))
+        else:
+            json.dump(database, f, indent=4)
+    os.replace(output + ".tmp", output)
+
+    print(f"Set stats complete. Stats at levels {', '.join(map(str, LEVELS))} for {count} sets "
+          f"({elapsed * 1000:.0f} ms) and speed tiers for {len(database['speed_tiers'])} tiers "
+          f"have been saved to '{output}'.")
+
+if __name__ == "__main__":
+    main()
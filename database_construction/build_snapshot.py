@@ -0,0 +1,25 @@
+import argparse
+import json
+import os
+import sys
+
+# The snapshot format lives next to data.py, which reads it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from snapshot import write_snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the combined database into a binary snapshot.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default="combined_database.snapshot", help="Path of the snapshot.")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    write_snapshot(database, args.output)
+
+    print(f"Snapshot complete. '{args.input}' ({os.path.getsize(args.input) / 2 ** 20:.1f} MB) has been compiled "
+          f"to '{args.output}' ({os.path.getsize(args.output) / 2 ** 20:.1f} MB).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+import json
+import os
+import sys
+
+# The SQLite backend is read by data.py, next to the app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data import SQLITE_PATH, build_sqlite_database
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the combined database into an indexed SQLite database.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=SQLITE_PATH, help="Path of the SQLite database.")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    count = build_sqlite_database(database, args.output)
+
+    print(f"SQLite database complete. {count} Pokémon from '{args.input}' have been written to "
+          f"'{args.output}' ({os.path.getsize(args.output) / 2 ** 20:.1f} MB).")
+
+if __name__ == "__main__":
+    main()
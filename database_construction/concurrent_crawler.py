@@ -0,0 +1,225 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+import database_fetcher
+from build_journal import BuildJournal
+
+# Status codes that are worth retrying: rate limiting and transient server errors.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests so that no single host receives more than
+    `requests_per_second` requests, no matter how many workers are running.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """
+        Blocks until the host of `url` may be contacted again.
+
+        :param url: The URL about to be requested.
+        """
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot.get(host, now), now)
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ConcurrentCrawler:
+    """
+    Fetches PokeAPI resources through a bounded thread pool sharing one pooled
+    session, with per-host rate limiting and exponential backoff on 429/5xx.
+    """
+
+    def __init__(self, session=None, concurrency: int = 16, requests_per_second: float = 20.0,
+                 max_retries: int = 5, backoff_factor: float = 0.5, timeout: float = 10):
+        self.session = session if session is not None else database_fetcher.session
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+
+        # One connection per worker, kept alive across requests.
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Honours a numeric Retry-After header, otherwise backs off exponentially."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    def fetch(self, url: str, parse: bool = True):
+        """
+        Fetches a single URL, retrying transient failures.
+
+        :param url: The API endpoint URL.
+        :param parse: Whether to parse and return the JSON body.
+        :return: Parsed JSON (or True when parse is False), or None if the request failed.
+        """
+        response = self.fetch_response(url)
+        if response is None:
+            return None
+        return response.json() if parse else True
+
+    def fetch_response(self, url: str):
+        """
+        Fetches a single URL, retrying transient failures.
+
+        :param url: The URL to fetch.
+        :return: The successful response, or None if the request failed.
+        """
+        metrics = database_fetcher.metrics
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            start = time.perf_counter() if metrics is not None else None
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                if metrics is not None:
+                    metrics.record_response(url, time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    print(f"Request failed for {url}: {e}")
+                    return None
+                if metrics is not None:
+                    metrics.record_retry(url)
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            if metrics is not None:
+                metrics.record_response(url, time.perf_counter() - start, response)
+            if response.status_code == 200:
+                return response
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                if metrics is not None:
+                    metrics.record_retry(url)
+                time.sleep(self._backoff_delay(attempt, response))
+                continue
+            print(f"Error: Failed to fetch {url} (Status Code: {response.status_code})")
+            return None
+        return None
+
+    def fetch_many(self, urls: list, parse: bool = True, desc: str = None) -> dict:
+        """
+        Fetches many URLs concurrently.
+
+        :param urls: URLs to fetch; duplicates are requested once.
+        :param parse: Whether to parse the JSON bodies.
+        :param desc: Optional progress bar label.
+        :return: Dictionary mapping each URL to its result (None on failure).
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        with database_fetcher.measure_stage(desc or "fetch_many") as stage, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            stage["records"] = len(unique_urls)
+            results = executor.map(lambda url: self.fetch(url, parse=parse), unique_urls)
+            if desc:
+                results = tqdm(results, total=len(unique_urls), desc=desc)
+                if database_fetcher.metrics is not None:
+                    results = self._with_progress(results)
+            return dict(zip(unique_urls, results))
+
+    @staticmethod
+    def _with_progress(bar):
+        for result in bar:
+            database_fetcher.metrics.update_progress(bar)
+            yield result
+
+
+def warm_cache(crawler: ConcurrentCrawler, skip_urls=frozenset()):
+    """
+    Requests every resource that compile_pokemon_database will read, so that
+    the sequential build afterwards is served entirely from the response cache.
+    Only resources whose children must be discovered are parsed here.
+
+    :param crawler: The crawler to fetch with.
+    :param skip_urls: Listed resources (e.g. already journaled ones) not to crawl.
+    """
+    lists = crawler.fetch_many([database_fetcher.list_url(r) for r in database_fetcher.LIST_LIMITS], desc="Listing Resources")
+    results = {
+        resource: [
+            r for r in (lists[database_fetcher.list_url(resource)] or {}).get("results", [])
+            if r["url"] not in skip_urls
+        ]
+        for resource in database_fetcher.LIST_LIMITS
+    }
+
+    species = crawler.fetch_many([s["url"] for s in results["pokemon-species"]], desc="Crawling Pokémon Species")
+    variety_urls, chain_urls = [], []
+    for species_data in species.values():
+        if not species_data:
+            continue
+        variety_urls.extend(v["pokemon"]["url"] for v in species_data["varieties"])
+        chain_urls.append(species_data["evolution_chain"]["url"])
+
+    varieties = crawler.fetch_many(variety_urls, desc="Crawling Pokémon Varieties")
+    ability_urls = [r["url"] for r in results["ability"]]
+    for variant_data in varieties.values():
+        if variant_data:
+            ability_urls.extend(a["ability"]["url"] for a in variant_data["abilities"])
+
+    leaf_urls = chain_urls + ability_urls
+    for resource in ("item", "move", "nature"):
+        leaf_urls.extend(r["url"] for r in results[resource])
+    crawler.fetch_many(leaf_urls, parse=False, desc="Crawling Remaining Resources")
+
+
+def compile_pokemon_database_concurrent(output_path: str = "pokemon_database.json", base_url: str = None,
+                                        journal_path: str = None, resume: bool = False, only_changed: bool = False,
+                                        fetch_metrics=None, **crawler_options):
+    """
+    Compiles the Pokémon database using the concurrent crawler to download
+    everything up front. The output is produced by the regular sequential
+    compile path, so it is byte-identical to compile_pokemon_database.
+
+    When resuming or refreshing, resources already in the checkpoint journal
+    are not crawled; the few that turn out to need rebuilding are fetched by
+    the compile step itself.
+
+    :param output_path: Where to write the compiled database.
+    :param base_url: Optional PokeAPI base URL override (e.g. a local fixture server).
+    :param journal_path: Checkpoint journal location (defaults to next to the output).
+    :param resume: Reuse records from an interrupted build.
+    :param only_changed: Reuse records whose upstream resources are unchanged.
+    :param fetch_metrics: Optional FetchMetrics to record the crawl and the build in.
+    :param crawler_options: Keyword arguments forwarded to ConcurrentCrawler.
+    """
+    if base_url:
+        database_fetcher.POKEAPI_URL = base_url
+    if not isinstance(database_fetcher.session, database_fetcher.requests_cache.CachedSession):
+        raise RuntimeError("The concurrent crawl mode needs the cached session to hand responses to the compile step.")
+
+    journal_path = journal_path or database_fetcher.journal_path_for(output_path)
+    skip_urls = set()
+    if resume or only_changed:
+        previous = BuildJournal(journal_path, reuse=True)
+        previous.close()
+        skip_urls = {url for _, url in previous.previous}
+
+    database_fetcher.metrics = fetch_metrics
+    start = time.perf_counter()
+    warm_cache(ConcurrentCrawler(**crawler_options), skip_urls)
+    print(f"Crawl finished in {time.perf_counter() - start:.1f}s, compiling from cache.")
+    database_fetcher.compile_pokemon_database(output_path, journal_path, resume, only_changed, fetch_metrics)
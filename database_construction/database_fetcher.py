@@ -1,9 +1,15 @@
+import argparse
 import json
+import os
 import time
+from contextlib import contextmanager, nullcontext
 from tqdm import tqdm
 import requests
 import requests_cache
 
+from build_journal import BuildJournal
+from fetch_metrics import FetchMetrics
+
 # Setup caching for API requests.
 # Responses are cached in an SQLite database ('pokeapi_cache.sqlite') for 24 hours.
 session = requests_cache.CachedSession('pokeapi_cache', backend='sqlite', expire_after=86400)
@@ -11,6 +17,41 @@ session = requests_cache.CachedSession('pokeapi_cache', backend='sqlite', expire
 # Base API URL
 POKEAPI_URL = "https://pokeapi.co/api/v2/"
 
+# Page sizes used when listing every resource of a given endpoint.
+LIST_LIMITS = {
+    "pokemon-species": 10000,
+    "ability": 1000,
+    "item": 1000,
+    "move": 1000,
+    "nature": 100,
+}
+
+def list_url(resource: str) -> str:
+    """
+    Builds the URL that lists every resource of the given endpoint.
+
+    :param resource: Endpoint name (a key of LIST_LIMITS).
+    :return: The list URL under the current POKEAPI_URL.
+    """
+    return f"{POKEAPI_URL}{resource}?limit={LIST_LIMITS[resource]}"
+
+# ETag/Last-Modified of every resource fetched during this build, keyed by URL.
+response_validators = {}
+
+# Checkpoint journal of the build in progress (set by compile_pokemon_database).
+journal = None
+
+# FetchMetrics of the build in progress, or None when instrumentation is off.
+metrics = None
+
+def measure_stage(name: str):
+    """
+    Times a build stage in the metrics report. The yielded dict takes the
+    number of records produced under "records"; without metrics it is a
+    throwaway dict.
+    """
+    return metrics.stage(name) if metrics is not None else nullcontext({})
+
 def fetch_data(url: str) -> dict:
     """
     Fetches JSON data from a given API URL with error handling and caching.
@@ -18,72 +59,229 @@ def fetch_data(url: str) -> dict:
     :param url: The API endpoint URL.
     :return: Parsed JSON data (as a dictionary) or None if request fails.
     """
+    start = time.perf_counter() if metrics is not None else None
     try:
         response = session.get(url, timeout=10)
+        if metrics is not None:
+            metrics.record_response(url, time.perf_counter() - start, response)
         if response.status_code == 200:
-            # Optionally, you can print if the response was loaded from cache:
-            # print(f"Cache hit for {url}: {getattr(response, 'from_cache', False)}")
+            response_validators[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
             return response.json()
         else:
             print(f"Error: Failed to fetch {url} (Status Code: {response.status_code})")
             return None
     except requests.exceptions.RequestException as e:
+        if metrics is not None:
+            metrics.record_response(url, time.perf_counter() - start)
         print(f"Request failed for {url}: {e}")
         return None
 
-def fetch_pokemon_variants(varieties: list) -> list:
+class ResourceMemo:
     """
-    Fetches variant-specific Pokémon data such as types, stats, and abilities.
-    
-    :param varieties: List of variant dictionaries from species data.
-    :return: List of dictionaries with variant details.
+    In-process memo of already-transformed PokeAPI resources, keyed by URL.
+
+    Every fetch_* function resolves its detail resources through the shared
+    `memo` instance, so an ability or evolution chain that is referenced many
+    times is downloaded, parsed and transformed exactly once per build.
+    Failed fetches are not memoized and will be retried on the next request.
+
+    The memo also remembers which resources each entry was built from, so
+    the checkpoint journal can store their validators.
     """
-    variants = []
-    for variant in varieties:
-        variant_data = fetch_data(variant["pokemon"]["url"])
-        if not variant_data:
-            continue
 
-        variant_entry = {
-            "name": variant_data["name"],
-            "types": [t["type"]["name"] for t in variant_data["types"]],
-            "base_stats": {stat["stat"]["name"]: stat["base_stat"] for stat in variant_data["stats"]},
-            "abilities": fetch_abilities(variant_data["abilities"]),
-            "image_url": variant_data["sprites"]["other"]["official-artwork"]["front_default"],
+    def __init__(self):
+        self.results = {}
+        self.dependencies = {}
+        self.hits = 0
+        self.misses = 0
+        self._recorders = []
+
+    @contextmanager
+    def record_dependencies(self):
+        """
+        Collects the URLs of every resource resolved inside the block,
+        including the resources memoized entries were originally built from.
+
+        :return: The set the URLs are collected into.
+        """
+        urls = set()
+        self._recorders.append(urls)
+        try:
+            yield urls
+        finally:
+            self._recorders.pop()
+
+    def _record(self, urls):
+        for recorder in self._recorders:
+            recorder.update(urls)
+
+    def resolve(self, url: str, transform):
+        """
+        Returns the transformed resource at `url`, fetching it on first use.
+
+        :param url: The API endpoint URL.
+        :param transform: Function turning the parsed JSON into the stored entry.
+        :return: The transformed entry, or None if the request failed.
+        """
+        if url in self.results:
+            self.hits += 1
+            self._record(self.dependencies[url])
+            return self.results[url]
+
+        self.misses += 1
+        with self.record_dependencies() as dependencies:
+            dependencies.add(url)
+            data = fetch_data(url)
+            result = transform(data) if data else None
+        self._record(dependencies)
+        if result is None:
+            return None
+        self.results[url] = result
+        self.dependencies[url] = dependencies
+        return result
+
+    def stats(self) -> dict:
+        """
+        :return: Hit/miss counters and the hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
         }
-        variants.append(variant_entry)
-    return variants
 
-def fetch_evolution_chain(url: str) -> list:
+    def clear(self):
+        """Drops every memoized entry and resets the counters."""
+        self.results.clear()
+        self.dependencies.clear()
+        self.hits = 0
+        self.misses = 0
+
+memo = ResourceMemo()
+
+def english_entry(entries: list, field: str) -> str:
     """
-    Retrieves the evolution chain including requirements for each stage.
-    
-    :param url: URL of the evolution chain.
-    :return: A list of evolution stages.
+    Picks the English text out of a list of localized PokeAPI entries.
+
+    :param entries: Localized entries (effect_entries, flavor_text_entries, ...).
+    :param field: Key holding the text in each entry.
+    :return: The English text, or a placeholder if there is none.
     """
-    chain_data = fetch_data(url)
-    if not chain_data:
-        return []
+    return next(
+        (entry[field] for entry in entries if entry["language"]["name"] == "en"),
+        "No description available"
+    )
+
+def build_variant(variant_data: dict) -> dict:
+    """Transforms a /pokemon/ resource into a variant entry."""
+    return {
+        "name": variant_data["name"],
+        "types": [t["type"]["name"] for t in variant_data["types"]],
+        "base_stats": {stat["stat"]["name"]: stat["base_stat"] for stat in variant_data["stats"]},
+        "abilities": fetch_abilities(variant_data["abilities"]),
+        "image_url": variant_data["sprites"]["other"]["official-artwork"]["front_default"],
+    }
 
+def build_evolution_chain(chain_data: dict) -> list:
+    """
+    Flattens an /evolution-chain/ resource into a list of stages. Each stage
+    names the stage it evolves from, so branches survive the flattening.
+    """
     evolution_chain = []
 
-    def extract_evolution(evo_data: dict):
+    def extract_evolution(evo_data: dict, evolves_from: str = None):
         """Recursively extracts evolution details."""
         species_name = evo_data["species"]["name"]
         evolves_to = evo_data.get("evolves_to", [])
 
         evolution_entry = {
             "name": species_name,
+            "evolves_from": evolves_from,
             "evolution_details": evo_data.get("evolution_details", [])
         }
         evolution_chain.append(evolution_entry)
 
         for next_evo in evolves_to:
-            extract_evolution(next_evo)
+            extract_evolution(next_evo, species_name)
 
     extract_evolution(chain_data["chain"])
     return evolution_chain
 
+def resource_id(url: str) -> int:
+    """Returns the numeric ID at the end of a PokeAPI resource URL."""
+    return int(url.rstrip("/").rsplit("/", 1)[1])
+
+def build_ability(ability_data: dict) -> dict:
+    """Transforms an /ability/ resource into an ability entry."""
+    return {
+        "name": ability_data["name"],
+        "description": english_entry(ability_data.get("effect_entries", []), "effect")
+    }
+
+def build_species(species_data: dict) -> dict:
+    """Transforms a /pokemon-species/ resource into a Pokémon entry."""
+    return {
+        "dex_number": species_data["id"],
+        "name": species_data["name"],
+        "variants": fetch_pokemon_variants(species_data["varieties"]),
+        "evolution_chain": fetch_evolution_chain(species_data["evolution_chain"]["url"]),
+        "evolution_chain_id": resource_id(species_data["evolution_chain"]["url"]),
+    }
+
+def build_item(item_details: dict) -> dict:
+    """Transforms an /item/ resource into an item entry."""
+    return {
+        "name": item_details["name"],
+        "description": english_entry(item_details.get("flavor_text_entries", []), "text")
+    }
+
+def build_move(move_details: dict) -> dict:
+    """Transforms a /move/ resource into a move entry."""
+    return {
+        "name": move_details["name"],
+        "description": english_entry(move_details.get("effect_entries", []), "effect"),
+        "type": move_details["type"]["name"] if move_details.get("type") else None,
+        "damage_class": move_details["damage_class"]["name"] if move_details.get("damage_class") else None,
+        "method": [pokemon["name"] for pokemon in move_details.get("learned_by_pokemon", [])]
+    }
+
+def build_nature(nature_details: dict) -> dict:
+    """Transforms a /nature/ resource into a nature entry."""
+    return {
+        "name": nature_details["name"],
+        "increased_stat": nature_details["increased_stat"]["name"] if nature_details.get("increased_stat") else None,
+        "decreased_stat": nature_details["decreased_stat"]["name"] if nature_details.get("decreased_stat") else None
+    }
+
+def fetch_pokemon_variants(varieties: list) -> list:
+    """
+    Fetches variant-specific Pokémon data such as types, stats, and abilities.
+    
+    :param varieties: List of variant dictionaries from species data.
+    :return: List of dictionaries with variant details.
+    """
+    variants = []
+    for variant in varieties:
+        variant_entry = memo.resolve(variant["pokemon"]["url"], build_variant)
+        if not variant_entry:
+            continue
+        variants.append(variant_entry)
+    return variants
+
+def fetch_evolution_chain(url: str) -> list:
+    """
+    Retrieves the evolution chain including requirements for each stage.
+    The chain is built once and shared by every species in it.
+    
+    :param url: URL of the evolution chain.
+    :return: A list of evolution stages.
+    """
+    return memo.resolve(url, build_evolution_chain) or []
+
 def fetch_abilities(abilities: list) -> list:
     """
     Fetches detailed ability descriptions.
@@ -93,48 +291,104 @@ def fetch_abilities(abilities: list) -> list:
     """
     ability_list = []
     for ability in abilities:
-        ability_data = fetch_data(ability["ability"]["url"])
-        if not ability_data:
+        ability_entry = memo.resolve(ability["ability"]["url"], build_ability)
+        if not ability_entry:
             continue
-
-        description = next(
-            (entry["effect"] for entry in ability_data.get("effect_entries", []) if entry["language"]["name"] == "en"),
-            "No description available"
-        )
-
-        ability_list.append({
-            "name": ability_data["name"],
-            "description": description
-        })
+        ability_list.append(ability_entry)
 
     return ability_list
 
-def fetch_all_pokemon() -> list:
+def fetch_resource_list(resource: str, transform, desc: str) -> list:
     """
-    Fetches all Pokémon species with their National Dex numbers and variants.
-    
-    :return: List of Pokémon species data.
+    Lists every resource of an endpoint and transforms each one.
+
+    :param resource: Endpoint name (a key of LIST_LIMITS).
+    :param transform: Function turning a parsed resource into its entry.
+    :param desc: Progress bar label.
+    :return: List of transformed entries, skipping failed fetches.
     """
-    url = f"{POKEAPI_URL}pokemon-species?limit=10000"
-    data = fetch_data(url)
+    with measure_stage(resource) as stage:
+        entries = _fetch_resource_list(resource, transform, desc)
+        stage["records"] = len(entries)
+    return entries
+
+def _fetch_resource_list(resource: str, transform, desc: str) -> list:
+    data = fetch_data(list_url(resource))
     if not data:
         return []
 
-    pokemon_list = []
-    for species in tqdm(data['results'], desc="Fetching Pokémon Species"):
-        species_data = fetch_data(species['url'])
-        if not species_data:
-            continue
+    entries = []
+    bar = tqdm(data["results"], desc=desc)
+    for result in bar:
+        if metrics is not None:
+            metrics.update_progress(bar)
+        url = result["url"]
+        entry = journal.reuse(resource, url) if journal else None
+        if entry is None:
+            with memo.record_dependencies() as dependencies:
+                entry = memo.resolve(url, transform)
+            if not entry:
+                continue
+            if journal:
+                validators = {dep: response_validators.get(dep, {}) for dep in sorted(dependencies)}
+                journal.commit(resource, url, entry, validators)
+        entries.append(entry)
+
+    return entries
+
+# Results of resource_unchanged for this build, keyed by URL.
+_revalidated = {}
+
+def resource_unchanged(url: str, validator: dict) -> bool:
+    """
+    Asks the server whether a resource changed since it was journaled, using
+    a conditional HEAD request that bypasses the response cache. Changed
+    resources are evicted from the cache so they are downloaded again.
 
-        pokemon_entry = {
-            "dex_number": species_data["id"],
-            "name": species_data["name"],
-            "variants": fetch_pokemon_variants(species_data["varieties"]),
-            "evolution_chain": fetch_evolution_chain(species_data["evolution_chain"]["url"]),
-        }
-        pokemon_list.append(pokemon_entry)
+    :param url: The resource URL.
+    :param validator: The stored {"etag", "last_modified"} of the resource.
+    :return: True if the server confirms the resource is unchanged.
+    """
+    if url in _revalidated:
+        return _revalidated[url]
+
+    headers = {}
+    if validator.get("etag"):
+        headers["If-None-Match"] = validator["etag"]
+    if validator.get("last_modified"):
+        headers["If-Modified-Since"] = validator["last_modified"]
+
+    cached = isinstance(session, requests_cache.CachedSession)
+    unchanged = False
+    if headers:
+        start = time.perf_counter() if metrics is not None else None
+        try:
+            # A replay session has no cache to bypass.
+            with session.cache_disabled() if cached else nullcontext():
+                response = session.head(url, headers=headers, timeout=10)
+            if metrics is not None:
+                metrics.record_response(url, time.perf_counter() - start, response)
+            etag = response.headers.get("ETag")
+            unchanged = response.status_code == 304 or (
+                response.status_code == 200 and etag is not None and etag == validator.get("etag")
+            )
+        except requests.exceptions.RequestException as e:
+            if metrics is not None:
+                metrics.record_response(url, time.perf_counter() - start)
+            print(f"Revalidation failed for {url}: {e}")
+
+    if not unchanged and cached:
+        session.cache.delete(urls=[url])
+    _revalidated[url] = unchanged
+    return unchanged
 
-    return pokemon_list
+def fetch_all_pokemon() -> list:
+    """
+    Fetches all Pokémon species with their National Dex numbers and variants.
+    
+    :return: List of Pokémon species data.
+    """
+    return fetch_resource_list("pokemon-species", build_species, "Fetching Pokémon Species")
 
 def fetch_all_abilities() -> list:
     """
@@ -142,28 +396,7 @@ def fetch_all_abilities() -> list:
     
     :return: List of abilities data.
     """
-    url = f"{POKEAPI_URL}ability?limit=1000"
-    data = fetch_data(url)
-    if not data:
-        return []
-
-    abilities = []
-    for ability in tqdm(data["results"], desc="Fetching Abilities"):
-        ability_details = fetch_data(ability["url"])
-        if not ability_details:
-            continue
-
-        description = next(
-            (entry["effect"] for entry in ability_details.get("effect_entries", []) if entry["language"]["name"] == "en"),
-            "No description available"
-        )
-
-        abilities.append({
-            "name": ability_details["name"],
-            "description": description
-        })
-
-    return abilities
+    return fetch_resource_list("ability", build_ability, "Fetching Abilities")
 
 def fetch_all_items() -> list:
     """
@@ -171,28 +404,7 @@ def fetch_all_items() -> list:
     
     :return: List of items data.
     """
-    url = f"{POKEAPI_URL}item?limit=1000"
-    data = fetch_data(url)
-    if not data:
-        return []
-
-    items = []
-    for item in tqdm(data["results"], desc="Fetching Items"):
-        item_details = fetch_data(item["url"])
-        if not item_details:
-            continue
-
-        description = next(
-            (entry["text"] for entry in item_details.get("flavor_text_entries", []) if entry["language"]["name"] == "en"),
-            "No description available"
-        )
-
-        items.append({
-            "name": item_details["name"],
-            "description": description
-        })
-
-    return items
+    return fetch_resource_list("item", build_item, "Fetching Items")
 
 def fetch_all_moves() -> list:
     """
@@ -200,29 +412,7 @@ def fetch_all_moves() -> list:
     
     :return: List of moves data.
     """
-    url = f"{POKEAPI_URL}move?limit=1000"
-    data = fetch_data(url)
-    if not data:
-        return []
-
-    moves = []
-    for move in tqdm(data["results"], desc="Fetching Moves"):
-        move_details = fetch_data(move["url"])
-        if not move_details:
-            continue
-
-        description = next(
-            (entry["effect"] for entry in move_details.get("effect_entries", []) if entry["language"]["name"] == "en"),
-            "No description available"
-        )
-
-        moves.append({
-            "name": move_details["name"],
-            "description": description,
-            "method": [pokemon["name"] for pokemon in move_details.get("learned_by_pokemon", [])]
-        })
-
-    return moves
+    return fetch_resource_list("move", build_move, "Fetching Moves")
 
 def fetch_all_natures() -> list:
     """
@@ -230,29 +420,40 @@ def fetch_all_natures() -> list:
     
     :return: List of natures data.
     """
-    url = f"{POKEAPI_URL}nature?limit=100"
-    data = fetch_data(url)
-    if not data:
-        return []
+    return fetch_resource_list("nature", build_nature, "Fetching Natures")
 
-    natures = []
-    for nature in tqdm(data["results"], desc="Fetching Natures"):
-        nature_details = fetch_data(nature["url"])
-        if not nature_details:
-            continue
-
-        natures.append({
-            "name": nature_details["name"],
-            "increased_stat": nature_details["increased_stat"]["name"] if nature_details.get("increased_stat") else None,
-            "decreased_stat": nature_details["decreased_stat"]["name"] if nature_details.get("decreased_stat") else None
-        })
-
-    return natures
+def journal_path_for(output_path: str) -> str:
+    """
+    :param output_path: Path of the compiled database.
+    :return: Default checkpoint journal path next to it.
+    """
+    root, _ = os.path.splitext(output_path)
+    return f"{root}.journal.jsonl"
 
-def compile_pokemon_database():
+def compile_pokemon_database(output_path: str = "pokemon_database.json", journal_path: str = None,
+                             resume: bool = False, only_changed: bool = False, fetch_metrics: FetchMetrics = None):
     """
     Compiles the complete Pokémon database and saves it as a JSON file.
+
+    Every finished record is checkpointed to a JSON Lines journal. With
+    `resume`, records already in the journal are reused as-is; with
+    `only_changed`, they are reused only if the server confirms (via ETag or
+    Last-Modified) that none of the resources they were built from changed.
+
+    :param output_path: Where to write the compiled database.
+    :param journal_path: Checkpoint journal location (defaults to next to the output).
+    :param resume: Reuse records from an interrupted build.
+    :param only_changed: Reuse records whose upstream resources are unchanged.
+    :param fetch_metrics: Optional FetchMetrics to record the build in.
     """
+    global journal, metrics
+    metrics = fetch_metrics
+    journal = BuildJournal(
+        journal_path or journal_path_for(output_path),
+        reuse=resume or only_changed,
+        check_unchanged=resource_unchanged if only_changed else None,
+    )
+
     database = {
         "pokemon": fetch_all_pokemon(),
         "abilities": fetch_all_abilities(),
@@ -261,10 +462,73 @@ def compile_pokemon_database():
         "natures": fetch_all_natures(),
     }
 
-    with open("pokemon_database.json", "w", encoding="utf-8") as f:
+    with open(output_path, "w", encoding="utf-8") as f:
         json.dump(database, f, indent=4, ensure_ascii=False)
 
-    print("Database successfully compiled and saved as 'pokemon_database.json'.")
+    journal.compact()
+    print(f"Journal: {journal.reused} records reused, {journal.built} rebuilt.")
+    stats = memo.stats()
+    if metrics is not None:
+        metrics.extra["journal"] = {"reused": journal.reused, "built": journal.built}
+        metrics.extra["memo"] = stats
+        totals = metrics.totals()
+        print(f"Requests: {totals['requests']} ({totals['cache_hit_ratio']:.0%} from cache), "
+              f"{totals['bytes_transferred'] / 2 ** 20:.1f} MB transferred, {totals['retries']} retries.")
+    journal = None
+
+    print(f"Resource memo: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_ratio']:.0%} hit ratio).")
+    print(f"Database successfully compiled and saved as '{output_path}'.")
+
+def main():
+    global POKEAPI_URL, session
+    parser = argparse.ArgumentParser(description="Compile the Pokémon database from PokeAPI.")
+    parser.add_argument("--output", default="pokemon_database.json", help="Path of the compiled database.")
+    parser.add_argument("--base-url", default=POKEAPI_URL, help="PokeAPI base URL (e.g. a local fixture server).")
+    parser.add_argument("--concurrent", action="store_true", help="Warm the cache with the concurrent crawler first.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum number of requests in flight.")
+    parser.add_argument("--rate", type=float, default=20.0, help="Maximum requests per second per host.")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx responses and connection errors.")
+    parser.add_argument("--journal", help="Checkpoint journal path (defaults to next to the output).")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted build from its journal.")
+    parser.add_argument("--only-changed", action="store_true", help="Rebuild only records whose upstream resources changed.")
+    parser.add_argument("--metrics", help="Write a JSON report of request latencies, cache hits and stage throughput here.")
+    parser.add_argument("--progress", action="store_true", help="Show live request rate and cache hit ratio on the progress bars.")
+    parser.add_argument("--replay", help="Serve every request from this replay pack (see replay_pack.py), without network access.")
+    args = parser.parse_args()
+
+    fetch_metrics = FetchMetrics(live=args.progress) if args.metrics or args.progress else None
+
+    POKEAPI_URL = args.base_url if args.base_url.endswith("/") else args.base_url + "/"
+
+    if args.replay:
+        from replay_pack import ReplayPack, ReplaySession
+        session = ReplaySession(ReplayPack(args.replay))
+        if args.concurrent:
+            print("Replaying sequentially: the concurrent crawler only warms the network cache.")
+            args.concurrent = False
+
+    if args.concurrent:
+        from concurrent_crawler import compile_pokemon_database_concurrent
+        compile_pokemon_database_concurrent(
+            args.output,
+            base_url=POKEAPI_URL,
+            journal_path=args.journal,
+            resume=args.resume,
+            only_changed=args.only_changed,
+            concurrency=args.concurrency,
+            requests_per_second=args.rate,
+            max_retries=args.max_retries,
+            fetch_metrics=fetch_metrics,
+        )
+    else:
+        compile_pokemon_database(args.output, args.journal, args.resume, args.only_changed, fetch_metrics)
+
+    if args.replay:
+        print(f"Replay: {session.served} responses served from '{args.replay}', {len(session.missing)} missing.")
+
+    if args.metrics:
+        fetch_metrics.write_report(args.metrics)
+        print(f"Fetch metrics saved as '{args.metrics}'.")
 
 if __name__ == "__main__":
-    compile_pokemon_database()
+    main()
@@ -0,0 +1,206 @@
+"""
+Instrumentation of the fetch pipeline.
+
+database_fetcher.metrics is None unless the build is started with
+--metrics (or --progress). Every hook in the fetcher and the concurrent
+crawler is guarded by an `if metrics is not None` check, so a build without
+them pays one comparison per request and nothing else.
+
+When enabled, FetchMetrics collects per endpoint (e.g. "pokemon-species",
+"ability", "pokemon-species list"):
+
+    requests, cache hits and misses, errors, retries,
+    bytes transferred (network only) and bytes served from the cache,
+    a latency histogram with fixed millisecond buckets
+
+plus the duration and records per second of every build stage, and writes
+them as one JSON report at the end of the build.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Upper bounds (in ms) of the latency histogram buckets; slower requests go to an overflow bucket.
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+def endpoint_of(url: str) -> str:
+    """
+    Returns the endpoint type of a PokeAPI URL: the path segment after the
+    API version, with " list" appended for list requests.
+
+    :param url: e.g. "https://pokeapi.co/api/v2/ability/65/".
+    :return: e.g. "ability".
+    """
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    for i, segment in enumerate(segments[:-1]):
+        if segment.startswith("v") and segment[1:].isdigit():
+            endpoint = segments[i + 1]
+            return endpoint if len(segments) > i + 2 else f"{endpoint} list"
+    return segments[0] if segments else urlsplit(url).netloc
+
+class LatencyHistogram:
+    """Request latencies counted into LATENCY_BUCKETS_MS."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+        self.counts[bucket] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, share: float):
+        """Returns the upper bound of the bucket holding the given share of requests (None for overflow)."""
+        count = sum(self.counts)
+        if not count:
+            return None
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= share * count:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def to_dict(self) -> dict:
+        count = sum(self.counts)
+        return {
+            "buckets_ms": [*LATENCY_BUCKETS_MS, None],
+            "counts": self.counts,
+            "mean_ms": self.total_ms / count if count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max_ms,
+        }
+
+class FetchMetrics:
+    """
+    Thread-safe counters for one build, shared by the sequential fetcher and
+    the concurrent crawler's workers.
+
+    :param live: Whether progress bars should show the live figures of progress().
+    """
+
+    def __init__(self, live: bool = False):
+        self.live = live
+        self.started = time.time()
+        self.endpoints = {}
+        self.stages = []
+        self.extra = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, url: str) -> dict:
+        name = endpoint_of(url)
+        if name not in self.endpoints:
+            self.endpoints[name] = {
+                "requests": 0, "cache_hits": 0, "cache_misses": 0, "errors": 0, "retries": 0,
+                "bytes_transferred": 0, "bytes_from_cache": 0, "latency": LatencyHistogram(),
+            }
+        return self.endpoints[name]
+
+    def record_request(self, url: str, seconds: float, ok: bool, from_cache: bool = False, size: int = 0):
+        """
+        Records one HTTP request (or response cache lookup).
+
+        :param url: The requested URL.
+        :param seconds: Wall time of the request.
+        :param ok: Whether it succeeded.
+        :param from_cache: Whether requests_cache answered it.
+        :param size: Body size in bytes.
+        """
+        with self._lock:
+            endpoint = self._endpoint(url)
+            endpoint["requests"] += 1
+            endpoint["latency"].add(seconds * 1000)
+            if not ok:
+                endpoint["errors"] += 1
+            if from_cache:
+                endpoint["cache_hits"] += 1
+                endpoint["bytes_from_cache"] += size
+            else:
+                endpoint["cache_misses"] += 1
+                endpoint["bytes_transferred"] += size
+
+    def record_response(self, url: str, seconds: float, response=None):
+        """
+        Records a requests (or requests_cache) response; None records a
+        request that raised.
+        """
+        if response is None:
+            self.record_request(url, seconds, False)
+        else:
+            self.record_request(url, seconds, response.ok, getattr(response, "from_cache", False), len(response.content))
+
+    def record_retry(self, url: str):
+        """Records that a request to `url` is about to be retried."""
+        with self._lock:
+            self._endpoint(url)["retries"] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times a build stage. Set the "records" key of the yielded dict to the
+        number of records it produced.
+        """
+        stage = {"name": name, "records": 0}
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage["seconds"] = time.perf_counter() - start
+            stage["records_per_second"] = stage["records"] / stage["seconds"] if stage["seconds"] else 0.0
+            with self._lock:
+                self.stages.append(stage)
+
+    def totals(self) -> dict:
+        """Returns the counters summed over every endpoint."""
+        with self._lock:
+            endpoints = list(self.endpoints.values())
+        totals = {key: sum(e[key] for e in endpoints)
+                  for key in ("requests", "cache_hits", "cache_misses", "errors", "retries", "bytes_transferred", "bytes_from_cache")}
+        lookups = totals["cache_hits"] + totals["cache_misses"]
+        totals["cache_hit_ratio"] = totals["cache_hits"] / lookups if lookups else 0.0
+        return totals
+
+    def progress(self) -> dict:
+        """Short live figures for a progress bar postfix."""
+        totals = self.totals()
+        elapsed = time.time() - self.started
+        return {
+            "req/s": f"{totals['requests'] / elapsed:.1f}" if elapsed else "0",
+            "hit": f"{totals['cache_hit_ratio']:.0%}",
+            "MB": f"{totals['bytes_transferred'] / 2 ** 20:.1f}",
+            "retries": totals["retries"],
+        }
+
+    def update_progress(self, bar, every: int = 25):
+        """Shows progress() on a tqdm bar, refreshing the figures every `every` items."""
+        if self.live and bar.n % every == 0:
+            bar.set_postfix(self.progress(), refresh=False)
+
+    def report(self) -> dict:
+        """Returns the whole report as a JSON-serializable dict."""
+        totals = self.totals()
+        with self._lock:
+            endpoints = {
+                name: {**{k: v for k, v in e.items() if k != "latency"}, "latency": e["latency"].to_dict()}
+                for name, e in sorted(self.endpoints.items())
+            }
+            stages = list(self.stages)
+        return {
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "totals": totals,
+            "endpoints": endpoints,
+            "stages": stages,
+            **self.extra,
+        }
+
+    def write_report(self, path: str):
+        """Writes report() to `path` as indented JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
@@ -0,0 +1,182 @@
+"""
+Local stand-in for PokeAPI that serves recorded responses from a directory.
+
+Record fixtures from the requests_cache database of a previous build:
+
+    python fixture_server.py record --out fixtures
+
+Then serve them and point the fetcher at the server:
+
+    python fixture_server.py serve --fixtures fixtures --port 8000
+    python database_fetcher.py --base-url http://127.0.0.1:8000/api/v2/ --output sequential.json
+    python database_fetcher.py --concurrent --base-url http://127.0.0.1:8000/api/v2/ --output concurrent.json
+
+URLs inside the recorded bodies are rewritten to point back at the server, and
+`--fail-rate` makes the server answer a share of requests with 429/503 so the
+crawler's retry path can be exercised. Responses carry an ETag derived from
+the fixture contents and conditional requests are answered with 304, so
+editing a fixture file simulates an upstream change for `--only-changed`.
+
+Requests without a recorded fixture are served as plain files from the same
+directory tree (`fixtures/PokeAPI/sprites/...png`), which stands in for the
+sprite host when testing sprite_cache.py with `--origin`.
+"""
+import argparse
+import hashlib
+import mimetypes
+import os
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+UPSTREAM_ORIGIN = "https://pokeapi.co"
+
+
+def fixture_name(path_and_query: str) -> str:
+    """
+    Maps a request path (including its query string) to a flat fixture file name.
+
+    :param path_and_query: e.g. "/api/v2/pokemon-species?limit=10000".
+    :return: The fixture file name.
+    """
+    return quote(path_and_query, safe="") + ".json"
+
+
+def record_fixtures(out_dir: str, cache_name: str = "pokeapi_cache"):
+    """
+    Dumps every cached PokeAPI response into `out_dir`.
+
+    :param out_dir: Directory to write fixtures to.
+    :param cache_name: Name of the requests_cache SQLite database.
+    """
+    import requests_cache
+
+    os.makedirs(out_dir, exist_ok=True)
+    session = requests_cache.CachedSession(cache_name, backend="sqlite")
+    count = 0
+    for response in session.cache.responses.values():
+        if response.status_code != 200:
+            continue
+        parts = urlsplit(response.url)
+        path_and_query = parts.path + (f"?{parts.query}" if parts.query else "")
+        with open(os.path.join(out_dir, fixture_name(path_and_query)), "wb") as f:
+            f.write(response.content)
+        count += 1
+    print(f"Recorded {count} fixtures into '{out_dir}'.")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    fixtures_dir = "fixtures"
+    fail_rate = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def _respond(self, include_body: bool):
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._send(random.choice([429, 503]), b"", {"Retry-After": "0"}, include_body)
+            return
+
+        path = os.path.join(self.fixtures_dir, fixture_name(self.path))
+        content_type = "application/json"
+        if not os.path.exists(path):
+            path = self._static_path()
+            if path is None:
+                self._send(404, b'{"detail": "Not found."}', None, include_body)
+                return
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        with open(path, "rb") as f:
+            body = f.read()
+        if content_type == "application/json":
+            origin = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+            body = body.replace(UPSTREAM_ORIGIN.encode(), origin.encode())
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", {"ETag": etag}, include_body=False)
+            return
+        self._send(200, body, {"ETag": etag, "Content-Type": content_type}, include_body)
+
+    def _static_path(self):
+        """Returns the plain file under the fixtures directory matching the request path, if any."""
+        root = os.path.abspath(self.fixtures_dir)
+        path = os.path.abspath(os.path.join(root, urlsplit(self.path).path.lstrip("/")))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def _send(self, status: int, body: bytes, headers: dict = None, include_body: bool = True):
+        headers = dict(headers or {})
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+        self.send_header("Content-Length", str(len(body) if status != 304 else 0))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(fixtures_dir: str, host: str = "127.0.0.1", port: int = 0, fail_rate: float = 0.0):
+    """
+    Creates (without starting) a threaded server for recorded fixtures.
+
+    :param fixtures_dir: Directory produced by record_fixtures.
+    :param host: Interface to bind.
+    :param port: Port to bind (0 picks a free one).
+    :param fail_rate: Share of requests answered with a retryable error.
+    :return: The ThreadingHTTPServer; call serve_forever() to start it.
+    """
+    handler = type("Handler", (FixtureHandler,), {"fixtures_dir": fixtures_dir, "fail_rate": fail_rate})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_fixtures(fixtures_dir: str, host: str = "127.0.0.1", port: int = 8000, fail_rate: float = 0.0):
+    """
+    Serves recorded fixtures until interrupted.
+
+    :param fixtures_dir: Directory produced by record_fixtures.
+    :param host: Interface to bind.
+    :param port: Port to bind (0 picks a free one).
+    :param fail_rate: Share of requests answered with a retryable error.
+    """
+    server = make_server(fixtures_dir, host, port, fail_rate)
+    print(f"Serving '{fixtures_dir}' on http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and serve PokeAPI fixtures.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Dump the response cache into fixture files.")
+    record.add_argument("--out", default="fixtures")
+    record.add_argument("--cache", default="pokeapi_cache")
+
+    serve = subparsers.add_parser("serve", help="Serve fixture files over HTTP.")
+    serve.add_argument("--fixtures", default="fixtures")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--fail-rate", type=float, default=0.0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_fixtures(args.out, args.cache)
+    else:
+        serve_fixtures(args.fixtures, args.host, args.port, args.fail_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,347 @@
+import argparse
 import json
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+# The normalized set schema and the records the app reads live next to the app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import CompetitiveSet, Vocabulary
 
 # Allowed format/tier keys (all lower-case)
 ALLOWED_FORMATS = {"anythinggoes", "ubers", "ubersuu", "ou", "uu", "ru", "nu", "pu", "zu", "nfe", "lc"}
 
-def merge_sets_into_database(database, gen9_data):
+# Characters read from the input per refill in streaming mode.
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Characters that may follow a complete JSON value.
+VALUE_DELIMITERS = ",]}: \t\r\n"
+
+# Names of every merged set, interned so the merged database holds each move,
+# item, ability, nature and Tera Type string once.
+set_vocabulary = Vocabulary()
+
+def record_sets(sets, vocabulary=set_vocabulary):
+    """
+    Returns a variant's sets ({tier: {set name: set}}) as read back by the
+    app's CompetitiveSet records: normalized, with the HTML pre-rendered and
+    names shared through `vocabulary`.
+    """
+    return {
+        tier: {name: CompetitiveSet.from_dict(name, set_data, vocabulary).to_dict() for name, set_data in tier_sets.items()}
+        for tier, tier_sets in sets.items()
+    }
+
+def name_key(name):
+    """
+    Returns the key set files and variants are joined on: the name in
+    lowercase ASCII letters and digits only, so "Venusaur-Mega",
+    "venusaur-mega" and "Venusaur Mega" all match, as do "Mr. Mime" and
+    "mr-mime" or "Flabébé" and "flabebe".
+    """
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]", "", ascii_name.lower())
+
+def select_sets(set_data, allowed_formats=ALLOWED_FORMATS):
+    """
+    Keeps the allowed formats of a decoded set file ({Pokémon name: {format:
+    {set name: set}}}), with the sets in record form (see record_sets).
+    Names left without any allowed format are dropped.
+    """
+    selected = {}
+    for pokemon_name, formats in set_data.items():
+        allowed_sets = {format_key: sets for format_key, sets in formats.items() if format_key.lower() in allowed_formats}
+        if allowed_sets:
+            selected[pokemon_name] = record_sets(allowed_sets)
+    return selected
+
+def parse_set_source(path, allowed_formats=ALLOWED_FORMATS):
+    """Reads one set file and returns select_sets of it; runs in the parser processes."""
+    with open(path, "r", encoding="utf-8") as f:
+        return select_sets(json.load(f), allowed_formats)
+
+class SetIndex:
+    """
+    Precompiled join of every set source: normalized name (see name_key) ->
+    the sets of all sources for that name. Sources are added in order, and
+    a later source's sets replace same-named sets of the same format.
+
+    Built once before the merge, so the merge is one dict lookup per variant
+    no matter how many sources there are. Source keys that no variant looks
+    up are reported by unmatched().
+    """
+
+    def __init__(self):
+        self.sets = {}
+        self.keys = {}
+        self.matched = set()
+
+    @classmethod
+    def from_data(cls, sources, allowed_formats=ALLOWED_FORMATS):
+        """
+        Builds the index in this process from decoded set files.
+
+        :param sources: {source name: decoded set file}, in merge order.
+        """
+        index = cls()
+        for source, set_data in sources.items():
+            index.add(source, select_sets(set_data, allowed_formats))
+        return index
+
+    def add(self, source, selected):
+        """Adds the output of select_sets for one source."""
+        for pokemon_name, formats in selected.items():
+            key = name_key(pokemon_name)
+            merged = self.sets.setdefault(key, {})
+            for format_key, sets in formats.items():
+                merged[format_key] = {**merged.get(format_key, {}), **sets}
+            self.keys.setdefault(key, []).append((source, pokemon_name))
+
+    def lookup(self, name):
+        """Returns {format: {set name: set}} for a variant name, or None."""
+        key = name_key(name)
+        sets = self.sets.get(key)
+        if sets is not None:
+            self.matched.add(key)
+        return sets
+
+    def unmatched(self):
+        """Returns {source: [keys]} of the source keys whose sets no variant received."""
+        unmatched = {}
+        for key, origins in self.keys.items():
+            if key not in self.matched:
+                for source, pokemon_name in origins:
+                    unmatched.setdefault(source, []).append(pokemon_name)
+        return unmatched
+
+def build_set_index(paths, allowed_formats=ALLOWED_FORMATS, workers=None):
+    """
+    Parses set files in a process pool, one file per task, and compiles
+    their SetIndex.
+
+    :param paths: Set files, in merge order.
+    :param allowed_formats: Lowercase format keys to keep.
+    :param workers: Parser processes; defaults to one per CPU.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        selected = [parse_set_source(path, allowed_formats) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            selected = list(pool.map(parse_set_source, paths, [allowed_formats] * len(paths)))
+    index = SetIndex()
+    for path, sets in zip(paths, selected):
+        index.add(path, sets)
+    return index
+
+def merge_sets_into_pokemon(pokemon_obj, set_index):
+    """
+    Adds the sets of `set_index` to every variant of a single Pokémon object
+    whose name matches one of its keys. A format already on the variant is
+    replaced. Sets are stored in the normalized schema of competitive_sets,
+    with their HTML pre-rendered.
+    """
+    for variant in pokemon_obj.get("variants", []):
+        sets = set_index.lookup(variant.get("name", ""))
+        if sets:
+            variant["sets"] = {**variant.get("sets", {}), **sets}
+    return pokemon_obj
+
+def merge_sets_into_database(database, set_index):
     """
-    For each Pokémon variant in the database (database["pokemon"] is a list of Pokémon objects),
-    if the variant's name (lowercase) matches a key in gen9_data (also lowercased),
-    then add a new key "sets" to that variant containing only the allowed formats/tier sets
-    from gen9_data.
+    Adds the sets of a SetIndex to every matching variant of the database
+    (database["pokemon"] is a list of Pokémon objects), in one pass.
     """
-    # Build a lookup from gen9 data using lowercased Pokémon names.
-    gen9_lookup = {pokemon_name.lower(): sets_data for pokemon_name, sets_data in gen9_data.items()}
-    
-    # Iterate over each Pokémon object in the database.
     for pokemon_obj in database.get("pokemon", []):
-        # Process each variant for this Pokémon.
-        for variant in pokemon_obj.get("variants", []):
-            variant_name = variant.get("name", "").lower()
-            if variant_name in gen9_lookup:
-                # Get all sets for this variant from gen9.json.
-                variant_gen9_sets = gen9_lookup[variant_name]
-                # Filter out only allowed formats.
-                allowed_sets = {}
-                for format_key, set_info in variant_gen9_sets.items():
-                    if format_key.lower() in ALLOWED_FORMATS:
-                        allowed_sets[format_key] = set_info
-                # If any allowed sets were found, add them to the variant under "sets".
-                if allowed_sets:
-                    if "sets" in variant:
-                        variant["sets"].update(allowed_sets)
-                    else:
-                        variant["sets"] = allowed_sets
+        merge_sets_into_pokemon(pokemon_obj, set_index)
     return database
 
+class JsonStreamReader:
+    """
+    Minimal incremental reader for a JSON document, used to walk the database
+    one top-level value (or one array element) at a time without loading the
+    whole file. Individual values are decoded with json's raw_decode.
+    """
+
+    def __init__(self, file, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, min_chars):
+        """Reads more input until `min_chars` characters are buffered past pos, or EOF."""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        while len(self.buffer) < min_chars and not self.eof:
+            chunk = self.file.read(max(self.chunk_size, min_chars - len(self.buffer)))
+            if not chunk:
+                self.eof = True
+            self.buffer += chunk
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ("" at EOF)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ""
+            self._fill(1)
+
+    def expect(self, char):
+        """Consumes the next non-whitespace character, which must be `char`."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    def read_value(self):
+        """Decodes and consumes the next complete JSON value."""
+        self.peek()
+        wanted = len(self.buffer) - self.pos
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off by the end of the buffer decodes as a shorter
+                # number, so only accept values followed by a delimiter.
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in VALUE_DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            wanted = max(wanted * 2, self.chunk_size)
+            self._fill(wanted)
+
+    def iter_array(self):
+        """Yields the elements of the array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+    def iter_object(self):
+        """
+        Yields (key, reader) for each member of the object starting at the
+        current position. The caller must consume the member's value (with
+        read_value or iter_array) before advancing to the next member.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key, self
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+def _indent_continuation(text, indent):
+    """Indents every line of `text` but the first by `indent`."""
+    return text.replace("\n", "\n" + indent)
+
+def stream_merge(database_path, set_index, output_path, pretty=True):
+    """
+    Merges the sets of a SetIndex into the database one Pokémon at a time,
+    writing each merged record out as soon as it is read. Only the index and
+    the record being processed are held in memory.
+
+    Pretty output is byte-identical to json.dump(indent=4); compact output
+    uses no whitespace at all.
+    """
+    dumps_options = {"indent": 4} if pretty else {"separators": (",", ":")}
+    newline, indent, key_separator = ("\n", "    ", ": ") if pretty else ("", "", ":")
+
+    with open(database_path, "r", encoding="utf-8") as db_file, \
+            open(output_path, "w", encoding="utf-8") as out_file:
+        reader = JsonStreamReader(db_file)
+        out_file.write("{")
+        first_key = True
+        for key, value_reader in reader.iter_object():
+            out_file.write(("" if first_key else ",") + newline + indent + json.dumps(key) + key_separator)
+            first_key = False
+
+            if value_reader.peek() != "[":
+                value = json.dumps(value_reader.read_value(), **dumps_options)
+                out_file.write(_indent_continuation(value, indent))
+                continue
+
+            first_item = True
+            for item in value_reader.iter_array():
+                if key == "pokemon":
+                    merge_sets_into_pokemon(item, set_index)
+                item_json = _indent_continuation(json.dumps(item, **dumps_options), indent * 2)
+                out_file.write(("[" if first_item else ",") + newline + indent * 2 + item_json)
+                first_item = False
+            out_file.write("[]" if first_item else newline + indent + "]")
+        out_file.write("}" if first_key else newline + "}")
+
 def main():
-    # Load the original database (expects a JSON object with key "pokemon": [ ... ])
-    with open("database.json", "r", encoding="utf-8") as db_file:
-        database = json.load(db_file)
-    
-    # Load the gen9 sets database.
-    with open("gen9.json", "r", encoding="utf-8") as gen9_file:
-        gen9_data = json.load(gen9_file)
-    
-    # Merge the allowed gen9 sets into the corresponding Pokémon variants.
-    merged_database = merge_sets_into_database(database, gen9_data)
-    
-    # Save the merged database to a new file.
-    with open("combined_database.json", "w", encoding="utf-8") as out_file:
-        json.dump(merged_database, out_file, indent=4)
-    
-    print("Merge complete. The combined database has been saved to 'combined_database.json'.")
+    parser = argparse.ArgumentParser(description="Merge competitive sets into the Pokémon database.")
+    parser.add_argument("--database", default="database.json", help="Database produced by database_fetcher.py.")
+    parser.add_argument("--gen9", default="gen9.json", help="Competitive sets to merge in.")
+    parser.add_argument("--sets", nargs="+", default=[], metavar="FILE",
+                        help="More set files in the gen9.json layout (other generations, doubles, custom tiers), "
+                             "merged after --gen9 in order.")
+    parser.add_argument("--format", action="append", default=[], dest="formats", metavar="NAME",
+                        help="Also keep this format (e.g. doublesou); repeatable.")
+    parser.add_argument("--workers", type=int, help="Processes parsing the set files (default: one per CPU).")
+    parser.add_argument("--unmatched", help="Write the set keys that matched no variant to this JSON file.")
+    parser.add_argument("--output", default="combined_database.json", help="Path of the merged database.")
+    parser.add_argument("--stream", action="store_true", help="Merge record by record with bounded memory.")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indenting it.")
+    args = parser.parse_args()
+
+    # Parse every set file and compile the name join once.
+    sources = [args.gen9] + args.sets
+    allowed_formats = ALLOWED_FORMATS | {name.lower() for name in args.formats}
+    set_index = build_set_index(sources, allowed_formats, args.workers)
+
+    if args.stream:
+        stream_merge(args.database, set_index, args.output, pretty=not args.compact)
+    else:
+        # Load the original database (expects a JSON object with key "pokemon": [ ... ])
+        with open(args.database, "r", encoding="utf-8") as db_file:
+            database = json.load(db_file)
+
+        # Merge the sets into the corresponding Pokémon variants.
+        merged_database = merge_sets_into_database(database, set_index)
+
+        # Save the merged database to a new file.
+        with open(args.output, "w", encoding="utf-8") as out_file:
+            if args.compact:
+                json.dump(merged_database, out_file, separators=(",", ":"))
+            else:
+                json.dump(merged_database, out_file, indent=4)
+
+    unmatched = set_index.unmatched()
+    unmatched_count = sum(len(keys) for keys in unmatched.values())
+    print(f"Merged sets for {len(set_index.matched)} of {len(set_index.sets)} names from {len(sources)} source(s); "
+          f"{unmatched_count} key(s) matched no variant.")
+    for source, keys in unmatched.items():
+        print(f"  {source}: {', '.join(keys[:10])}{' ...' if len(keys) > 10 else ''}")
+    if args.unmatched:
+        with open(args.unmatched, "w", encoding="utf-8") as f:
+            json.dump(unmatched, f, ensure_ascii=False, indent=4)
+    print(f"Merge complete. The combined database has been saved to '{args.output}'.")
 
 if __name__ == "__main__":
     main()
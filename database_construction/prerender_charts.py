@@ -0,0 +1,24 @@
+import argparse
+import json
+import os
+import sys
+
+# The chart builders live next to app.py, which serves the bundle.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from visualizations import RADAR_BUNDLE_PATH, prerender_radar_charts
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender the radar chart of every variant.")
+    parser.add_argument("--input", default="combined_database.json", help="Database produced by merger.py.")
+    parser.add_argument("--output", default=RADAR_BUNDLE_PATH, help="Path of the chart bundle.")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    count = prerender_radar_charts(database, args.output)
+
+    print(f"Prerendered {count} radar charts into '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Offline replay pack of the PokeAPI response cache.
+
+The requests_cache SQLite file of database_fetcher.py expires after a day and
+stores every response uncompressed, with its headers, once per cache key. A
+replay pack keeps only what a build reads, each distinct body once and
+compressed:
+
+    python replay_pack.py export --cache pokeapi_cache --out pokeapi.pack
+
+A build can then run without any network access, every request answered
+from the pack:
+
+    python database_fetcher.py --replay pokeapi.pack --output database.json
+
+or the pack can be loaded back into the response cache in one transaction,
+fresh for another expiry period:
+
+    python replay_pack.py warm --pack pokeapi.pack --cache pokeapi_cache
+
+Layout (little-endian):
+
+    b"PKVPACK1" | u32 header length | JSON header | dictionary | bodies...
+
+The JSON header maps every URL to [body id, ETag, Last-Modified] and lists
+the offset and length of each body after the dictionary. Every body is
+compressed on its own with zlib against a shared preset dictionary sampled
+from the bodies, so one response is decompressed without touching the
+others. URLs and bodies are written in URL order, so exporting the same
+responses always gives the same file.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import threading
+import zlib
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+MAGIC = b"PKVPACK1"
+# zlib only looks back 32 KiB, so a larger dictionary would not be used.
+DICTIONARY_SIZE = 32 * 1024
+# Bytes taken from each sampled body when building the dictionary.
+DICTIONARY_SAMPLE = 1024
+NOT_IN_PACK = b'{"detail": "Not in the replay pack."}'
+
+
+def path_and_query(url: str) -> str:
+    """Returns the part of a URL that identifies a resource on any host."""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def build_dictionary(bodies: list, size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Samples the start of bodies spread over the whole list into a zlib preset
+    dictionary. PokeAPI bodies of one endpoint share their keys and URL
+    prefixes, which is what the dictionary gives every body to refer back to.
+    """
+    if not bodies:
+        return b""
+    step = max(1, len(bodies) * DICTIONARY_SAMPLE // size)
+    dictionary = b"".join(body[:DICTIONARY_SAMPLE] for body in bodies[::step])
+    # zlib prefers the most recent bytes, so keep the end of the sample.
+    return dictionary[-size:]
+
+
+def write_pack(responses: dict, path: str) -> dict:
+    """
+    Writes a replay pack.
+
+    :param responses: {url: (body bytes, etag, last_modified)}.
+    :param path: Path of the pack.
+    :return: Counts and sizes: urls, bodies, raw_bytes, packed_bytes.
+    """
+    body_ids, bodies, entries = {}, [], {}
+    for url in sorted(responses):
+        body, etag, last_modified = responses[url]
+        digest = hashlib.sha256(body).digest()
+        if digest not in body_ids:
+            body_ids[digest] = len(bodies)
+            bodies.append(body)
+        entries[url] = [body_ids[digest], etag, last_modified]
+
+    dictionary = build_dictionary(bodies)
+    offsets, chunks, offset = [], [], len(dictionary)
+    for body in bodies:
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        chunk = compressor.compress(body) + compressor.flush()
+        offsets.append([offset, len(chunk)])
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    header = json.dumps({
+        "dictionary_length": len(dictionary),
+        "bodies": offsets,
+        "entries": entries,
+    }, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header + dictionary)
+        for chunk in chunks:
+            f.write(chunk)
+    return {
+        "urls": len(entries),
+        "bodies": len(bodies),
+        "raw_bytes": sum(len(body) for body, _, _ in responses.values()),
+        "packed_bytes": len(MAGIC) + 4 + len(header) + offset,
+    }
+
+
+def export_pack(cache_name: str, path: str) -> dict:
+    """
+    Exports the successful GET responses of a requests_cache SQLite database,
+    expired ones included, into a replay pack. When a URL was cached more
+    than once, the newest response is kept.
+
+    :param cache_name: Name of the requests_cache SQLite database.
+    :param path: Path of the pack.
+    :return: The counts and sizes of write_pack.
+    """
+    import requests_cache
+
+    session = requests_cache.CachedSession(cache_name, backend="sqlite")
+    newest = {}
+    for response in session.cache.responses.values():
+        if response.status_code != 200 or response.request.method != "GET":
+            continue
+        previous = newest.get(response.url)
+        if previous is None or response.created_at > previous.created_at:
+            newest[response.url] = response
+    return write_pack({
+        url: (response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        for url, response in newest.items()
+    }, path)
+
+
+class ReplayPack:
+    """
+    Reads a replay pack. The file is memory-mapped; a body is decompressed
+    each time it is requested.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' is not a replay pack.")
+        (header_length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._map[start:start + header_length])
+        self._data_start = start + header_length
+        self.dictionary = self._map[self._data_start:self._data_start + header["dictionary_length"]]
+        self.bodies = header["bodies"]
+        self.entries = header["entries"]
+        self._by_path = {path_and_query(url): url for url in self.entries}
+
+    def lookup(self, url: str):
+        """
+        Returns (body id, etag, last_modified) of a URL, matched exactly or
+        else on its path and query, or None when it is not in the pack.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            recorded = self._by_path.get(path_and_query(url))
+            entry = self.entries[recorded] if recorded is not None else None
+        return entry
+
+    def body(self, body_id: int) -> bytes:
+        """Returns the decompressed body with this id."""
+        offset, length = self.bodies[body_id]
+        start = self._data_start + offset
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return decompressor.decompress(self._map[start:start + length]) + decompressor.flush()
+
+
+def make_response(url: str, status_code: int, body: bytes, headers: dict) -> requests.Response:
+    """Builds a requests Response without any I/O."""
+    headers = {key: value for key, value in headers.items() if value is not None}
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = body
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict(headers)
+    # requests_cache copies the body and status from the raw response when saving it.
+    response.raw = HTTPResponse(body=BytesIO(body), headers=headers, status=status_code,
+                                request_url=url, preload_content=False)
+    response.request = requests.Request("GET", url).prepare()
+    return response
+
+
+class ReplaySession:
+    """
+    Stands in for the fetcher's session, answering every GET and HEAD from
+    a ReplayPack with no network and no cache database. Conditional requests
+    are answered with 304 when the recorded ETag matches, and URLs missing
+    from the pack with 404.
+    """
+
+    def __init__(self, pack: ReplayPack):
+        self.pack = pack
+        self.served = 0
+        self.missing = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict = None, timeout: float = None) -> requests.Response:
+        return self._respond(url, headers or {}, include_body=True)
+
+    def head(self, url: str, headers: dict = None, timeout: float = None) -> requests.Response:
+        return self._respond(url, headers or {}, include_body=False)
+
+    def _respond(self, url: str, headers: dict, include_body: bool) -> requests.Response:
+        entry = self.pack.lookup(url)
+        if entry is None:
+            with self._lock:
+                self.missing.append(url)
+            return make_response(url, 404, NOT_IN_PACK, {"Content-Type": "application/json"})
+        with self._lock:
+            self.served += 1
+        body_id, etag, last_modified = entry
+        validators = {"ETag": etag, "Last-Modified": last_modified}
+        if etag is not None and headers.get("If-None-Match") == etag:
+            response = make_response(url, 304, b"", validators)
+        else:
+            body = self.pack.body(body_id) if include_body else b""
+            response = make_response(url, 200, body, {"Content-Type": "application/json", **validators})
+        response.from_cache = True
+        return response
+
+
+def warm_cache(pack: ReplayPack, session, expire_after=None) -> int:
+    """
+    Saves every response of a pack into a requests_cache session in one
+    transaction, as if each had just been downloaded.
+
+    :param pack: The ReplayPack to load.
+    :param session: The requests_cache CachedSession to fill.
+    :param expire_after: Expiry of the saved responses; defaults to the session's.
+    :return: Number of responses saved.
+    """
+    from requests_cache import get_expiration_datetime
+
+    expires = get_expiration_datetime(session.settings.expire_after if expire_after is None else expire_after)
+    with session.cache.responses.bulk_commit():
+        for url, (body_id, etag, last_modified) in pack.entries.items():
+            response = make_response(url, 200, pack.body(body_id), {
+                "Content-Type": "application/json", "ETag": etag, "Last-Modified": last_modified,
+            })
+            session.cache.save_response(response, expires=expires)
+    return len(pack.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and load offline replay packs of the PokeAPI cache.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Write the response cache into a replay pack.")
+    export.add_argument("--cache", default="pokeapi_cache")
+    export.add_argument("--out", default="pokeapi.pack")
+
+    warm = subparsers.add_parser("warm", help="Load a replay pack into the response cache.")
+    warm.add_argument("--pack", default="pokeapi.pack")
+    warm.add_argument("--cache", default="pokeapi_cache")
+    warm.add_argument("--expire-after", type=int, default=86400, help="Seconds until the loaded responses expire.")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        stats = export_pack(args.cache, args.out)
+        print(f"Exported {stats['urls']} responses ({stats['bodies']} distinct bodies) into '{args.out}': "
+              f"{stats['raw_bytes'] / 2 ** 20:.1f} MB of bodies in {stats['packed_bytes'] / 2 ** 20:.1f} MB.")
+    else:
+        import requests_cache
+
+        session = requests_cache.CachedSession(args.cache, backend="sqlite", expire_after=args.expire_after)
+        count = warm_cache(ReplayPack(args.pack), session)
+        print(f"Loaded {count} responses from '{args.pack}' into the '{args.cache}' cache.")
+
+
+if __name__ == "__main__":
+    main()
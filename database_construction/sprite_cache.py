@@ -0,0 +1,228 @@
+"""
+Downloads every variant's sprite once into a local content-addressed store
+and records the local files in the database.
+
+Each image is stored under the SHA-256 of its bytes, next to pre-resized
+thumbnails (and optionally WebP copies of them):
+
+    sprites/3f/3fa4...e1.png         original
+    sprites/3f/3fa4...e1-96.png      thumbnail fitting 96x96
+    sprites/3f/3fa4...e1-96.webp     WebP copy of the thumbnail (--webp)
+
+and every variant whose image was stored gets a "sprite" entry with paths
+relative to the output database:
+
+    "sprite": {"sha256": "3fa4...e1", "original": "sprites/3f/3fa4...e1.png",
+               "thumbnails": {"96": "sprites/3f/3fa4...e1-96.png", ...}, "webp": {...}}
+
+Downloads run through the concurrent crawler and every finished sprite is
+committed to a journal, so an interrupted run continues where it stopped
+with --resume. To test against the local fixture server, put images under
+the fixtures directory and point --origin at it:
+
+    python fixture_server.py serve --fixtures fixtures --port 8000
+    python sprite_cache.py --input combined_database.json --origin http://127.0.0.1:8000
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from PIL import Image
+from tqdm import tqdm
+
+from build_journal import BuildJournal
+from concurrent_crawler import ConcurrentCrawler
+
+SPRITES_DIR = "sprites"
+THUMBNAIL_SIZES = (96, 256)
+SPRITE_ORIGIN = "https://raw.githubusercontent.com"
+
+def content_path(directory: str, digest: str, suffix: str) -> str:
+    """
+    Returns the location of a content-addressed file: a two-character
+    fan-out directory keeps any one directory small.
+    """
+    return os.path.join(directory, digest[:2], digest + suffix)
+
+def _write_once(path: str, write):
+    """
+    Creates `path` with write(tmp_path) unless it already exists. Files are
+    named by content, so an existing file never needs rewriting.
+    """
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def store_sprite(content: bytes, extension: str, directory: str, root: str, sizes=THUMBNAIL_SIZES, webp: bool = False) -> dict:
+    """
+    Stores an image and its thumbnails in the content-addressed store.
+
+    :param content: Image bytes.
+    :param extension: File extension of the original, e.g. ".png".
+    :param directory: Root of the sprite store.
+    :param root: Directory the recorded paths are relative to (that of the database).
+    :param sizes: Bounding box sizes of the thumbnails.
+    :param webp: Whether to also write WebP copies of the thumbnails.
+    :return: The "sprite" entry of the image.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    original = content_path(directory, digest, extension)
+
+    def write_original(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+
+    _write_once(original, write_original)
+    relative = lambda path: os.path.relpath(path, root).replace(os.sep, "/")
+    entry = {"sha256": digest, "original": relative(original), "thumbnails": {}}
+    if webp:
+        entry["webp"] = {}
+
+    with Image.open(BytesIO(content)) as image:
+        image.load()
+        thumbnail = image
+        # Largest first, each thumbnail resized from the previous one.
+        for size in sorted(sizes, reverse=True):
+            thumbnail = thumbnail.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            formats = [("thumbnails", ".png", "PNG", {})]
+            if webp:
+                formats.append(("webp", ".webp", "WEBP", {"quality": 85}))
+            for key, suffix, image_format, options in formats:
+                path = content_path(directory, digest, f"-{size}{suffix}")
+                _write_once(path, lambda tmp_path: thumbnail.save(tmp_path, image_format, **options))
+                entry[key][str(size)] = relative(path)
+    return entry
+
+def _is_complete(entry: dict, root: str, sizes, webp: bool) -> bool:
+    """Whether a journaled entry has every requested file on disk."""
+    wanted = {str(size) for size in sizes}
+    if set(entry.get("thumbnails", {})) != wanted or (webp and set(entry.get("webp", {})) != wanted):
+        return False
+    paths = [entry["original"], *entry["thumbnails"].values(), *entry.get("webp", {}).values()]
+    return all(os.path.exists(os.path.join(root, path)) for path in paths)
+
+def sprite_urls(database: dict) -> list:
+    """Returns the distinct image URLs of every variant, in database order."""
+    urls = (
+        variant.get("image_url")
+        for pokemon in database.get("pokemon", [])
+        for variant in pokemon.get("variants", [])
+    )
+    return list(dict.fromkeys(url for url in urls if url))
+
+def download_sprites(urls: list, directory: str, root: str, journal: BuildJournal, crawler: ConcurrentCrawler,
+                     sizes=THUMBNAIL_SIZES, webp: bool = False, origin: str = None) -> dict:
+    """
+    Downloads and stores every sprite not already completed in the journal.
+
+    :param urls: Image URLs as recorded in the database.
+    :param directory: Root of the sprite store.
+    :param root: Directory the recorded paths are relative to.
+    :param journal: Journal of finished sprites; entries are reused and committed here.
+    :param crawler: Crawler used for the downloads.
+    :param sizes: Bounding box sizes of the thumbnails.
+    :param webp: Whether to also write WebP thumbnails.
+    :param origin: Optional replacement for SPRITE_ORIGIN (e.g. a local fixture server).
+    :return: Dictionary mapping each stored URL to its "sprite" entry.
+    """
+    entries = {}
+    pending = []
+    for url in urls:
+        record = journal.previous.get(("sprite", url))
+        if record is not None and _is_complete(record["entry"], root, sizes, webp):
+            entries[url] = journal.reuse("sprite", url)
+        else:
+            pending.append(url)
+
+    def fetch_and_store(url):
+        fetch_url = origin + url[len(SPRITE_ORIGIN):] if origin and url.startswith(SPRITE_ORIGIN) else url
+        response = crawler.fetch_response(fetch_url)
+        if response is None:
+            return None, None
+        extension = os.path.splitext(urlsplit(url).path)[1] or ".png"
+        validators = {url: {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}}
+        return store_sprite(response.content, extension, directory, root, sizes, webp), validators
+
+    with ThreadPoolExecutor(max_workers=crawler.concurrency) as executor:
+        futures = {executor.submit(fetch_and_store, url): url for url in pending}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Downloading Sprites"):
+            url = futures[future]
+            try:
+                entry, validators = future.result()
+            except OSError as e:
+                # Corrupt or unreadable image: leave the variant on its URL.
+                print(f"Could not store the sprite at {url}: {e}")
+                continue
+            if entry is not None:
+                journal.commit("sprite", url, entry, validators)
+                entries[url] = entry
+    return entries
+
+def attach_sprites(database: dict, entries: dict) -> int:
+    """
+    Records the stored sprite of every variant in the database.
+
+    :return: Number of variants given a "sprite" entry.
+    """
+    attached = 0
+    for pokemon in database.get("pokemon", []):
+        for variant in pokemon.get("variants", []):
+            entry = entries.get(variant.get("image_url"))
+            if entry is not None:
+                variant["sprite"] = entry
+                attached += 1
+    return attached
+
+def main():
+    parser = argparse.ArgumentParser(description="Download sprites into a local content-addressed store.")
+    parser.add_argument("--input", default="combined_database.json", help="Database whose image URLs to download.")
+    parser.add_argument("--output", default=None, help="Path of the updated database (default: overwrite the input).")
+    parser.add_argument("--sprites-dir", default=None, help=f"Sprite store (default: '{SPRITES_DIR}' next to the output).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(THUMBNAIL_SIZES), help="Thumbnail bounding boxes in pixels.")
+    parser.add_argument("--webp", action="store_true", help="Also write WebP copies of the thumbnails.")
+    parser.add_argument("--origin", default=None, help=f"Fetch from this origin instead of {SPRITE_ORIGIN}.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum number of downloads in flight.")
+    parser.add_argument("--rate", type=float, default=20.0, help="Maximum requests per second per host.")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx responses and connection errors.")
+    parser.add_argument("--resume", action="store_true", help="Skip sprites completed by a previous run.")
+    args = parser.parse_args()
+
+    output = args.output or args.input
+    root = os.path.dirname(os.path.abspath(output))
+    directory = args.sprites_dir or os.path.join(root, SPRITES_DIR)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    urls = sprite_urls(database)
+    journal = BuildJournal(os.path.join(directory, "journal.jsonl"), reuse=args.resume)
+    # Images are stored on disk, not in the JSON response cache.
+    crawler = ConcurrentCrawler(requests.Session(), args.concurrency, args.rate, args.max_retries)
+    start = time.perf_counter()
+    entries = download_sprites(urls, directory, root, journal, crawler, args.sizes, args.webp, args.origin)
+    journal.compact()
+    attached = attach_sprites(database, entries)
+
+    with open(output + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(database, f, indent=4)
+    os.replace(output + ".tmp", output)
+
+    print(f"Journal: {journal.reused} sprites reused, {journal.built} downloaded in {time.perf_counter() - start:.1f}s.")
+    if len(entries) < len(urls):
+        print(f"{len(urls) - len(entries)} sprites could not be downloaded; those variants keep their URLs.")
+    print(f"Sprites complete. {attached} variants now point at '{directory}', saved as '{output}'.")
+
+if __name__ == "__main__":
+    main()
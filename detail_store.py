@@ -0,0 +1,190 @@
+"""
+Per-Pokémon detail store for combined_database.json.
+
+Layout of the store directory:
+
+    summary.json            {"pokemon": [summary, ...]}: dex number, name,
+                            types, region and variant names of every Pokémon
+    variants.json           {"variants": [row, ...]}: see variant_rows
+    moves.json              {"moves": {name: [type, damage class]}}
+    metadata/<key>.json     top-level database keys other than "pokemon"
+    000/000000.json ...     the full record of the Pokémon at each position
+
+The app keeps only the summaries resident and reads one Pokémon's variants,
+sets, abilities and evolution chain when it is displayed, as a records.Pokemon.
+"""
+import json
+import os
+from functools import lru_cache
+
+from readonly import freeze
+from records import Pokemon, Vocabulary
+
+# File inside the store directory holding the always-resident summaries.
+SUMMARY_FILE = "summary.json"
+
+# Number of Pokémon detail records kept in memory per process.
+DETAIL_CACHE_SIZE = 128
+
+def detail_file(directory, position):
+    """
+    Returns the path of the detail file of the Pokémon at `position`.
+    Files are grouped into subdirectories of 1000 to keep directories small.
+    """
+    return os.path.join(directory, f"{position // 1000:03d}", f"{position:06d}.json")
+
+# File inside the store directory holding the per-variant rows.
+VARIANTS_FILE = "variants.json"
+
+# File inside the store directory holding the move types.
+MOVES_FILE = "moves.json"
+
+def database_move_types(database):
+    """
+    Returns {move name: (type, damage class)} from the database's "moves"
+    list; empty for databases built before moves carried their type.
+    """
+    return {
+        move["name"]: (move.get("type"), move.get("damage_class"))
+        for move in database.get("moves", []) if move.get("type")
+    }
+
+def variant_rows(pokemon_list):
+    """
+    Yields the compact row of every variant used by whole-dataset queries:
+    its Pokémon's position, name, types, base stats and the tiers it has
+    competitive sets in.
+    """
+    for position, pokemon in enumerate(pokemon_list):
+        for variant in pokemon.get("variants", []):
+            yield {
+                "position": position,
+                "name": variant["name"],
+                "types": list(variant.get("types", [])),
+                "base_stats": dict(variant.get("base_stats", {})),
+                "tiers": list(variant.get("sets", {})),
+            }
+
+def write_detail_store(summaries, details, directory, move_types=None, metadata=None):
+    """
+    Writes a detail store: one JSON file per Pokémon holding its full record
+    (variants, sets, abilities and evolution chain), a summary file with one
+    small record per Pokémon in the same order and the variant rows.
+
+    The summary file is written last, through a temporary file, so a store
+    whose build was interrupted is never mistaken for a complete one.
+
+    :param summaries: Summary records, one per Pokémon.
+    :param details: Full Pokémon records, in the same order.
+    :param directory: Directory of the store; created if missing.
+    :param move_types: {move name: (type, damage class)}, see database_move_types.
+    :param metadata: Top-level database keys other than "pokemon", one file each.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for position, pokemon in enumerate(details):
+        path = detail_file(directory, position)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(pokemon, f, ensure_ascii=False, separators=(",", ":"))
+
+    with open(os.path.join(directory, VARIANTS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"variants": list(variant_rows(details))}, f, ensure_ascii=False, separators=(",", ":"))
+    with open(os.path.join(directory, MOVES_FILE), "w", encoding="utf-8") as f:
+        json.dump({"moves": move_types or {}}, f, ensure_ascii=False, separators=(",", ":"))
+    os.makedirs(os.path.join(directory, "metadata"), exist_ok=True)
+    for key, value in (metadata or {}).items():
+        with open(os.path.join(directory, "metadata", f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, separators=(",", ":"))
+
+    summary_path = os.path.join(directory, SUMMARY_FILE)
+    with open(summary_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"pokemon": summaries}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(summary_path + ".tmp", summary_path)
+
+class DetailStore:
+    """
+    Reads a store written by write_detail_store. The summaries are loaded
+    once; a Pokémon's full record is read from its own file when first
+    requested, converted to a records.Pokemon and kept in a bounded LRU cache.
+    """
+
+    def __init__(self, directory, cache_size=DETAIL_CACHE_SIZE):
+        self.directory = directory
+        self.vocabulary = Vocabulary()
+        with open(os.path.join(directory, SUMMARY_FILE), "r", encoding="utf-8") as f:
+            self.summaries = freeze(json.load(f)["pokemon"])
+        self._load = lru_cache(maxsize=cache_size)(self._read)
+
+    def _read_record(self, position):
+        with open(detail_file(self.directory, position), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read(self, position):
+        return Pokemon.from_dict(self._read_record(position), self.vocabulary)
+
+    def load(self, position):
+        """
+        Returns the read-only Pokemon record at `position`, shared with
+        other callers.
+        """
+        return self._load(position)
+
+    def variant_rows(self):
+        """
+        Returns the rows written by variant_rows. Stores built before
+        variants.json existed get them from the detail files instead.
+        """
+        path = os.path.join(self.directory, VARIANTS_FILE)
+        if not os.path.exists(path):
+            return list(variant_rows(self._read_record(position) for position in range(len(self.summaries))))
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["variants"]
+
+    def move_types(self):
+        """Returns {move name: (type, damage class)}."""
+        path = os.path.join(self.directory, MOVES_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return {name: tuple(value) for name, value in json.load(f)["moves"].items()}
+
+    def metadata(self, key):
+        """Returns a top-level database value other than "pokemon", or None."""
+        path = os.path.join(self.directory, "metadata", f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def cache_info(self):
+        return self._load.cache_info()
+
+class InMemoryDetails:
+    """
+    Detail store over a read-only database that is already in memory (the
+    JSON file or the snapshot), used when no detail store has been built.
+    A Pokémon is converted to a records.Pokemon when first loaded, so a
+    lazily decoded snapshot stays lazy.
+    """
+
+    def __init__(self, database, summaries):
+        self.database = database
+        self.pokemon = database.get("pokemon", [])
+        self.summaries = summaries
+        self.vocabulary = Vocabulary()
+        self._records = [None] * len(self.pokemon)
+
+    def load(self, position):
+        record = self._records[position]
+        if record is None:
+            record = self._records[position] = Pokemon.from_dict(self.pokemon[position], self.vocabulary)
+        return record
+
+    def variant_rows(self):
+        return variant_rows(self.pokemon)
+
+    def move_types(self):
+        return database_move_types(self.database)
+
+    def metadata(self, key):
+        return self.database.get(key)
@@ -0,0 +1,229 @@
+"""
+Evolution graph.
+
+Every species record carries its whole evolution chain as a flat list, and
+that list does not say which stage a branch hangs from (Eevee's eight
+evolutions look like a nine-stage line). build_evolution_graph stores each
+chain once, under the database's "evolution_chains" key:
+
+    {
+        "chains": {"<chain id>": {"nodes": [name, ...], "edges": [[from, to, evolution_details], ...]}},
+        "species": {name: "<chain id>"}
+    }
+
+Edges refer to nodes by index. Chain IDs are PokeAPI's evolution chain IDs
+when the record has one ("evolution_chain_id"). Stages record their parent
+as "evolves_from"; chains fetched before that field existed are read as
+one straight line.
+
+EvolutionGraph resolves every node to its database position once, so the
+app looks chains up by position and jumps between members without going
+through the text search.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from data import load_details, load_index
+from visualizations import cached_radar_chart
+
+# Number of Pokémon whose neighbours are prefetched at most once per process.
+PREFETCH_CACHE_SIZE = 1024
+
+def chain_edges(evolution_chain):
+    """
+    Returns the (from, to, evolution_details) edges of a flat evolution
+    chain, by index into the list.
+    """
+    index_of = {}
+    edges = []
+    for i, stage in enumerate(evolution_chain):
+        index_of.setdefault(stage["name"], i)
+        if "evolves_from" in stage:
+            parent = index_of.get(stage["evolves_from"])
+        else:
+            parent = i - 1 if i else None
+        if parent is not None:
+            edges.append([parent, i, stage.get("evolution_details", [])])
+    return edges
+
+def build_evolution_graph(pokemon_list):
+    """
+    Builds the "evolution_chains" section from the flat chains of every
+    species. Species sharing a chain (by ID, or by identical member names
+    when there is no ID) are stored once.
+    """
+    explicit_ids = [p["evolution_chain_id"] for p in pokemon_list if p.get("evolution_chain_id") is not None]
+    next_id = max(explicit_ids, default=0) + 1
+    chains, species, id_by_members = {}, {}, {}
+
+    for pokemon in pokemon_list:
+        evolution_chain = pokemon.get("evolution_chain", [])
+        if not evolution_chain:
+            continue
+        names = tuple(stage["name"] for stage in evolution_chain)
+        chain_id = pokemon.get("evolution_chain_id")
+        if chain_id is None:
+            chain_id = id_by_members.get(names)
+            if chain_id is None:
+                chain_id, next_id = next_id, next_id + 1
+        chain_id = str(chain_id)
+        id_by_members[names] = chain_id
+        if chain_id not in chains:
+            chains[chain_id] = {"nodes": list(names), "edges": chain_edges(evolution_chain)}
+        for name in names:
+            species.setdefault(name, chain_id)
+        species[pokemon["name"]] = chain_id
+
+    return {"chains": chains, "species": species}
+
+class EvolutionChain:
+    """
+    One evolution chain with its members resolved to database positions.
+
+    :param chain_id: ID of the chain, or None for a chain read from a record.
+    :param names: Member species names.
+    :param edges: (from, to, evolution_details) by index into `names`.
+    :param positions: Database position of every member, None if missing.
+    """
+
+    def __init__(self, chain_id, names, edges, positions):
+        self.chain_id = chain_id
+        self.names = list(names)
+        self.edges = [tuple(edge) for edge in edges]
+        self.positions = list(positions)
+        self.parent = {child: (parent, details) for parent, child, details in self.edges}
+        self.children = {}
+        for parent, child, _ in self.edges:
+            self.children.setdefault(parent, []).append(child)
+
+    @classmethod
+    def from_record(cls, evolution_chain, index):
+        """Reads the flat chain stored in a species record."""
+        return cls(None, [stage["name"] for stage in evolution_chain], chain_edges(evolution_chain),
+                   index.resolve_evolution_chain(evolution_chain))
+
+    def stages(self):
+        """Returns member indices grouped by evolution stage, base stage first."""
+        depth = {}
+        for i in range(len(self.names)):
+            node, steps = i, 0
+            while node in self.parent and steps <= len(self.names):
+                node, steps = self.parent[node][0], steps + 1
+            depth[i] = steps
+        stages = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for i in range(len(self.names)):
+            stages[depth[i]].append(i)
+        return stages
+
+    def neighbours(self, position):
+        """Returns the positions of the members one evolution away from `position`."""
+        members = [i for i, p in enumerate(self.positions) if p == position]
+        adjacent = set()
+        for i in members:
+            if i in self.parent:
+                adjacent.add(self.parent[i][0])
+            adjacent.update(self.children.get(i, []))
+        return [self.positions[i] for i in sorted(adjacent) if self.positions[i] is not None and self.positions[i] != position]
+
+class EvolutionGraph:
+    """
+    Every evolution chain of the database, with a species (and position) to
+    chain index.
+
+    :param graph: The "evolution_chains" section.
+    :param index: PokemonIndex or SQLiteDatabase used to resolve names.
+    """
+
+    def __init__(self, graph, index):
+        self.chains = {}
+        self.chain_by_position = {}
+        for chain_id, chain in graph["chains"].items():
+            positions = [index.position_by_name(name) for name in chain["nodes"]]
+            self.chains[chain_id] = EvolutionChain(chain_id, chain["nodes"], chain["edges"], positions)
+        self.chain_by_name = dict(graph["species"])
+        for name, chain_id in self.chain_by_name.items():
+            position = index.position_by_name(name)
+            if position is not None and chain_id in self.chains:
+                self.chain_by_position.setdefault(position, chain_id)
+
+    def chain_of(self, position):
+        """Returns the EvolutionChain of the Pokémon at `position`, or None."""
+        chain_id = self.chain_by_position.get(position)
+        return None if chain_id is None else self.chains[chain_id]
+
+def describe_evolution(evolution_details):
+    """
+    Summarizes PokeAPI evolution details, e.g. "Level 16" or "Use item:
+    thunder-stone". Alternative conditions are joined with "or".
+    """
+    descriptions = []
+    for details in evolution_details:
+        trigger = details.get("trigger")
+        trigger = trigger.get("name") if isinstance(trigger, dict) else trigger
+        parts = []
+        if details.get("min_level"):
+            parts.append(f"Level {details['min_level']}")
+        for key in ("item", "held_item", "known_move", "location"):
+            value = details.get(key)
+            if value:
+                parts.append(f"{key.replace('_', ' ').capitalize()}: {value.get('name') if isinstance(value, dict) else value}")
+        if details.get("min_happiness"):
+            parts.append(f"Happiness {details['min_happiness']}")
+        if details.get("time_of_day"):
+            parts.append(details["time_of_day"].capitalize())
+        if not parts and trigger:
+            parts.append(trigger.replace("-", " ").capitalize())
+        if parts:
+            descriptions.append(", ".join(parts))
+    return " or ".join(dict.fromkeys(descriptions))
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="evolution-prefetch")
+# (dataset version, position) -> Future of every prefetch started, oldest
+# first. Keyed by version rather than store so that no previous store is kept
+# alive after a reload.
+_prefetched = OrderedDict()
+_prefetched_lock = threading.Lock()
+
+def _warm(details, position):
+    for variant in details.load(position).variants:
+        if variant.base_stats:
+            cached_radar_chart(variant.stats or variant.base_stats)
+
+def _prefetch(details, position, version=None):
+    key = (version, position)
+    with _prefetched_lock:
+        future = _prefetched.get(key)
+        if future is None:
+            future = _prefetched[key] = _prefetch_pool.submit(_warm, details, position)
+            if len(_prefetched) > PREFETCH_CACHE_SIZE:
+                _prefetched.popitem(last=False)
+        else:
+            _prefetched.move_to_end(key)
+        return future
+
+def prefetch(details, positions, version=None):
+    """
+    Loads the records and builds the radar charts of the Pokémon at
+    `positions` in a background thread, once per dataset version and
+    position, so that opening them next is served from the caches.
+
+    :param details: The store of `version`, as returned by data.load_details.
+    :param positions: Positions to prefetch.
+    :param version: The dataset version the store was loaded for.
+    """
+    for position in positions:
+        _prefetch(details, position, version)
+
+@st.cache_resource(max_entries=1)
+def load_evolution_graph(version=None):
+    """
+    Builds the evolution graph once per process and dataset version, or
+    returns None when the database has no evolution_chains section.
+    """
+    graph = load_details(version).metadata("evolution_chains")
+    if not graph:
+        return None
+    return EvolutionGraph(graph, load_index(version))
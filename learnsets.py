@@ -0,0 +1,144 @@
+"""
+Move learner bitsets.
+
+The fetcher stores, for every move, a "method" list with the name of every
+Pokémon that learns it. build_learnsets turns those lists into bitsets over
+integer IDs, stored in the database under "learnsets":
+
+    {
+        "pokemon": [name, ...],        bit i of a learner bitset is pokemon[i]
+        "moves": [name, ...],          bit j of a moveset bitset is moves[j]
+        "learners": [bitset, ...],     per move: the Pokémon learning it
+        "movesets": [bitset, ...]      per Pokémon: the moves it learns
+    }
+
+Bitsets are little-endian bytes in base64. Pokémon IDs follow the order of
+the variants in the database, so they line up with StatMatrix rows.
+"""
+import base64
+
+import numpy as np
+import streamlit as st
+
+from data import load_details, load_stat_matrix
+
+def encode_bitset(ids):
+    """Returns the base64 text of the bitset with the given bits set."""
+    bits = 0
+    for i in ids:
+        bits |= 1 << i
+    return base64.b64encode(bits.to_bytes((bits.bit_length() + 7) // 8, "little")).decode("ascii")
+
+def decode_bitset(text):
+    """Returns the bitset encoded by encode_bitset as an int."""
+    return int.from_bytes(base64.b64decode(text), "little")
+
+def bitset_ids(bits, size):
+    """Returns the positions of the set bits of an int bitset, in order."""
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder="little")[:size])
+
+def mask_bitset(mask):
+    """Returns the int bitset of a boolean NumPy vector."""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+def build_learnsets(database):
+    """
+    Builds the learnsets section from the "method" lists of the database's
+    moves. Learner names that are not variants of the database (other
+    games' forms, for instance) get IDs after the variants.
+    """
+    pokemon = []
+    pokemon_id = {}
+    for record in database.get("pokemon", []):
+        for variant in record.get("variants", []):
+            pokemon_id.setdefault(variant["name"], len(pokemon))
+            pokemon.append(variant["name"])
+
+    moves, learners = [], []
+    movesets = {}
+    for move_id, move in enumerate(database.get("moves", [])):
+        ids = []
+        for name in move.get("method", []):
+            if name not in pokemon_id:
+                pokemon_id[name] = len(pokemon)
+                pokemon.append(name)
+            ids.append(pokemon_id[name])
+            movesets.setdefault(pokemon_id[name], []).append(move_id)
+        moves.append(move["name"])
+        learners.append(encode_bitset(ids))
+
+    return {
+        "pokemon": pokemon,
+        "moves": moves,
+        "learners": learners,
+        "movesets": [encode_bitset(movesets.get(i, [])) for i in range(len(pokemon))],
+    }
+
+class LearnsetIndex:
+    """
+    "Which Pokémon learn all of these moves" queries answered by ANDing int
+    bitsets over StatMatrix rows: one per move, type and tier.
+    """
+
+    def __init__(self, learnsets, stat_matrix):
+        self.moves = list(learnsets["moves"])
+        self.move_id = {name: i for i, name in enumerate(self.moves)}
+        self.size = len(stat_matrix.names)
+        self.all_rows = (1 << self.size) - 1
+
+        names = list(learnsets["pokemon"])
+        row_of = np.array([stat_matrix.row_by_name.get(name.lower(), -1) for name in names], dtype=np.int64)
+        identity = len(names) >= self.size and np.array_equal(row_of[:self.size], np.arange(self.size))
+        self.learners = []
+        for text in learnsets["learners"]:
+            bits = decode_bitset(text)
+            if not identity:
+                # Renumber learner IDs to StatMatrix rows, dropping unknown names.
+                rows = row_of[bitset_ids(bits, len(names))]
+                bits = mask_bitset(np.isin(np.arange(self.size), rows[rows >= 0]))
+            self.learners.append(bits & self.all_rows)
+
+        self.movesets = [0] * self.size
+        for pokemon_id, text in enumerate(learnsets["movesets"]):
+            if row_of[pokemon_id] >= 0:
+                self.movesets[row_of[pokemon_id]] |= decode_bitset(text)
+
+        self.type_bits = {t: mask_bitset(stat_matrix.type_matrix[:, i]) for i, t in enumerate(stat_matrix.types)}
+        self.tier_bits = {t: mask_bitset(stat_matrix.tier_matrix[:, i]) for i, t in enumerate(stat_matrix.tiers)}
+
+    def learner_bits(self, moves, types=(), tiers=()):
+        """
+        Returns the bitset of rows that learn every move in `moves` and have
+        any of `types` and any of `tiers` (an empty selection matches all).
+        """
+        bits = self.all_rows
+        for move in moves:
+            move_id = self.move_id.get(move)
+            bits &= self.learners[move_id] if move_id is not None else 0
+        for selected, table in ((types, self.type_bits), (tiers, self.tier_bits)):
+            if selected:
+                allowed = 0
+                for value in selected:
+                    allowed |= table.get(value, 0)
+                bits &= allowed
+        return bits
+
+    def learners_of(self, moves, types=(), tiers=()):
+        """Returns the StatMatrix rows of learner_bits, in database order."""
+        return bitset_ids(self.learner_bits(moves, types, tiers), self.size)
+
+    def moves_of(self, row):
+        """Returns the names of the moves the variant in `row` learns."""
+        return [self.moves[i] for i in bitset_ids(self.movesets[row], len(self.moves))]
+
+@st.cache_resource(max_entries=1)
+def load_learnset_index(version=None):
+    """
+    Builds the learnset index once per process and dataset version, or
+    returns None when the database has no learnsets section.
+    """
+    learnsets = load_details(version).metadata("learnsets")
+    if not learnsets:
+        return None
+    return LearnsetIndex(learnsets, load_stat_matrix(version))
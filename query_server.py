@@ -0,0 +1,326 @@
+"""
+Read-only HTTP/JSON query service over the app's data, for tools other than
+the Streamlit app:
+
+    python query_server.py --port 8600
+
+    GET /                                   dataset summary and endpoints
+    GET /pokemon/<name or dex number>       full record (a variant name finds its Pokémon)
+    GET /search?q=char&type=fire&limit=5    fuzzy name suggestions, as in the app's search box
+    GET /variants?type=fire&region=kanto&min_speed=100&sort=speed&order=desc&limit=50&offset=0
+                                            filtered, sorted variant list (the app's browse table)
+    GET /sets/<variant name>?tier=ou        competitive sets of a variant
+
+type and region may be repeated; min_<column> and max_<column> bound any of
+data.STAT_COLUMNS. Responses are built from the same cached loaders as the
+app (data.py, search.py), bound once per dataset version: a rebuilt
+database is picked up within RELOAD_INTERVAL seconds.
+
+Every response depends only on the dataset version and the request, so its
+ETag is derived from those two without building the body (per record, the
+ETags are precomputed when the version is loaded), and If-None-Match is
+answered with 304 before any lookup; error responses carry no ETag.
+Encoded responses are kept in an LRU cache keyed by the dataset version and
+the normalized request. Each connection is served by its own thread with
+HTTP/1.1 keep-alive.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from streamlit.logger import set_log_level
+
+from data import STAT_COLUMNS, dataset_version, load_details, load_index, load_variant_table
+from search import load_search_engine
+
+# Seconds between checks for a rebuilt database.
+RELOAD_INTERVAL = 1.0
+
+# Encoded responses kept in the LRU cache.
+RESPONSE_CACHE_SIZE = 4096
+
+# Default and largest page size of /variants, and largest /search limit.
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+MAX_SUGGESTIONS = 50
+
+SORT_COLUMNS = ("dex_number", "name", *STAT_COLUMNS)
+
+class QueryError(Exception):
+    """A request that cannot be answered; carries the HTTP status."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+def _int_param(params, name, default, low, high):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise QueryError(400, f"'{name}' must be an integer.")
+    return min(max(value, low), high)
+
+class QueryService:
+    """
+    The query endpoints over one dataset version. Each endpoint returns the
+    JSON-serializable payload of a 200 response or raises QueryError.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.details = load_details(version)
+        self.index = load_index(version)
+        self.search_engine = load_search_engine(version)
+        self.variant_table = load_variant_table(version)
+        self.tag = hashlib.sha1(repr(version).encode()).hexdigest()[:12]
+        _, self.positions = self.index.filter()
+        self.record_etags = [f'"{self.tag}-p{position}"' for position in range(max(self.positions, default=-1) + 1)]
+
+    def etag(self, route, argument, key):
+        """Returns the ETag of a request, without answering it."""
+        if route == "pokemon":
+            position = self.position(argument)
+            if position is not None:
+                return self.record_etags[position]
+        return f'"{self.tag}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+    def position(self, argument):
+        """Returns the position of the Pokémon named or numbered `argument`, or None."""
+        if argument.isascii() and argument.isdigit():
+            return self.index.position_by_dex(int(argument))
+        return self.index.position_by_name(argument)
+
+    def summary(self, argument, params):
+        return {
+            "pokemon": len(self.positions),
+            "variants": len(self.variant_table.frame),
+            "endpoints": ["/pokemon/<name or dex>", "/search?q=", "/variants", "/sets/<variant>"],
+        }
+
+    def pokemon(self, argument, params):
+        position = self.position(argument)
+        if position is None:
+            raise QueryError(404, f"No Pokémon named or numbered '{argument}'.")
+        return self.details.load(position).to_dict()
+
+    def search(self, argument, params):
+        query = params.get("q", [""])[-1]
+        limit = _int_param(params, "limit", 5, 1, MAX_SUGGESTIONS)
+        types, regions = params.get("type", []), params.get("region", [])
+        return {"query": query, "results": self.search_engine.suggest(query, types, regions, limit=limit)}
+
+    def variants(self, argument, params):
+        sort_by = params.get("sort", ["dex_number"])[-1]
+        if sort_by not in SORT_COLUMNS:
+            raise QueryError(400, f"'sort' must be one of {', '.join(SORT_COLUMNS)}.")
+        ranges = {}
+        for column in STAT_COLUMNS:
+            low, high = self.variant_table.bounds[column]
+            bounds = (_int_param(params, f"min_{column}", low, low, high), _int_param(params, f"max_{column}", high, low, high))
+            if bounds != (low, high):
+                ranges[column] = bounds
+        result = self.variant_table.query(
+            params.get("type", []), params.get("region", []), ranges, sort_by,
+            descending=params.get("order", ["asc"])[-1] == "desc",
+        )
+        offset = _int_param(params, "offset", 0, 0, len(result))
+        limit = _int_param(params, "limit", DEFAULT_LIMIT, 0, MAX_LIMIT)
+        page = result.iloc[offset:offset + limit]
+        rows = [
+            {
+                "name": row.name,
+                "pokemon": row.pokemon,
+                "dex_number": int(row.dex_number),
+                "region": row.region if isinstance(row.region, str) else None,
+                "types": [t for t in (row.type_1, row.type_2) if isinstance(t, str)],
+                "tier": row.tier if isinstance(row.tier, str) else None,
+                **{column: int(getattr(row, column.replace("-", "_"))) for column in STAT_COLUMNS},
+            }
+            for row in page.rename(columns=lambda column: column.replace("-", "_")).itertuples(index=False)
+        ]
+        return {"total": len(result), "offset": offset, "results": rows}
+
+    def sets(self, argument, params):
+        position = self.index.position_by_name(argument)
+        if position is None:
+            raise QueryError(404, f"No variant named '{argument}'.")
+        pokemon = self.details.load(position)
+        variant = pokemon.variant(argument) or (pokemon.variants[0] if pokemon.variants else None)
+        if variant is None:
+            raise QueryError(404, f"'{pokemon.name}' has no variants.")
+        tiers = [tier.lower() for tier in params.get("tier", [])]
+        return {
+            "pokemon": pokemon.name,
+            "variant": variant.name,
+            "sets": {
+                tier: {set_record.name: set_record.to_dict() for set_record in tier_sets}
+                for tier, tier_sets in variant.sets if not tiers or tier in tiers
+            },
+        }
+
+ROUTES = {"": "summary", "pokemon": "pokemon", "search": "search", "variants": "variants", "sets": "sets"}
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded responses: request key -> (status, body)."""
+
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if not self.size:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded server holding the QueryService of the current dataset version and the response cache."""
+
+    request_queue_size = 128
+
+    def __init__(self, address, cache_size=RESPONSE_CACHE_SIZE):
+        super().__init__(address, QueryHandler)
+        self.cache = ResponseCache(cache_size)
+        self._service = QueryService(dataset_version())
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def service(self):
+        """Returns the QueryService, rebuilt when the data files changed since the last check."""
+        if time.monotonic() - self._checked >= RELOAD_INTERVAL:
+            with self._lock:
+                if time.monotonic() - self._checked >= RELOAD_INTERVAL:
+                    version = dataset_version()
+                    if version != self._service.version:
+                        self._service = QueryService(version)
+                        self.cache.clear()
+                    self._checked = time.monotonic()
+        return self._service
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY the body
+    # of a keep-alive response waits for the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def _respond(self, include_body):
+        parts = urlsplit(self.path)
+        route, _, argument = parts.path.strip("/").partition("/")
+        argument = unquote(argument)
+        params = parse_qs(parts.query)
+        endpoint = ROUTES.get(route)
+        if endpoint is None:
+            self._send(404, json.dumps({"detail": "Not found."}).encode(), None, include_body)
+            return
+
+        try:
+            service = self.server.service()
+            # The version tag keeps a body built by a request still holding the
+            # previous service out of the new version's entries. Parameter order
+            # does not change the answer, so it does not change the key either.
+            key = f"{service.tag}:{route}/{argument}?{sorted(params.items())}"
+            etag = service.etag(route, argument, key)
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", etag, include_body=False)
+                return
+
+            entry = self.server.cache.get(key)
+            cache_status = "hit"
+            if entry is None:
+                cache_status = "miss"
+                try:
+                    status, payload = 200, getattr(service, endpoint)(argument, params)
+                except QueryError as e:
+                    status, payload = e.status, {"detail": e.detail}
+                entry = (status, json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                self.server.cache.put(key, entry)
+        except Exception:
+            # Answer instead of dropping the keep-alive connection; the error is not cached.
+            traceback.print_exc()
+            self._send(500, json.dumps({"detail": "Internal server error."}).encode(), None, include_body)
+            return
+        status, body = entry
+        # Errors are not revalidated, so they carry no ETag.
+        self._send(status, body, etag if status == 200 else None, include_body, {"X-Cache": cache_status})
+
+    def _send(self, status, body, etag, include_body=True, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(host="127.0.0.1", port=0, cache_size=RESPONSE_CACHE_SIZE):
+    """
+    Creates (without starting) the query server. The dataset is loaded here.
+
+    :param host: Interface to bind.
+    :param port: Port to bind (0 picks a free one).
+    :param cache_size: Encoded responses kept in the LRU cache (0 disables it).
+    :return: The QueryServer; call serve_forever() to start it.
+    """
+    return QueryServer((host, port), cache_size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve read-only JSON queries over the Pokémon database.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE, help="Encoded responses kept in the LRU cache.")
+    args = parser.parse_args()
+
+    # The cached loaders warn on every call made outside a Streamlit script run.
+    set_log_level("error")
+    server = make_server(args.host, args.port, args.cache_size)
+    print(f"Serving queries on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Immutable containers for records shared by every session of the app.
+
+freeze() converts a decoded JSON document once into FrozenDict and
+FrozenList. They subclass dict and list, so json, st.write and isinstance
+checks treat them like the originals. Shared records can then be handed to
+any number of sessions without copying, and an accidental write raises
+instead of changing what every other session sees.
+"""
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("shared Pokémon records are read-only")
+
+class FrozenDict(dict):
+    """A dict that cannot be modified after construction."""
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    """A list that cannot be modified after construction."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(value):
+    """
+    Returns a deep read-only version of a decoded JSON value.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
@@ -0,0 +1,347 @@
+"""
+Typed records for the Pokémon shown by the app.
+
+A decoded detail record is a tree of dicts and lists in which every variant
+repeats the stat names, and type, ability, item, nature and move names are
+repeated thousands of times. Pokemon.from_dict converts a record once into
+read-only __slots__ objects:
+
+    Pokemon         dex_number, name, region, variants, evolution_chain, evolution_chain_id
+    Variant         name, type_ids, types, stats, ability_ids, abilities, image_url, sprite, sets
+    CompetitiveSet  name, move_ids, ability_ids, item_ids, nature_ids, teratype_ids, evs, ivs, stats, html
+    Ability         (name, description), stored once per distinct ability
+
+Base stats are packed into array("H") in STAT_NAMES order, and EV/IV
+spreads and final stats (see stat_calculator) in STAT_ORDER, with
+MISSING_STAT for an absent stat. Names are interned as small integer IDs in
+the store's Vocabulary, which also shares identical ID tuples, their
+resolved name tuples and evolution chains between records. Properties
+(base_stats, moves, options, ...) resolve the rest, and to_dict() returns
+the JSON form a record was built from. Values the packed form cannot hold
+(unknown stats, other keys) are kept as they are and round-trip unchanged.
+"""
+import json
+import threading
+from array import array
+from typing import NamedTuple
+
+from competitive_sets import OPTION_FIELDS, STAT_ORDER, normalize_set, render_set_html
+from readonly import freeze
+from snapshot import MISSING_STAT, STAT_NAMES
+
+# Name tables of a Vocabulary.
+VOCABULARY_KINDS = ("types", "abilities", "items", "natures", "moves")
+
+# Vocabulary table of each option field of a competitive set.
+SET_OPTION_KINDS = {"ability": "abilities", "item": "items", "nature": "natures", "teratypes": "types"}
+
+class Ability(NamedTuple):
+    """An ability as shown on a variant; `extra` holds any other keys as JSON."""
+    name: str
+    description: str = None
+    extra: str = None
+
+    def to_dict(self):
+        ability = {"name": self.name}
+        if self.description is not None:
+            ability["description"] = self.description
+        if self.extra:
+            ability.update(json.loads(self.extra))
+        return ability
+
+class Vocabulary:
+    """
+    Interned names shared by every record of a store: each kind in
+    VOCABULARY_KINDS maps values to consecutive integer IDs. Thread-safe,
+    since every session's thread converts records into the same vocabulary.
+    """
+
+    def __init__(self):
+        self._ids = {kind: {} for kind in VOCABULARY_KINDS}
+        self._values = {kind: [] for kind in VOCABULARY_KINDS}
+        self._resolved = {kind: {} for kind in VOCABULARY_KINDS}
+        self._shared = {}
+        self._lock = threading.Lock()
+
+    def intern(self, kind, value):
+        """Returns the ID of `value` in the `kind` table, adding it if new."""
+        ids = self._ids[kind]
+        value_id = ids.get(value)
+        if value_id is None:
+            with self._lock:
+                value_id = ids.get(value)
+                if value_id is None:
+                    value_id = len(self._values[kind])
+                    self._values[kind].append(value)
+                    ids[value] = value_id
+        return value_id
+
+    def value(self, kind, value_id):
+        """Returns the value with this ID in the `kind` table."""
+        return self._values[kind][value_id]
+
+    def ids(self, kind, values):
+        """Returns the IDs of `values` as a shared tuple."""
+        return self.share(tuple(self.intern(kind, value) for value in values))
+
+    def names(self, kind, ids):
+        """Returns the values of `ids` as a tuple, resolved once per distinct tuple of IDs."""
+        resolved = self._resolved[kind].get(ids)
+        if resolved is None:
+            values = self._values[kind]
+            resolved = self._resolved[kind].setdefault(ids, tuple(values[value_id] for value_id in ids))
+        return resolved
+
+    def share(self, value):
+        """Returns the first object equal to the (hashable) `value`, so equal tuples are stored once."""
+        return self._shared.setdefault(value, value)
+
+    def share_as(self, key, value):
+        """Returns the object shared under the (hashable) `key`, storing `value` under it on first use."""
+        return self._shared.setdefault(key, value)
+
+    def size(self, kind):
+        return len(self._values[kind])
+
+def pack_stats(stats, order):
+    """
+    Packs a {stat: value} mapping into array("H") in `order`, or returns None
+    when it has stats outside `order` or values that do not fit.
+    """
+    if any(stat not in order for stat in stats):
+        return None
+    values = [stats.get(stat, MISSING_STAT) for stat in order]
+    if not all(isinstance(value, int) and 0 <= value <= MISSING_STAT for value in values):
+        return None
+    return array("H", values)
+
+def unpack_stats(values, order):
+    """Returns the {stat: value} mapping of packed stats, leaving out missing ones."""
+    return {stat: value for stat, value in zip(order, values) if value != MISSING_STAT}
+
+def _readonly(self, *args):
+    raise TypeError("shared Pokémon records are read-only")
+
+class _Record:
+    __slots__ = ()
+    __setattr__ = __delattr__ = _readonly
+
+    def _set(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+def _extra(record, known_fields):
+    """Returns the fields of a dict record not in `known_fields`, read-only, or None."""
+    extra = {key: value for key, value in record.items() if key not in known_fields}
+    return freeze(extra) if extra else None
+
+SET_FIELDS = ("moves", *OPTION_FIELDS, "evs", "ivs", "stats", "html")
+
+class CompetitiveSet(_Record):
+    """A competitive set in the normalized schema of competitive_sets."""
+
+    __slots__ = ("vocabulary", "name", "move_ids", "ability_ids", "item_ids", "nature_ids", "teratype_ids",
+                 "evs", "ivs", "stats", "html", "extra")
+
+    @classmethod
+    def from_dict(cls, name, set_data, vocabulary):
+        normalized = normalize_set(set_data)
+        record = cls()
+        spreads = {}
+        extra = _extra(normalized, SET_FIELDS) or {}
+        for field in ("evs", "ivs"):
+            packed = [pack_stats(spread, STAT_ORDER) for spread in normalized[field]]
+            if all(spread is not None for spread in packed):
+                spreads[field] = tuple(packed)
+            else:
+                spreads[field] = None
+                extra = {**extra, field: normalized[field]}
+        stats = None
+        if "stats" in normalized:
+            stats = tuple((level, pack_stats(level_stats, STAT_ORDER)) for level, level_stats in normalized["stats"].items())
+            if any(packed is None for _, packed in stats):
+                stats = None
+                extra = {**extra, "stats": normalized["stats"]}
+        record._set(
+            vocabulary=vocabulary,
+            name=name,
+            move_ids=vocabulary.share(tuple(vocabulary.ids("moves", options) for options in normalized["moves"])),
+            ability_ids=vocabulary.ids("abilities", normalized["ability"]),
+            item_ids=vocabulary.ids("items", normalized["item"]),
+            nature_ids=vocabulary.ids("natures", normalized["nature"]),
+            teratype_ids=vocabulary.ids("types", normalized["teratypes"]),
+            evs=spreads["evs"],
+            ivs=spreads["ivs"],
+            stats=stats,
+            html=set_data.get("html") or render_set_html(name, normalized),
+            extra=freeze(extra) if extra else None,
+        )
+        return record
+
+    @property
+    def moves(self):
+        """Move options per slot, e.g. (("Giga Drain",), ("Sludge Bomb", "Sludge Wave"))."""
+        return tuple(self.vocabulary.names("moves", options) for options in self.move_ids)
+
+    def options(self, field):
+        """Returns the options of "ability", "item", "nature" or "teratypes"."""
+        ids = getattr(self, {"ability": "ability_ids", "item": "item_ids", "nature": "nature_ids",
+                             "teratypes": "teratype_ids"}[field])
+        return self.vocabulary.names(SET_OPTION_KINDS[field], ids)
+
+    def spreads(self, field):
+        """Returns the "evs" or "ivs" spreads as dicts."""
+        packed = getattr(self, field)
+        if packed is None:
+            return self.extra[field]
+        return [unpack_stats(spread, STAT_ORDER) for spread in packed]
+
+    def stats_at(self, level):
+        """Returns the final stats at a level as a dict, or None when they were not computed."""
+        if self.stats is None:
+            return (self.extra or {}).get("stats", {}).get(str(level))
+        packed = next((packed for stat_level, packed in self.stats if stat_level == str(level)), None)
+        return unpack_stats(packed, STAT_ORDER) if packed is not None else None
+
+    def to_dict(self):
+        set_data = {"moves": [list(options) for options in self.moves]}
+        for field in OPTION_FIELDS:
+            set_data[field] = list(self.options(field))
+        for field in ("evs", "ivs"):
+            set_data[field] = self.spreads(field)
+        if self.stats is not None:
+            set_data["stats"] = {level: unpack_stats(packed, STAT_ORDER) for level, packed in self.stats}
+        for key, value in (self.extra or {}).items():
+            set_data.setdefault(key, value)
+        set_data["html"] = self.html
+        return set_data
+
+VARIANT_FIELDS = ("name", "types", "base_stats", "abilities", "image_url", "sprite", "sets")
+
+class Variant(_Record):
+    """One form of a Pokémon."""
+
+    __slots__ = ("vocabulary", "name", "type_ids", "types", "stats", "ability_ids", "abilities", "image_url",
+                 "sprite", "sets", "extra", "keys")
+
+    @classmethod
+    def from_dict(cls, variant, vocabulary):
+        record = cls()
+        stats = pack_stats(variant.get("base_stats", {}), STAT_NAMES)
+        extra = _extra(variant, VARIANT_FIELDS)
+        if stats is None:
+            extra = freeze({**(extra or {}), "base_stats": variant["base_stats"]})
+        abilities = []
+        for ability in variant.get("abilities", []):
+            other = {key: value for key, value in ability.items() if key not in ("name", "description")}
+            abilities.append(Ability(ability["name"], ability.get("description"),
+                                     json.dumps(other, sort_keys=True) if other else None))
+        sets = tuple(
+            (tier, tuple(CompetitiveSet.from_dict(name, set_data, vocabulary) for name, set_data in tier_sets.items()))
+            for tier, tier_sets in variant.get("sets", {}).items()
+        )
+        type_ids = vocabulary.ids("types", variant.get("types", []))
+        ability_ids = vocabulary.share(tuple(vocabulary.intern("abilities", ability) for ability in abilities))
+        record._set(
+            vocabulary=vocabulary,
+            name=variant["name"],
+            type_ids=type_ids,
+            # The resolved tuples are shared by every variant with the same IDs,
+            # and read on every rerun, so they are kept next to the IDs.
+            types=vocabulary.names("types", type_ids),
+            stats=stats,
+            ability_ids=ability_ids,
+            abilities=vocabulary.names("abilities", ability_ids),
+            image_url=variant.get("image_url"),
+            sprite=freeze(variant.get("sprite")),
+            sets=sets,
+            extra=extra,
+            keys=vocabulary.share(tuple(variant)),
+        )
+        return record
+
+    @property
+    def base_stats(self):
+        """The base stats as a {stat: value} dict."""
+        if self.stats is None:
+            return self.extra["base_stats"]
+        return unpack_stats(self.stats, STAT_NAMES)
+
+    @property
+    def tiers(self):
+        """The tiers the variant has competitive sets in, in database order."""
+        return tuple(tier for tier, _ in self.sets)
+
+    def sets_in(self, tier):
+        """Returns the CompetitiveSet records of a tier (empty if it has none)."""
+        return next((tier_sets for name, tier_sets in self.sets if name == tier), ())
+
+    def all_sets(self):
+        """Yields every CompetitiveSet of the variant."""
+        for _, tier_sets in self.sets:
+            yield from tier_sets
+
+    def to_dict(self):
+        values = {
+            "name": self.name,
+            "types": list(self.types),
+            "base_stats": self.base_stats,
+            "abilities": [ability.to_dict() for ability in self.abilities],
+            "image_url": self.image_url,
+            "sprite": self.sprite,
+            "sets": {tier: {s.name: s.to_dict() for s in tier_sets} for tier, tier_sets in self.sets},
+        }
+        extra = self.extra or {}
+        return {key: values[key] if key in values else extra[key] for key in self.keys}
+
+POKEMON_FIELDS = ("dex_number", "name", "region", "variants", "evolution_chain", "evolution_chain_id")
+
+class Pokemon(_Record):
+    """A species and its variants."""
+
+    __slots__ = ("dex_number", "name", "region", "variants", "evolution_chain", "evolution_chain_id",
+                 "extra", "keys")
+
+    @classmethod
+    def from_dict(cls, pokemon, vocabulary):
+        """
+        Converts a decoded (or frozen) Pokémon record.
+
+        :param pokemon: The record, in the layout of combined_database.json.
+        :param vocabulary: Vocabulary of the store the record belongs to.
+        """
+        record = cls()
+        evolution_chain = pokemon.get("evolution_chain", [])
+        chain_key = (pokemon.get("evolution_chain_id"), tuple(stage["name"] for stage in evolution_chain))
+        record._set(
+            dex_number=pokemon.get("dex_number"),
+            name=pokemon["name"],
+            region=pokemon.get("region"),
+            variants=tuple(Variant.from_dict(variant, vocabulary) for variant in pokemon.get("variants", [])),
+            # Every member of a chain carries the same chain; keep one copy.
+            evolution_chain=vocabulary.share_as(chain_key, freeze(evolution_chain)),
+            evolution_chain_id=pokemon.get("evolution_chain_id"),
+            extra=_extra(pokemon, POKEMON_FIELDS),
+            keys=vocabulary.share(tuple(pokemon)),
+        )
+        return record
+
+    def variant(self, name):
+        """Returns the variant with this name (any case), or None."""
+        name = name.lower()
+        return next((variant for variant in self.variants if variant.name.lower() == name), None)
+
+    def to_dict(self):
+        values = {
+            "dex_number": self.dex_number,
+            "name": self.name,
+            "region": self.region,
+            "variants": [variant.to_dict() for variant in self.variants],
+            "evolution_chain": self.evolution_chain,
+            "evolution_chain_id": self.evolution_chain_id,
+        }
+        extra = self.extra or {}
+        return {key: values[key] if key in values else extra[key] for key in self.keys}
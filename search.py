@@ -0,0 +1,197 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+from rapidfuzz import fuzz, process, utils
+
+from data import load_index, variant_names
+
+# Largest candidate pool that is fuzzy-scored after prefiltering.
+MAX_CANDIDATES = 512
+
+def normalize(name):
+    """
+    Normalizes a name or query for matching: lowercase, punctuation to spaces.
+    """
+    return utils.default_process(name)
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of a normalized string.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def short_grams(text):
+    """
+    Returns the set of one- and two-character substrings of a normalized string.
+    """
+    return {text[i:i + n] for n in (1, 2) for i in range(len(text) - n + 1)}
+
+class SearchChoices:
+    """
+    Precomputed search data for one filter combination: the display names,
+    their normalized forms, an inverted index from every substring of up
+    to three characters to the choices containing it, and the character
+    counts of every choice (for score_bounds).
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.normalized = [normalize(name) for name in names]
+        postings = {}
+        for i, text in enumerate(self.normalized):
+            for gram in trigrams(text) | short_grams(text):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.lengths = np.array([len(text) for text in self.normalized], dtype=np.int16)
+        occurrences = {}
+        for i, text in enumerate(self.normalized):
+            for char in text:
+                occurrences.setdefault(char, []).append(i)
+        self.char_counts = {
+            char: np.bincount(ids, minlength=len(names)).astype(np.int16) for char, ids in occurrences.items()
+        }
+
+    def score_bounds(self, query):
+        """
+        Returns an upper bound of the partial_ratio score of `query` against
+        every choice. partial_ratio compares the shorter string (n
+        characters) with windows of the longer one; a window sharing at
+        most s characters with it scores at most 200 * s / (n + s), and no
+        window shares more characters than the whole string does.
+        """
+        shared = np.zeros(len(self.names), dtype=np.int16)
+        for char in set(query):
+            if char in self.char_counts:
+                shared += np.minimum(self.char_counts[char], query.count(char))
+        shorter = np.minimum(self.lengths, len(query))
+        return 200 * shared / np.maximum(shorter + shared, 1)
+
+    def candidates(self, query, limit):
+        """
+        Picks the likely best matches, scored first. Queries of one or two
+        characters score 100 against every choice containing them, so those
+        choices are taken directly; longer queries rank choices by the number
+        of trigrams they share with the query and keep the best MAX_CANDIDATES.
+
+        :return: Sorted choice indices, or None when the prefilter cannot
+            produce enough candidates and every choice must be scored.
+        """
+        if len(query) < 3:
+            matched = self.postings.get(query)
+            if matched is None or len(matched) < limit:
+                return None
+            return matched[:MAX_CANDIDATES]
+
+        lists = [self.postings[gram] for gram in trigrams(query) if gram in self.postings]
+        if not lists:
+            return None
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        matched = np.flatnonzero(counts)
+        if len(matched) < limit:
+            return None
+        if len(matched) > MAX_CANDIDATES:
+            matched = matched[np.argpartition(-counts[matched], MAX_CANDIDATES)[:MAX_CANDIDATES]]
+        return np.sort(matched)
+
+class SearchEngine:
+    """
+    Fuzzy name suggestions over the Pokémon index.
+
+    Choices (species and variant names) are built once per filter
+    combination and kept in an LRU cache, shared by every session (the
+    cache is guarded by a lock). A query is first narrowed down
+    with the trigram index and the candidates are scored with
+    rapidfuzz.process.cdist (partial_ratio); the other choices whose score
+    bound could still place them in the top results are then scored too,
+    so suggestions are those of process.extract over every choice.
+    """
+
+    def __init__(self, index, cache_size=32, workers=-1):
+        self.index = index
+        self.cache_size = cache_size
+        self.workers = workers
+        self._choices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def choices(self, types=(), regions=()):
+        """
+        Returns the SearchChoices for a filter combination, building it on first use.
+        """
+        key = (tuple(sorted(types)), tuple(sorted(regions)))
+        with self._lock:
+            choices = self._choices.get(key)
+            if choices is not None:
+                self._choices.move_to_end(key)
+                return choices
+
+        _, ordered_positions = self.index.filter(*key)
+        names = {}
+        for pokemon in self.index.select(ordered_positions):
+            names.setdefault(pokemon["name"], None)
+            for name in variant_names(pokemon):
+                names.setdefault(name, None)
+        choices = SearchChoices(list(names))
+        with self._lock:
+            self._choices[key] = choices
+            self._choices.move_to_end(key)
+            if len(self._choices) > self.cache_size:
+                self._choices.popitem(last=False)
+        return choices
+
+    def suggest(self, query, types=(), regions=(), limit=5, score_cutoff=50):
+        """
+        Returns up to `limit` names matching `query`, best first.
+
+        :param query: The text typed by the user.
+        :param types: Selected type filters.
+        :param regions: Selected region filters.
+        :param limit: Maximum number of suggestions.
+        :param score_cutoff: Minimum partial_ratio score (0-100).
+        :return: List of names.
+        """
+        choices = self.choices(types, regions)
+        query = normalize(query)
+        if not query or not choices.names:
+            return []
+
+        candidates = choices.candidates(query, limit)
+        if candidates is None:
+            candidates = np.arange(len(choices.names))
+        scores = self._scores(query, choices, candidates, score_cutoff)
+        if len(candidates) < len(choices.names):
+            # The prefilter picks the likely matches only. Every other choice
+            # that could still reach the top `limit` is scored as well, so
+            # the result is the same as scoring every choice.
+            hits = scores[scores > 0]
+            threshold = score_cutoff if len(hits) < limit else np.partition(hits, -limit)[-limit]
+            bounds = choices.score_bounds(query)
+            bounds[candidates] = 0
+            extra = np.flatnonzero(bounds >= threshold - 1e-3)
+            if len(extra):
+                candidates = np.concatenate((candidates, extra))
+                scores = np.concatenate((scores, self._scores(query, choices, extra, score_cutoff)))
+
+        hits = np.flatnonzero(scores)
+        # Best score first, ties in database order.
+        best = hits[np.lexsort((candidates[hits], -scores[hits]))][:limit]
+        return [choices.names[candidates[i]] for i in best]
+
+    def _scores(self, query, choices, indices, score_cutoff):
+        """partial_ratio of `query` against the choices at `indices`; 0 below `score_cutoff`."""
+        texts = [choices.normalized[i] for i in indices]
+        # Threads only pay off when the prefilter could not narrow the choices down.
+        workers = self.workers if len(texts) > MAX_CANDIDATES else 1
+        return process.cdist(
+            [query], texts, scorer=fuzz.partial_ratio, processor=None,
+            score_cutoff=score_cutoff, workers=workers, dtype=np.float32,
+        )[0]
+
+@st.cache_resource(max_entries=1)
+def load_search_engine(version=None):
+    """
+    Builds the search engine once per process and dataset version over the
+    lookup index.
+    """
+    return SearchEngine(load_index(version))
@@ -0,0 +1,371 @@
+"""
+Compact binary snapshot of combined_database.json.
+
+Layout (little-endian), every section aligned to 8 bytes:
+
+    b"PKVSNAP1" | u32 header length | JSON header | sections...
+
+The JSON header lists each section's offset and length plus the stat order.
+Sections:
+
+    strings_index  u32[n + 1]   offsets into strings_data (interned strings)
+    strings_data   utf-8 bytes
+    pokemon        u32[6] per Pokémon: dex, name, first variant, variant count,
+                   evolution chain blob, extra-fields blob
+    variants       u32[7] per variant: name, image_url, first type, type count,
+                   abilities blob, sets blob, extra-fields blob
+    stats          u16[len(stat_names)] per variant (MISSING_STAT if absent)
+    type_ids       u32 string ids referenced by the variants
+    blobs_index    u64[n + 1]   offsets into blobs_data
+    blobs_data     JSON documents (identical blobs are stored once)
+
+The file is memory-mapped and decoded lazily: records are exposed as
+read-only mappings that only decode a string or blob when it is accessed,
+so opening a snapshot costs one small header parse regardless of its size.
+"""
+import json
+import mmap
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+
+MAGIC = b"PKVSNAP1"
+STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+NO_BLOB = 0xFFFFFFFF
+MISSING_STAT = 0xFFFF
+POKEMON_FIELDS = 6
+VARIANT_FIELDS = 7
+
+if sys.byteorder != "little":
+    raise ImportError("Snapshots are read with native memoryview casts and need a little-endian host.")
+
+
+class _StringTable:
+    """Interns strings while building a snapshot."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, value):
+        if value is None:
+            return NO_BLOB
+        if value not in self.ids:
+            self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return self.ids[value]
+
+
+class _BlobTable:
+    """Stores JSON blobs while building a snapshot, deduplicating identical ones."""
+
+    def __init__(self):
+        self.ids = {}
+        self.blobs = []
+
+    def add(self, value):
+        if value is None:
+            return NO_BLOB
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if blob not in self.ids:
+            self.ids[blob] = len(self.blobs)
+            self.blobs.append(blob)
+        return self.ids[blob]
+
+
+def _offsets(chunks, typecode):
+    """Packs the running offsets of `chunks` (n + 1 entries)."""
+    offsets = [0]
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+    return struct.pack(f"<{len(offsets)}{typecode}", *offsets)
+
+
+def write_snapshot(database, path):
+    """
+    Compiles a combined database dictionary into a binary snapshot.
+
+    :param database: The parsed combined_database.json.
+    :param path: Where to write the snapshot.
+    """
+    strings, blobs = _StringTable(), _BlobTable()
+    pokemon_rows, variant_rows, stat_values, type_ids = [], [], [], []
+
+    for pokemon in database.get("pokemon", []):
+        dex_number = pokemon.get("dex_number")
+        if not isinstance(dex_number, int) or not 0 <= dex_number < 2 ** 32:
+            raise ValueError(f"{pokemon.get('name')!r} has no valid dex number ({dex_number!r}); snapshots require one")
+        variants = pokemon.get("variants", [])
+        extra = {k: v for k, v in pokemon.items() if k not in ("dex_number", "name", "variants", "evolution_chain")}
+        pokemon_rows += [
+            dex_number,
+            strings.add(pokemon["name"]),
+            len(variant_rows) // VARIANT_FIELDS,
+            len(variants),
+            blobs.add(pokemon.get("evolution_chain")),
+            blobs.add(extra or None),
+        ]
+        for variant in variants:
+            types = variant.get("types", [])
+            base_stats = variant.get("base_stats", {})
+            extra = {k: v for k, v in variant.items()
+                     if k not in ("name", "image_url", "types", "base_stats", "abilities", "sets")}
+            unknown_stats = set(base_stats) - set(STAT_NAMES)
+            if unknown_stats:
+                extra["base_stats"] = base_stats
+            variant_rows += [
+                strings.add(variant["name"]),
+                strings.add(variant.get("image_url")),
+                len(type_ids),
+                len(types),
+                blobs.add(variant.get("abilities")),
+                blobs.add(variant.get("sets")),
+                blobs.add(extra or None),
+            ]
+            type_ids += [strings.add(t) for t in types]
+            stat_values += [base_stats.get(stat, MISSING_STAT) for stat in STAT_NAMES]
+
+    top_level = {k: v for k, v in database.items() if k != "pokemon"}
+    extra_blob = blobs.add(top_level or None)
+
+    encoded_strings = [s.encode("utf-8") for s in strings.strings]
+    sections = {
+        "strings_index": _offsets(encoded_strings, "I"),
+        "strings_data": b"".join(encoded_strings),
+        "pokemon": struct.pack(f"<{len(pokemon_rows)}I", *pokemon_rows),
+        "variants": struct.pack(f"<{len(variant_rows)}I", *variant_rows),
+        "stats": struct.pack(f"<{len(stat_values)}H", *stat_values),
+        "type_ids": struct.pack(f"<{len(type_ids)}I", *type_ids),
+        "blobs_index": _offsets(blobs.blobs, "Q"),
+        "blobs_data": b"".join(blobs.blobs),
+    }
+
+    # The header length depends on the offsets it contains, so lay out the
+    # sections behind a fixed-size header placeholder, growing it if needed.
+    header = {"stat_names": STAT_NAMES, "extra_blob": extra_blob, "sections": {}}
+    header_size = 4096
+    while True:
+        offset = _align(len(MAGIC) + 4 + header_size)
+        for name, payload in sections.items():
+            header["sections"][name] = [offset, len(payload)]
+            offset = _align(offset + len(payload))
+        header_bytes = json.dumps(header).encode("utf-8")
+        if len(header_bytes) <= header_size:
+            break
+        header_size *= 2
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", header_size))
+        f.write(header_bytes.ljust(header_size, b" "))
+        for name, payload in sections.items():
+            f.seek(header["sections"][name][0])
+            f.write(payload)
+        f.truncate(offset)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class Snapshot:
+    """Memory-mapped snapshot file with lazily decoded strings and blobs."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a PokeVision snapshot")
+        (header_size,) = struct.unpack_from("<I", view, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(view[start:start + header_size]))
+
+        def section(name, typecode):
+            offset, length = header["sections"][name]
+            chunk = view[offset:offset + length]
+            return chunk.cast(typecode) if typecode else chunk
+
+        self.stat_names = header["stat_names"]
+        self.extra_blob = header["extra_blob"]
+        self.strings_index = section("strings_index", "I")
+        self.strings_data = section("strings_data", None)
+        self.pokemon_rows = section("pokemon", "I")
+        self.variant_rows = section("variants", "I")
+        self.stats = section("stats", "H")
+        self.type_ids = section("type_ids", "I")
+        self.blobs_index = section("blobs_index", "Q")
+        self.blobs_data = section("blobs_data", None)
+        self._strings = {}
+
+    def string(self, string_id):
+        if string_id == NO_BLOB:
+            return None
+        value = self._strings.get(string_id)
+        if value is None:
+            start, end = self.strings_index[string_id], self.strings_index[string_id + 1]
+            value = self._strings[string_id] = str(self.strings_data[start:end], "utf-8")
+        return value
+
+    def blob(self, blob_id):
+        if blob_id == NO_BLOB:
+            return None
+        start, end = self.blobs_index[blob_id], self.blobs_index[blob_id + 1]
+        return json.loads(bytes(self.blobs_data[start:end]))
+
+
+class SnapshotVariant(Mapping):
+    """Read-only, lazily decoded variant record."""
+
+    __slots__ = ("_snapshot", "_row", "_index", "_cache")
+
+    def __init__(self, snapshot, index):
+        self._snapshot = snapshot
+        self._index = index
+        self._row = snapshot.variant_rows[index * VARIANT_FIELDS:(index + 1) * VARIANT_FIELDS].tolist()
+        self._cache = {}
+
+    def _extra(self):
+        if "_extra" not in self._cache:
+            self._cache["_extra"] = self._snapshot.blob(self._row[6]) or {}
+        return self._cache["_extra"]
+
+    def _keys(self):
+        keys = ["name", "types", "base_stats", "abilities", "image_url"]
+        if self._row[5] != NO_BLOB:
+            keys.append("sets")
+        return keys + [k for k in self._extra() if k not in keys]
+
+    def __getitem__(self, key):
+        if key in self._cache:
+            return self._cache[key]
+        snapshot, row = self._snapshot, self._row
+        if key == "name":
+            value = snapshot.string(row[0])
+        elif key == "image_url":
+            value = snapshot.string(row[1])
+        elif key == "types":
+            value = [snapshot.string(t) for t in snapshot.type_ids[row[2]:row[2] + row[3]]]
+        elif key == "base_stats" and "base_stats" not in self._extra():
+            width = len(snapshot.stat_names)
+            values = snapshot.stats[self._index * width:(self._index + 1) * width]
+            value = {name: v for name, v in zip(snapshot.stat_names, values) if v != MISSING_STAT}
+        elif key == "abilities":
+            value = snapshot.blob(row[4]) or []
+        elif key == "sets" and row[5] != NO_BLOB:
+            value = snapshot.blob(row[5])
+        else:
+            value = self._extra()[key]
+        self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+
+class SnapshotPokemon(Mapping):
+    """Read-only, lazily decoded Pokémon record."""
+
+    __slots__ = ("_snapshot", "_row", "_cache")
+
+    def __init__(self, snapshot, index):
+        self._snapshot = snapshot
+        self._row = snapshot.pokemon_rows[index * POKEMON_FIELDS:(index + 1) * POKEMON_FIELDS].tolist()
+        self._cache = {}
+
+    def _extra(self):
+        if "_extra" not in self._cache:
+            self._cache["_extra"] = self._snapshot.blob(self._row[5]) or {}
+        return self._cache["_extra"]
+
+    def _keys(self):
+        return ["dex_number", "name", "variants", "evolution_chain"] + list(self._extra())
+
+    def __getitem__(self, key):
+        if key in self._cache:
+            return self._cache[key]
+        snapshot, row = self._snapshot, self._row
+        if key == "dex_number":
+            return row[0]
+        if key == "name":
+            value = snapshot.string(row[1])
+        elif key == "variants":
+            value = [SnapshotVariant(snapshot, i) for i in range(row[2], row[2] + row[3])]
+        elif key == "evolution_chain":
+            value = snapshot.blob(row[4]) or []
+        else:
+            value = self._extra()[key]
+        self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+
+class SnapshotPokemonList(Sequence):
+    """Sequence of Pokémon records, created on first access."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._items = [None] * (len(snapshot.pokemon_rows) // POKEMON_FIELDS)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = SnapshotPokemon(self._snapshot, index % len(self._items))
+        return item
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SnapshotDatabase(Mapping):
+    """
+    Read-only view of a snapshot with the same shape as combined_database.json.
+    It is read-only, so st.cache_resource shares one instance between
+    sessions; pickling only stores the path and just reopens the memory map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = Snapshot(path)
+        self._pokemon = SnapshotPokemonList(self._snapshot)
+        self._extra = None
+
+    def _top_level(self):
+        if self._extra is None:
+            self._extra = self._snapshot.blob(self._snapshot.extra_blob) or {}
+        return self._extra
+
+    def __getitem__(self, key):
+        if key == "pokemon":
+            return self._pokemon
+        return self._top_level()[key]
+
+    def __iter__(self):
+        return iter(["pokemon"] + list(self._top_level()))
+
+    def __len__(self):
+        return 1 + len(self._top_level())
+
+    def __reduce__(self):
+        return (SnapshotDatabase, (self.path,))
+
+
+def open_snapshot(path):
+    """
+    Opens a snapshot written by write_snapshot.
+
+    :param path: Snapshot file path.
+    :return: A SnapshotDatabase.
+    """
+    return SnapshotDatabase(path)
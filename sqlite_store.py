@@ -0,0 +1,377 @@
+"""
+SQLite form of combined_database.json.
+
+Tables (one row per list element, `slot` keeps the original order):
+
+    pokemon        position, dex_number, name, name_key, region, extra
+    pokemon_types  position, slot, type        types used by the type filter
+    variants       id, position, slot, name, name_key, image_url, extra
+    variant_types  variant_id, slot, type
+    stats          variant_id, slot, stat, value
+    abilities      variant_id, slot, name, description, extra
+    sets           variant_id, slot, tier, name, data
+    evolutions     position, slot, name, name_key, extra
+    moves          name, type, damage_class
+    metadata       key, value                  top-level keys other than "pokemon"
+
+`name_key` is the lowercase name used for lookups, `extra` holds any other
+fields of the record as JSON so that records are rebuilt unchanged.
+"""
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from urllib.parse import quote
+
+from records import Pokemon, Vocabulary
+
+SCHEMA = """
+CREATE TABLE pokemon (
+    position INTEGER PRIMARY KEY,
+    dex_number INTEGER,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    region TEXT,
+    extra TEXT
+);
+CREATE TABLE pokemon_types (position INTEGER NOT NULL, slot INTEGER NOT NULL, type TEXT NOT NULL);
+CREATE TABLE variants (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    image_url TEXT,
+    extra TEXT
+);
+CREATE TABLE variant_types (variant_id INTEGER NOT NULL, slot INTEGER NOT NULL, type TEXT NOT NULL);
+CREATE TABLE stats (variant_id INTEGER NOT NULL, slot INTEGER NOT NULL, stat TEXT NOT NULL, value INTEGER);
+CREATE TABLE abilities (
+    variant_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    name TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE TABLE sets (variant_id INTEGER NOT NULL, slot INTEGER NOT NULL, tier TEXT NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL);
+CREATE TABLE evolutions (position INTEGER NOT NULL, slot INTEGER NOT NULL, name TEXT NOT NULL, name_key TEXT NOT NULL, extra TEXT);
+CREATE TABLE moves (name TEXT PRIMARY KEY, type TEXT, damage_class TEXT);
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+
+CREATE INDEX pokemon_name ON pokemon (name_key, position);
+CREATE INDEX pokemon_dex ON pokemon (dex_number, position);
+CREATE INDEX pokemon_region ON pokemon (region, position);
+CREATE INDEX pokemon_types_type ON pokemon_types (type, position);
+CREATE INDEX pokemon_types_position ON pokemon_types (position, slot);
+CREATE INDEX variants_name ON variants (name_key, id);
+CREATE INDEX variants_position ON variants (position, slot);
+CREATE INDEX variant_types_variant ON variant_types (variant_id, slot);
+CREATE INDEX variant_types_type ON variant_types (type);
+CREATE INDEX stats_variant ON stats (variant_id, slot);
+CREATE INDEX abilities_variant ON abilities (variant_id, slot);
+CREATE INDEX abilities_name ON abilities (name);
+CREATE INDEX sets_variant ON sets (variant_id, slot);
+CREATE INDEX sets_tier ON sets (tier);
+CREATE INDEX evolutions_position ON evolutions (position, slot);
+CREATE INDEX evolutions_name ON evolutions (name_key);
+"""
+
+POKEMON_FIELDS = ("dex_number", "name", "region", "variants", "evolution_chain")
+VARIANT_FIELDS = ("name", "types", "base_stats", "abilities", "image_url", "sets")
+ABILITY_FIELDS = ("name", "description")
+
+# Number of full Pokémon records kept in memory per process.
+RECORD_CACHE_SIZE = 128
+
+def _extra(record, known_fields):
+    extra = {key: value for key, value in record.items() if key not in known_fields}
+    return json.dumps(extra, ensure_ascii=False) if extra else None
+
+def write_sqlite_database(database, summaries, path, move_types=None):
+    """
+    Writes the database to a new SQLite file. The file is built next to
+    `path` and moved into place once complete.
+
+    :param database: The combined database.
+    :param summaries: Summary record of every Pokémon, in the same order;
+        their "types" fill the pokemon_types table used for filtering.
+    :param path: Path of the SQLite file.
+    :param move_types: {move name: (type, damage class)} for the moves table.
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    connection.executescript(SCHEMA)
+
+    variant_id = 0
+    with connection:
+        for position, (pokemon, summary) in enumerate(zip(database.get("pokemon", []), summaries)):
+            connection.execute(
+                "INSERT INTO pokemon VALUES (?, ?, ?, ?, ?, ?)",
+                (position, pokemon.get("dex_number"), pokemon["name"], pokemon["name"].lower(),
+                 pokemon.get("region"), _extra(pokemon, POKEMON_FIELDS)),
+            )
+            connection.executemany(
+                "INSERT INTO pokemon_types VALUES (?, ?, ?)",
+                [(position, slot, t) for slot, t in enumerate(summary["types"])],
+            )
+            connection.executemany(
+                "INSERT INTO evolutions VALUES (?, ?, ?, ?, ?)",
+                [(position, slot, evo["name"], evo["name"].lower(), _extra(evo, ("name",)))
+                 for slot, evo in enumerate(pokemon.get("evolution_chain", []))],
+            )
+
+            for slot, variant in enumerate(pokemon.get("variants", [])):
+                connection.execute(
+                    "INSERT INTO variants VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (variant_id, position, slot, variant["name"], variant["name"].lower(),
+                     variant.get("image_url"), _extra(variant, VARIANT_FIELDS)),
+                )
+                connection.executemany(
+                    "INSERT INTO variant_types VALUES (?, ?, ?)",
+                    [(variant_id, i, t) for i, t in enumerate(variant.get("types", []))],
+                )
+                connection.executemany(
+                    "INSERT INTO stats VALUES (?, ?, ?, ?)",
+                    [(variant_id, i, stat, value) for i, (stat, value) in enumerate(variant.get("base_stats", {}).items())],
+                )
+                connection.executemany(
+                    "INSERT INTO abilities VALUES (?, ?, ?, ?, ?)",
+                    [(variant_id, i, ability.get("name"), ability.get("description"), _extra(ability, ABILITY_FIELDS))
+                     for i, ability in enumerate(variant.get("abilities", []))],
+                )
+                rows = []
+                for tier, tier_sets in variant.get("sets", {}).items():
+                    for set_name, set_data in tier_sets.items():
+                        rows.append((variant_id, len(rows), tier, set_name, json.dumps(set_data, ensure_ascii=False)))
+                connection.executemany("INSERT INTO sets VALUES (?, ?, ?, ?, ?)", rows)
+                variant_id += 1
+
+        connection.executemany(
+            "INSERT INTO moves VALUES (?, ?, ?)",
+            [(name, move_type, damage_class) for name, (move_type, damage_class) in (move_types or {}).items()],
+        )
+        connection.executemany(
+            "INSERT INTO metadata VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for key, value in database.items() if key != "pokemon"],
+        )
+    connection.execute("ANALYZE")
+    connection.close()
+    os.replace(tmp_path, path)
+
+class SQLiteDatabase:
+    """
+    Read-only query backend over a file written by write_sqlite_database.
+
+    One instance is meant to be shared by every session of the app. Each
+    thread gets its own read-only connection, opened on first use; the file
+    is opened as immutable since rebuilds replace it instead of writing to it.
+
+    It answers the same queries as data.PokemonIndex (filter, select and
+    the position lookups) and loads full Pokémon records like the detail
+    stores, with filter results and records cached in bounded LRU caches.
+    """
+
+    def __init__(self, path, cache_size=RECORD_CACHE_SIZE):
+        self.path = path
+        self._uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+        self._local = threading.local()
+        self.vocabulary = Vocabulary()
+        # Files built by earlier versions of build_sqlite.py lack the newer tables.
+        self.tables = {row[0] for row in self._query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.types = [row[0] for row in self._query("SELECT DISTINCT type FROM pokemon_types ORDER BY type")]
+        self.regions = [row[0] for row in self._query(
+            "SELECT DISTINCT region FROM pokemon WHERE region IS NOT NULL AND region != '' ORDER BY region")]
+        self._filter = lru_cache(maxsize=256)(self._compute_filter)
+        self._load = lru_cache(maxsize=cache_size)(self._read)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self._uri, uri=True)
+        return connection
+
+    def _query(self, sql, parameters=()):
+        return self._connection().execute(sql, parameters).fetchall()
+
+    def _compute_filter(self, types, regions):
+        sql = "SELECT position FROM pokemon WHERE 1"
+        parameters = []
+        if types:
+            sql += " AND position IN (SELECT position FROM pokemon_types WHERE type IN (SELECT value FROM json_each(?)))"
+            parameters.append(json.dumps(types))
+        if regions:
+            sql += " AND region IN (SELECT value FROM json_each(?))"
+            parameters.append(json.dumps(regions))
+        ordered = tuple(row[0] for row in self._query(sql + " ORDER BY position", parameters))
+        return frozenset(ordered), ordered
+
+    def filter(self, types=(), regions=()):
+        """
+        Returns the positions of the Pokémon matching any of the selected
+        types and any of the selected regions (an empty selection matches all).
+
+        :return: (frozenset of positions, the same positions in database order)
+        """
+        return self._filter(tuple(sorted(types)), tuple(sorted(regions)))
+
+    def select(self, ordered_positions):
+        """Returns the summaries of the Pokémon at the given positions."""
+        selected = json.dumps(list(ordered_positions))
+        summaries = {}
+        for position, dex_number, name, region in self._query(
+            "SELECT position, dex_number, name, region FROM pokemon "
+            "WHERE position IN (SELECT value FROM json_each(?)) ORDER BY position", (selected,)
+        ):
+            summaries[position] = {"dex_number": dex_number, "name": name, "types": [], "region": region, "variant_names": []}
+        for position, t in self._query(
+            "SELECT position, type FROM pokemon_types "
+            "WHERE position IN (SELECT value FROM json_each(?)) ORDER BY position, slot", (selected,)
+        ):
+            summaries[position]["types"].append(t)
+        for position, name in self._query(
+            "SELECT position, name FROM variants "
+            "WHERE position IN (SELECT value FROM json_each(?)) ORDER BY position, slot", (selected,)
+        ):
+            summaries[position]["variant_names"].append(name)
+        return [summaries[position] for position in ordered_positions if position in summaries]
+
+    def position_by_dex(self, dex_number, positions=None):
+        """Returns the position of the Pokémon with this dex number if it is within `positions`."""
+        # SQLite integers are 64-bit; larger numbers cannot be bound, and match nothing anyway.
+        if not 0 < dex_number < 2 ** 63:
+            return None
+        row = self._query("SELECT MIN(position) FROM pokemon WHERE dex_number = ?", (dex_number,))[0]
+        if row[0] is None or (positions is not None and row[0] not in positions):
+            return None
+        return row[0]
+
+    def position_by_name(self, name, positions=None):
+        """Returns the position of the Pokémon (or variant's Pokémon) with this exact name if it is within `positions`."""
+        row = self._query(
+            "SELECT COALESCE((SELECT MIN(position) FROM pokemon WHERE name_key = ?1),"
+            " (SELECT position FROM variants WHERE name_key = ?1 ORDER BY id LIMIT 1))",
+            (name.lower(),),
+        )[0]
+        if row[0] is None or (positions is not None and row[0] not in positions):
+            return None
+        return row[0]
+
+    def find_by_dex(self, dex_number, positions=None):
+        """Returns the summary of the Pokémon with this dex number if it is within `positions`."""
+        position = self.position_by_dex(dex_number, positions)
+        return None if position is None else self.select([position])[0]
+
+    def find_by_name(self, name, positions=None):
+        """Returns the summary of the Pokémon (or variant's Pokémon) with this exact name if it is within `positions`."""
+        position = self.position_by_name(name, positions)
+        return None if position is None else self.select([position])[0]
+
+    def resolve_evolution_chain(self, evolution_chain):
+        """
+        Returns the position of every member of an evolution chain, or None
+        for members that are not in the database.
+        """
+        names = [evo["name"].lower() for evo in evolution_chain]
+        found = dict(self._query(
+            "SELECT key, COALESCE((SELECT MIN(position) FROM pokemon WHERE name_key = key),"
+            " (SELECT position FROM variants WHERE name_key = key ORDER BY id LIMIT 1))"
+            " FROM (SELECT DISTINCT value AS key FROM json_each(?))", (json.dumps(names),)
+        ))
+        return [found.get(name) for name in names]
+
+    def variant_rows(self):
+        """
+        Returns the row of every variant used by whole-dataset queries, like
+        detail_store.variant_rows.
+        """
+        rows = {}
+        for variant_id, position, name in self._query("SELECT id, position, name FROM variants ORDER BY id"):
+            rows[variant_id] = {"position": position, "name": name, "types": [], "base_stats": {}, "tiers": []}
+        for variant_id, t in self._query("SELECT variant_id, type FROM variant_types ORDER BY variant_id, slot"):
+            rows[variant_id]["types"].append(t)
+        for variant_id, stat, value in self._query("SELECT variant_id, stat, value FROM stats ORDER BY variant_id, slot"):
+            rows[variant_id]["base_stats"][stat] = value
+        for variant_id, tier in self._query(
+            "SELECT variant_id, tier FROM sets GROUP BY variant_id, tier ORDER BY variant_id, MIN(slot)"
+        ):
+            rows[variant_id]["tiers"].append(tier)
+        return list(rows.values())
+
+    def move_types(self):
+        """Returns {move name: (type, damage class)}; empty for files without a moves table."""
+        if "moves" not in self.tables:
+            return {}
+        return {name: (move_type, damage_class)
+                for name, move_type, damage_class in self._query("SELECT name, type, damage_class FROM moves")}
+
+    def metadata(self, key):
+        """Returns a top-level database value other than "pokemon", or None."""
+        if "metadata" not in self.tables:
+            return None
+        row = self._query("SELECT value FROM metadata WHERE key = ?", (key,))
+        return json.loads(row[0][0]) if row else None
+
+    def _read(self, position):
+        row = self._query("SELECT dex_number, name, region, extra FROM pokemon WHERE position = ?", (position,))
+        if not row:
+            raise IndexError(position)
+        dex_number, name, region, extra = row[0]
+        pokemon = {"dex_number": dex_number, "name": name}
+        if region is not None:
+            pokemon["region"] = region
+
+        variants = {}
+        for variant_id, variant_name, image_url, variant_extra in self._query(
+            "SELECT id, name, image_url, extra FROM variants WHERE position = ? ORDER BY slot", (position,)
+        ):
+            variants[variant_id] = {"name": variant_name, "types": [], "base_stats": {}, "abilities": [], "image_url": image_url}
+            if variant_extra:
+                variants[variant_id].update(json.loads(variant_extra))
+        ids = json.dumps(list(variants))
+        for variant_id, t in self._query(
+            "SELECT variant_id, type FROM variant_types WHERE variant_id IN (SELECT value FROM json_each(?)) "
+            "ORDER BY variant_id, slot", (ids,)
+        ):
+            variants[variant_id]["types"].append(t)
+        for variant_id, stat, value in self._query(
+            "SELECT variant_id, stat, value FROM stats WHERE variant_id IN (SELECT value FROM json_each(?)) "
+            "ORDER BY variant_id, slot", (ids,)
+        ):
+            variants[variant_id]["base_stats"][stat] = value
+        for variant_id, ability_name, description, ability_extra in self._query(
+            "SELECT variant_id, name, description, extra FROM abilities WHERE variant_id IN (SELECT value FROM json_each(?)) "
+            "ORDER BY variant_id, slot", (ids,)
+        ):
+            ability = {"name": ability_name, "description": description}
+            if ability_extra:
+                ability.update(json.loads(ability_extra))
+            variants[variant_id]["abilities"].append(ability)
+        for variant_id, tier, set_name, data in self._query(
+            "SELECT variant_id, tier, name, data FROM sets WHERE variant_id IN (SELECT value FROM json_each(?)) "
+            "ORDER BY variant_id, slot", (ids,)
+        ):
+            variants[variant_id].setdefault("sets", {}).setdefault(tier, {})[set_name] = json.loads(data)
+        pokemon["variants"] = list(variants.values())
+
+        pokemon["evolution_chain"] = []
+        for evo_name, evo_extra in self._query(
+            "SELECT name, extra FROM evolutions WHERE position = ? ORDER BY slot", (position,)
+        ):
+            evo = {"name": evo_name}
+            if evo_extra:
+                evo.update(json.loads(evo_extra))
+            pokemon["evolution_chain"].append(evo)
+
+        if extra:
+            pokemon.update(json.loads(extra))
+        return Pokemon.from_dict(pokemon, self.vocabulary)
+
+    def load(self, position):
+        """
+        Returns the read-only Pokemon record at `position`, shared with
+        other callers.
+        """
+        return self._load(position)
@@ -0,0 +1,241 @@
+"""
+Final stats of competitive sets and speed tiers.
+
+A set's stats at a level follow the main-series formula:
+
+    HP     = floor((2 * base + IV + floor(EV / 4)) * level / 100) + level + 10
+    others = floor((floor((2 * base + IV + floor(EV / 4)) * level / 100) + 5) * nature)
+
+with nature 1.1 for the stat the nature raises, 0.9 for the one it lowers
+and 1 otherwise (a base HP of 1 always gives 1 HP). calculate_stats
+evaluates it for any number of sets in one NumPy batch. A set is computed
+with its first nature and its first EV and IV spreads, whether or not it is
+normalized (see competitive_sets); IVs it leaves out are 31 and EVs 0.
+
+database_construction/build_set_stats.py stores the stats of every set at
+LEVELS next to its other fields,
+
+    "stats": {"50": {"hp": 151, "atk": 58, ...}, "100": {...}}    in STAT_ORDER
+
+and the Speed of every set of each tier, sorted, under "speed_tiers":
+
+    {tier: {level: {"speeds": [speed, ...],                      ascending
+                    "sets": [[variant name, set name], ...]}}}    in the same order
+
+SpeedTiers answers "outspeeds" queries with a binary search over those
+arrays.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from competitive_sets import STAT_LABELS, STAT_ORDER
+from data import load_details
+from snapshot import STAT_NAMES
+
+LEVELS = (50, 100)
+DEFAULT_IV = 31
+
+# Speed stat stages offered by the outspeed queries; a stage of n multiplies
+# Speed by (2 + n) / 2, rounded down.
+BOOST_STAGES = (1, 2)
+
+# (raised stat, lowered stat) of every nature, in PokeAPI stat names. Natures
+# fetched into the database (database["natures"]) take precedence.
+NATURES = {
+    "hardy": (None, None), "docile": (None, None), "serious": (None, None), "bashful": (None, None),
+    "quirky": (None, None),
+    "lonely": ("attack", "defense"), "brave": ("attack", "speed"), "adamant": ("attack", "special-attack"),
+    "naughty": ("attack", "special-defense"),
+    "bold": ("defense", "attack"), "relaxed": ("defense", "speed"), "impish": ("defense", "special-attack"),
+    "lax": ("defense", "special-defense"),
+    "timid": ("speed", "attack"), "hasty": ("speed", "defense"), "jolly": ("speed", "special-attack"),
+    "naive": ("speed", "special-defense"),
+    "modest": ("special-attack", "attack"), "mild": ("special-attack", "defense"),
+    "quiet": ("special-attack", "speed"), "rash": ("special-attack", "special-defense"),
+    "calm": ("special-defense", "attack"), "gentle": ("special-defense", "defense"),
+    "sassy": ("special-defense", "speed"), "careful": ("special-defense", "special-attack"),
+}
+
+SPEED = STAT_ORDER.index("spe")
+
+def nature_multipliers(natures=None):
+    """
+    Returns {nature name: multipliers in tenths (9, 10 or 11) per stat in
+    STAT_ORDER}, from NATURES updated with the fetched `natures` (entries
+    of database["natures"]).
+    """
+    table = dict(NATURES)
+    for nature in natures or []:
+        table[nature["name"].lower()] = (nature.get("increased_stat"), nature.get("decreased_stat"))
+    multipliers = {}
+    for name, (increased, decreased) in table.items():
+        row = np.full(len(STAT_ORDER), 10, dtype=np.int64)
+        # A neutral nature raises and lowers the same stat, or none.
+        if increased != decreased:
+            if increased in STAT_NAMES:
+                row[STAT_NAMES.index(increased)] = 11
+            if decreased in STAT_NAMES:
+                row[STAT_NAMES.index(decreased)] = 9
+        multipliers[name] = row
+    return multipliers
+
+def calculate_stats(base, evs, ivs, natures, levels=LEVELS):
+    """
+    Computes final stats for a batch of sets.
+
+    :param base: Base stats, an (n, 6) integer array in STAT_ORDER.
+    :param evs: EVs, (n, 6).
+    :param ivs: IVs, (n, 6).
+    :param natures: Nature multipliers in tenths, (n, 6).
+    :param levels: Levels to compute the stats at.
+    :return: An (len(levels), n, 6) integer array.
+    """
+    base = np.asarray(base, dtype=np.int64)
+    level = np.asarray(levels, dtype=np.int64)[:, None, None]
+    scaled = (2 * base + np.asarray(ivs) + np.asarray(evs) // 4)[None] * level // 100
+    stats = (scaled + 5) * np.asarray(natures)[None] // 10
+    stats[..., 0] = scaled[..., 0] + level[..., 0] + 10
+    stats[:, base[:, 0] == 1, 0] = 1
+    return stats
+
+def first_option(value):
+    """Returns the first option of a set field, normalized (a list) or not (a string, dict or list), or None."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def spread_row(spread, default):
+    """Returns a spread ({stat: value}) as a list in STAT_ORDER, `default` for the stats it leaves out."""
+    if not spread:
+        return [default] * len(STAT_ORDER)
+    return [spread.get(stat, default) for stat in STAT_ORDER]
+
+def calculate_set_stats(database, levels=LEVELS):
+    """
+    Computes the stats of every set in the database in one batch. Sets of
+    variants without all six base stats are left out.
+
+    :param database: The merged database.
+    :param levels: Levels to compute the stats at.
+    :return: ([(variant name, tier, set name, set), ...], stats array as
+        returned by calculate_stats, in the same order).
+    """
+    multipliers = nature_multipliers(database.get("natures"))
+    neutral = np.full(len(STAT_ORDER), 10, dtype=np.int64)
+    entries, base, evs, ivs, natures = [], [], [], [], []
+    for pokemon in database.get("pokemon", []):
+        for variant in pokemon.get("variants", []):
+            base_stats = variant.get("base_stats", {})
+            if not variant.get("sets") or any(stat not in base_stats for stat in STAT_NAMES):
+                continue
+            base_row = [base_stats[stat] for stat in STAT_NAMES]
+            for tier, tier_sets in variant["sets"].items():
+                for set_name, set_data in tier_sets.items():
+                    entries.append((variant["name"], tier, set_name, set_data))
+                    base.append(base_row)
+                    evs.append(spread_row(first_option(set_data.get("evs")), 0))
+                    ivs.append(spread_row(first_option(set_data.get("ivs")), DEFAULT_IV))
+                    nature = first_option(set_data.get("nature"))
+                    natures.append(multipliers.get(nature.lower() if nature else None, neutral))
+    if not entries:
+        return entries, np.zeros((len(levels), 0, len(STAT_ORDER)), dtype=np.int64)
+    return entries, calculate_stats(base, evs, ivs, natures, levels)
+
+def build_speed_tiers(entries, stats, levels=LEVELS):
+    """
+    Sorts the Speed of every set by tier, in the "speed_tiers" layout
+    described above.
+
+    :param entries: Sets as returned by calculate_set_stats.
+    :param stats: Their stats, as returned by calculate_set_stats.
+    """
+    rows_by_tier = {}
+    for row, (variant_name, tier, set_name, _) in enumerate(entries):
+        rows_by_tier.setdefault(tier, []).append(row)
+    speed_tiers = {}
+    for tier, rows in rows_by_tier.items():
+        speed_tiers[tier] = {}
+        for i, level in enumerate(levels):
+            speeds = stats[i, rows, SPEED]
+            order = np.argsort(speeds, kind="stable")
+            speed_tiers[tier][str(level)] = {
+                "speeds": speeds[order].tolist(),
+                "sets": [[entries[rows[j]][0], entries[rows[j]][2]] for j in order],
+            }
+    return speed_tiers
+
+def add_set_stats(database, levels=LEVELS):
+    """
+    Stores the stats of every set under its "stats" key (before "html") and
+    the speed tiers under database["speed_tiers"].
+
+    :return: Number of sets computed.
+    """
+    entries, stats = calculate_set_stats(database, levels)
+    for row, (_, _, _, set_data) in enumerate(entries):
+        html = set_data.pop("html", None)
+        set_data["stats"] = {
+            str(level): dict(zip(STAT_ORDER, stats[i, row].tolist())) for i, level in enumerate(levels)
+        }
+        if html is not None:
+            set_data["html"] = html
+    database["speed_tiers"] = build_speed_tiers(entries, stats, levels)
+    return len(entries)
+
+def boosted(speeds, stage):
+    """Returns Speed after `stage` stat stages (a stage of 0 leaves it as is)."""
+    return speeds * (2 + stage) // 2
+
+class SpeedTiers:
+    """
+    The sorted Speed of every set of one tier at one level, with the Speed
+    after each of BOOST_STAGES precomputed (boosting keeps the order).
+    """
+
+    def __init__(self, table):
+        self.speeds = np.asarray(table["speeds"], dtype=np.int64)
+        self.sets = table["sets"]
+        self.boosted = {0: self.speeds, **{stage: boosted(self.speeds, stage) for stage in BOOST_STAGES}}
+        self._frame = None
+
+    def __len__(self):
+        return len(self.speeds)
+
+    def outspeeds(self, speed, stage=0):
+        """
+        Returns (slower, ties): how many sets of the tier are slower than,
+        and as fast as, a Speed of `speed` after `stage` stages.
+        """
+        speed = int(boosted(speed, stage))
+        slower = int(np.searchsorted(self.speeds, speed, side="left"))
+        return slower, int(np.searchsorted(self.speeds, speed, side="right")) - slower
+
+    def outsped_by(self, speed, stage=0):
+        """Returns how many sets of the tier are faster than `speed` after `stage` stages of their own."""
+        return len(self.speeds) - int(np.searchsorted(self.boosted[stage], speed, side="right"))
+
+    def frame(self):
+        """The tier as a DataFrame, fastest first, built once."""
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                STAT_LABELS["spe"]: self.speeds[::-1],
+                **{f"+{stage}": self.boosted[stage][::-1] for stage in BOOST_STAGES},
+                "Pokémon": [variant.capitalize() for variant, _ in reversed(self.sets)],
+                "Set": [set_name for _, set_name in reversed(self.sets)],
+            })
+        return self._frame
+
+@st.cache_resource(max_entries=1)
+def load_speed_tiers(version=None):
+    """
+    Builds {(tier, level): SpeedTiers} once per process and dataset version,
+    or returns None when the database has no speed_tiers section.
+    """
+    speed_tiers = load_details(version).metadata("speed_tiers")
+    if not speed_tiers:
+        return None
+    return {
+        (tier, int(level)): SpeedTiers(table)
+        for tier, levels in speed_tiers.items() for level, table in levels.items()
+    }
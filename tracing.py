@@ -0,0 +1,106 @@
+"""
+Timing spans for the app's reruns.
+
+app.py starts a Trace at the top of every rerun and wraps each unit of work
+(data loading, filtering, search, every view and tab) in span(). Spans nest,
+and are kept in the order they started:
+
+    with span("search"):
+        with span("fuzzy suggestions"):
+            ...
+
+Streamlit runs each session's script in its own thread, so the current trace
+is thread-local; span() outside a trace does nothing. Finished traces are
+kept in `recent_traces` (read by the debug panel through snapshot_traces(),
+and by benchmarks/bench_app.py) and, when the POKEVISION_TRACE_LOG environment variable names a file,
+appended to it as JSON lines.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# File finished traces are appended to; unset keeps them in memory only.
+TRACE_LOG = os.environ.get("POKEVISION_TRACE_LOG")
+# Number of finished traces kept in memory per process.
+RECENT_TRACES = 200
+
+recent_traces = deque(maxlen=RECENT_TRACES)
+_recent_lock = threading.Lock()
+_local = threading.local()
+_log_lock = threading.Lock()
+
+class Trace:
+    """
+    The spans of one rerun.
+
+    :param name: What is being traced, e.g. the view rendered.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self.spans = []
+        self.total_ms = None
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "started": self.started, "total_ms": self.total_ms, "spans": self.spans}
+
+def start_trace(name: str = "rerun") -> Trace:
+    """Starts the trace of this thread's rerun, replacing any unfinished one."""
+    _local.trace = Trace(name)
+    return _local.trace
+
+def current_trace():
+    """Returns this thread's trace in progress, or None."""
+    return getattr(_local, "trace", None)
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block as a span of the current trace."""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    record = {"name": name, "depth": trace._depth, "ms": None}
+    trace.spans.append(record)
+    trace._depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["ms"] = (time.perf_counter() - start) * 1000
+        trace._depth -= 1
+
+def finish_trace():
+    """
+    Ends this thread's trace, keeps it in `recent_traces` and logs it.
+
+    :return: The finished Trace, or None if none was started.
+    """
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.total_ms = trace.elapsed_ms()
+    with _recent_lock:
+        recent_traces.append(trace)
+    if TRACE_LOG:
+        with _log_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_dict()) + "\n")
+    return trace
+
+def snapshot_traces():
+    """
+    Returns a list of the traces in `recent_traces`, oldest first. Other
+    sessions' threads append to it, so read it through this copy.
+    """
+    with _recent_lock:
+        return list(recent_traces)
@@ -0,0 +1,168 @@
+"""
+Type effectiveness and team matchup analysis.
+
+CHART[attacking, defending] holds the damage multiplier of one attacking
+type against one defending type, in TYPES order. TypeMatchups precomputes
+the defensive multiplier vector of every type combination in the database,
+so that team weaknesses, move coverage and the ranking of candidate team
+members are array operations over those vectors.
+"""
+import re
+
+import numpy as np
+import streamlit as st
+
+from data import load_details, load_stat_matrix
+
+TYPES = [
+    "normal", "fire", "water", "electric", "grass", "ice", "fighting", "poison", "ground",
+    "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy",
+]
+TYPE_INDEX = {t: i for i, t in enumerate(TYPES)}
+
+# Multipliers other than 1, by attacking type.
+_EFFECTIVENESS = {
+    "normal": {"rock": 0.5, "ghost": 0, "steel": 0.5},
+    "fire": {"fire": 0.5, "water": 0.5, "grass": 2, "ice": 2, "bug": 2, "rock": 0.5, "dragon": 0.5, "steel": 2},
+    "water": {"fire": 2, "water": 0.5, "grass": 0.5, "ground": 2, "rock": 2, "dragon": 0.5},
+    "electric": {"water": 2, "electric": 0.5, "grass": 0.5, "ground": 0, "flying": 2, "dragon": 0.5},
+    "grass": {"fire": 0.5, "water": 2, "grass": 0.5, "poison": 0.5, "ground": 2, "flying": 0.5, "bug": 0.5,
+              "rock": 2, "dragon": 0.5, "steel": 0.5},
+    "ice": {"fire": 0.5, "water": 0.5, "grass": 2, "ice": 0.5, "ground": 2, "flying": 2, "dragon": 2, "steel": 0.5},
+    "fighting": {"normal": 2, "ice": 2, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2,
+                 "ghost": 0, "dark": 2, "steel": 2, "fairy": 0.5},
+    "poison": {"grass": 2, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0, "fairy": 2},
+    "ground": {"fire": 2, "electric": 2, "grass": 0.5, "poison": 2, "flying": 0, "bug": 0.5, "rock": 2, "steel": 2},
+    "flying": {"electric": 0.5, "grass": 2, "fighting": 2, "bug": 2, "rock": 0.5, "steel": 0.5},
+    "psychic": {"fighting": 2, "poison": 2, "psychic": 0.5, "dark": 0, "steel": 0.5},
+    "bug": {"fire": 0.5, "grass": 2, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2, "ghost": 0.5,
+            "dark": 2, "steel": 0.5, "fairy": 0.5},
+    "rock": {"fire": 2, "ice": 2, "fighting": 0.5, "ground": 0.5, "flying": 2, "bug": 2, "steel": 0.5},
+    "ghost": {"normal": 0, "psychic": 2, "ghost": 2, "dark": 0.5},
+    "dragon": {"dragon": 2, "steel": 0.5, "fairy": 0},
+    "dark": {"fighting": 0.5, "psychic": 2, "ghost": 2, "dark": 0.5, "fairy": 0.5},
+    "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2, "rock": 2, "steel": 0.5, "fairy": 2},
+    "fairy": {"fire": 0.5, "fighting": 2, "poison": 0.5, "dragon": 2, "dark": 2, "steel": 0.5},
+}
+
+CHART = np.ones((len(TYPES), len(TYPES)), dtype=np.float32)
+for _attacker, _multipliers in _EFFECTIVENESS.items():
+    for _defender, _multiplier in _multipliers.items():
+        CHART[TYPE_INDEX[_attacker], TYPE_INDEX[_defender]] = _multiplier
+
+def move_key(name):
+    """
+    Normalizes a move name so that set names ("U-turn", "King's Shield")
+    match PokeAPI names ("u-turn", "kings-shield").
+    """
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def set_move_names(variant):
+    """Returns the names of every move in a Variant record's competitive sets, slot options included."""
+    names = set()
+    for set_record in variant.all_sets():
+        for options in set_record.moves:
+            names.update(options)
+    return names
+
+def type_mask(types):
+    """Returns a boolean vector over TYPES marking the given types."""
+    mask = np.zeros(len(TYPES), dtype=bool)
+    mask[[TYPE_INDEX[t] for t in types if t in TYPE_INDEX]] = True
+    return mask
+
+def defense_vector(types):
+    """
+    Returns the multiplier of every attacking type against a Pokémon with
+    these types.
+    """
+    indices = [TYPE_INDEX[t] for t in types if t in TYPE_INDEX]
+    return CHART[:, indices].prod(axis=1)
+
+class TypeMatchups:
+    """
+    Defensive multiplier vectors of every type combination in the database
+    (combos x 18 attacking types), with each variant mapped to its combo,
+    and the types of damaging moves by normalized name.
+
+    :param variant_types: Types of every variant, in StatMatrix row order.
+    :param move_types: {move name: (type, damage class)} of known moves.
+    """
+
+    def __init__(self, variant_types, move_types):
+        self.combos = sorted({tuple(types) for types in variant_types})
+        combo_of = {combo: i for i, combo in enumerate(self.combos)}
+        self.variant_combo = np.array([combo_of[tuple(types)] for types in variant_types], dtype=np.int32)
+        self.defense = np.array([defense_vector(combo) for combo in self.combos], dtype=np.float32).reshape(-1, len(TYPES))
+        self.stab = np.array([type_mask(combo) for combo in self.combos], dtype=bool).reshape(-1, len(TYPES))
+        # super_effective[c, a]: attacking type a hits combo c for more than neutral damage.
+        self.super_effective = self.defense > 1
+        # stab_hits[c, k]: combo k's own types hit combo c super effectively.
+        self.stab_hits = (self.super_effective.astype(np.int32) @ self.stab.T.astype(np.int32)) > 0
+        self.move_types = {
+            move_key(name): move_type for name, (move_type, damage_class) in move_types.items()
+            if move_type in TYPE_INDEX and damage_class != "status"
+        }
+
+    def attack_types(self, move_names):
+        """
+        Returns the boolean vector of attacking types covered by the damaging
+        moves among `move_names`. Unknown and status moves are ignored.
+        """
+        return type_mask({self.move_types.get(move_key(name)) for name in move_names})
+
+    def team_defense(self, rows):
+        """Returns the (members x 18) multipliers against the variants in `rows`."""
+        return self.defense[self.variant_combo[list(rows)]]
+
+    def coverage(self, attack_types):
+        """
+        Returns a boolean vector over combos marking those hit super
+        effectively by at least one of the attacking types.
+        """
+        return self.super_effective[:, attack_types].any(axis=1)
+
+    def score_candidates(self, team_rows, team_attack_types):
+        """
+        Scores every type combination as the next team member, in one batch.
+
+        A candidate's defensive value is the number of attacking types the
+        team is weak to (more members weak than resistant) once it joins;
+        its offensive value is the share of database combos the team then
+        hits super effectively, counting the candidate's own types as its
+        attacks.
+
+        :param team_rows: StatMatrix rows of the current members.
+        :param team_attack_types: Boolean vector of the team's attacking types.
+        :return: (open weaknesses per combo, coverage share per combo).
+        """
+        team = self.team_defense(team_rows)
+        weak = (team > 1).sum(axis=0)
+        resist = (team < 1).sum(axis=0)
+        open_weaknesses = ((weak + (self.defense > 1)) > (resist + (self.defense < 1))).sum(axis=1)
+
+        covered = self.coverage(team_attack_types)
+        coverage_share = (covered[:, None] | self.stab_hits).mean(axis=0)
+        return open_weaknesses, coverage_share
+
+    def rank_candidates(self, team_rows, team_attack_types, bst, limit=10):
+        """
+        Ranks every variant outside the team as its next member: fewest open
+        weaknesses first, then highest coverage, then highest base stat total.
+
+        :param bst: Base stat total of every variant, in StatMatrix row order.
+        :return: List of (row, open weaknesses, coverage share), best first.
+        """
+        open_weaknesses, coverage_share = self.score_candidates(team_rows, team_attack_types)
+        weaknesses = open_weaknesses[self.variant_combo]
+        coverage = coverage_share[self.variant_combo]
+        order = np.lexsort((-np.asarray(bst), -coverage, weaknesses))
+        order = order[~np.isin(order, list(team_rows))][:limit]
+        return [(int(row), int(weaknesses[row]), float(coverage[row])) for row in order]
+
+@st.cache_resource(max_entries=1)
+def load_type_matchups(version=None):
+    """
+    Builds the type matchups once per process and dataset version.
+    """
+    return TypeMatchups(load_stat_matrix(version).variant_types, load_details(version).move_types())
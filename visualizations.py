@@ -1,12 +1,36 @@
+import json
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from snapshot import MISSING_STAT, STAT_NAMES
+
+# Radar charts prerendered by database_construction/prerender_charts.py.
+RADAR_BUNDLE_PATH = "radar_charts.json"
+
+# Number of distinct stat lines whose figures are kept in memory.
+RADAR_CACHE_SIZE = 2048
+
+def stat_items(base_stats):
+    """
+    Returns the (stat, value) pairs of a stat line: a dictionary such as
+    {"hp": 45, "attack": 49, ...}, or stats packed in STAT_NAMES order like
+    records.Variant.stats (MISSING_STAT entries are left out).
+    """
+    if isinstance(base_stats, Mapping):
+        return list(base_stats.items())
+    return [(stat, value) for stat, value in zip(STAT_NAMES, base_stats) if value != MISSING_STAT]
 
 def create_radar_chart(base_stats):
     """
-    Creates an interactive radar chart (polar chart) for a given set of base stats.
-    Expects base_stats to be a dictionary (e.g., {"hp": 45, "attack": 49, ...}).
+    Creates an interactive radar chart (polar chart) for a given set of base stats,
+    a dictionary (e.g., {"hp": 45, "attack": 49, ...}) or packed stats (see stat_items).
     """
-    categories = list(base_stats.keys())
-    values = list(base_stats.values())
+    categories = [stat for stat, _ in stat_items(base_stats)]
+    values = [value for _, value in stat_items(base_stats)]
     
     # Close the radar chart loop by appending the first element.
     categories.append(categories[0])
@@ -32,3 +56,71 @@ def create_radar_chart(base_stats):
     )
     
     return fig
+
+def radar_chart_key(base_stats):
+    """
+    Returns the cache key of a stat line, e.g. "hp=45,attack=49,...".
+    Variants with identical stats share one chart.
+    """
+    return ",".join(f"{stat}={value}" for stat, value in stat_items(base_stats))
+
+_prerendered = None
+
+def _prerendered_charts():
+    """Loads the prerendered chart bundle once per process, if one was built."""
+    global _prerendered
+    if _prerendered is None:
+        _prerendered = {}
+        if os.path.exists(RADAR_BUNDLE_PATH):
+            with open(RADAR_BUNDLE_PATH, "r", encoding="utf-8") as f:
+                _prerendered = json.load(f)["charts"]
+    return _prerendered
+
+@lru_cache(maxsize=RADAR_CACHE_SIZE)
+def _radar_chart_json(key):
+    figure_json = _prerendered_charts().get(key)
+    if figure_json is None:
+        stats = dict(item.split("=") for item in key.split(","))
+        figure_json = create_radar_chart({stat: int(value) for stat, value in stats.items()}).to_json()
+    return figure_json
+
+@lru_cache(maxsize=RADAR_CACHE_SIZE)
+def _radar_chart_figure(key):
+    return pio.from_json(_radar_chart_json(key))
+
+def radar_chart_json(base_stats):
+    """
+    Returns the serialized radar chart figure for a stat line, from the
+    prerendered bundle or built once and kept in an LRU cache.
+    """
+    return _radar_chart_json(radar_chart_key(base_stats))
+
+def cached_radar_chart(base_stats):
+    """
+    Returns the radar chart figure for a stat line. The figure is built once
+    from its serialized JSON and shared by every caller with the same stats,
+    so it must be treated as read-only.
+    """
+    return _radar_chart_figure(radar_chart_key(base_stats))
+
+def prerender_radar_charts(data, path=RADAR_BUNDLE_PATH):
+    """
+    Renders the radar chart of every variant in the database into a static
+    bundle mapping stat keys to figure JSON.
+
+    :param data: The combined database.
+    :param path: Where to write the bundle.
+    :return: Number of distinct charts written.
+    """
+    charts = {}
+    for pokemon in data.get("pokemon", []):
+        for variant in pokemon.get("variants", []):
+            base_stats = variant.get("base_stats", {})
+            if base_stats:
+                key = radar_chart_key(base_stats)
+                if key not in charts:
+                    charts[key] = create_radar_chart(base_stats).to_json()
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"charts": charts}, f, separators=(",", ":"))
+    return len(charts)